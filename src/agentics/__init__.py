@@ -2,6 +2,16 @@ import importlib.metadata
 
 from .llm import LLM
 from .embedding import Embedding
+from .cache import EmbeddingCache
+from .index import EmbeddingIndex
+from .ann import IVFIndex
+from .store import VectorStore
+from .quantization import QuantizedIndex
+from .sharded import ShardedIndex
+from .pipeline import EmbeddingPipeline
+from .chunker import Chunker
+from .lexical import BM25Index, HybridRetriever
+from .semantic_cache import SemanticCache
 from .utils import (
     system_message,
     user_message,
@@ -9,7 +19,7 @@ from .utils import (
     tool_message,
     tool_calls_message,
 )
-from .dspy_core import Program
+from .dspy_core import Program, Dataset
 
 __version__ = importlib.metadata.version("agentics")
 
@@ -17,6 +27,17 @@ __all__ = [
     # Main classes
     "LLM",
     "Embedding",
+    "EmbeddingCache",
+    "EmbeddingIndex",
+    "IVFIndex",
+    "VectorStore",
+    "QuantizedIndex",
+    "ShardedIndex",
+    "EmbeddingPipeline",
+    "Chunker",
+    "BM25Index",
+    "HybridRetriever",
+    "SemanticCache",
     # Utility functions
     "system_message",
     "user_message",
@@ -26,4 +47,5 @@ __all__ = [
 
     # Dspy Core
     "Program",
+    "Dataset",
 ]
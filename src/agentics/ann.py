@@ -0,0 +1,348 @@
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import Hashable, Iterable, List, Optional, Tuple, Union
+from .embedding import Embedding
+from .index import check_json_ids, normalize, top_k
+
+
+def kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    seed: int = 42,
+    chunk_size: int = 65536,
+) -> np.ndarray:
+    """
+    Spherical k-means: cluster normalized vectors by cosine similarity.
+
+    Args:
+        vectors (np.ndarray): Normalized float32 vectors of shape (n, d).
+        n_clusters (int): Number of centroids to learn.
+        n_iter (int): Number of Lloyd iterations. Defaults to 20.
+        seed (int): Random seed for initialization and reseeding empty clusters.
+        chunk_size (int): Rows assigned per matrix product, bounds peak memory.
+
+    Returns:
+        np.ndarray: Normalized float32 centroids of shape (n_clusters, d).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    n_clusters = min(n_clusters, n)
+    centroids = vectors[rng.choice(n, n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = assign(vectors, centroids, chunk_size)
+        # Sum each cluster's members as one contiguous run of the sorted vectors
+        order = np.argsort(assignments, kind="stable")
+        clusters, bounds = np.unique(assignments[order], return_index=True)
+        sums = np.zeros_like(centroids)
+        sums[clusters] = np.add.reduceat(vectors[order], bounds, axis=0)
+        empty = np.ones(n_clusters, dtype=bool)
+        empty[clusters] = False
+        if empty.any():
+            sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Return the index of the most similar centroid for each vector."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        block = vectors[start:start + chunk_size]
+        assignments[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    An approximate nearest-neighbour index using an inverted file (IVF).
+
+    Vectors are clustered around `nlist` k-means centroids. A query only scores the
+    vectors in its `nprobe` closest clusters, trading a little recall for a large
+    reduction in work: roughly nprobe / nlist of the corpus is scanned per query.
+
+    Without an explicit `train`, the first `add` trains on its own vectors, and the
+    index retrains on everything stored whenever the corpus grows `retrain_growth`
+    times past the vectors it was trained on, so a small first batch doesn't fix poor
+    centroids for good. Retraining costs are amortized by the geometric growth. Calling
+    `train` on a representative sample turns retraining off.
+
+    Args:
+        nlist (int, optional): Number of clusters. If None, 4 * sqrt(n) of the training set.
+        nprobe (int, optional): Clusters scanned per query by default. Higher is more
+            accurate and slower. Defaults to 8.
+        seed (int, optional): Random seed for k-means. Defaults to 42.
+        retrain_growth (float, optional): Corpus growth factor that triggers retraining a
+            self-trained index. None disables it. Defaults to 4.
+
+    Attributes:
+        centroids (np.ndarray): The learned centroids, or None before training.
+        ids (List[Hashable]): The id of each stored vector, in insertion order.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        seed: int = 42,
+        retrain_growth: Optional[float] = 4.0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.retrain_growth = retrain_growth
+        self.centroids: Optional[np.ndarray] = None
+        self._requested_nlist = nlist
+        # Corpus size when `add` last trained the index itself, None after an explicit `train`
+        self._trained_on: Optional[int] = None
+        self.ids: List[Hashable] = []
+        self._lists: List[np.ndarray] = []
+        self._rows: List[np.ndarray] = []
+        self._sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: Union[List[List[float]], np.ndarray], max_samples: int = 256) -> None:
+        """
+        Learn the cluster centroids from a representative sample of vectors. Must be
+        called before any vector is added.
+
+        Args:
+            vectors (Union[List[List[float]], np.ndarray]): Training vectors of shape (n, d).
+            max_samples (int): At most this many vectors per cluster are used for k-means.
+        """
+        if self.ids:
+            raise ValueError("train must be called before adding vectors")
+        self._train(normalize(vectors), max_samples)
+        self._trained_on = None
+
+    def _train(self, vectors: np.ndarray, max_samples: int = 256) -> None:
+        nlist = self._requested_nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        limit = max_samples * nlist
+        if len(vectors) > limit:
+            sample = np.random.default_rng(self.seed).choice(len(vectors), limit, replace=False)
+            vectors = vectors[sample]
+
+        self.centroids = kmeans(vectors, nlist, seed=self.seed)
+        self.nlist = len(self.centroids)
+        dim = self.centroids.shape[1]
+        self._lists = [np.empty((0, dim), dtype=np.float32) for _ in range(self.nlist)]
+        self._rows = [np.empty(0, dtype=np.int64) for _ in range(self.nlist)]
+        self._sizes = [0] * self.nlist
+
+    def add(
+        self,
+        vectors: Union[List[List[float]], np.ndarray],
+        ids: Optional[Iterable[Hashable]] = None,
+    ) -> List[Hashable]:
+        """
+        Add vectors to the index, training it on them first if needed.
+
+        Args:
+            vectors (Union[List[List[float]], np.ndarray]): Vectors of shape (n, d).
+            ids (Iterable[Hashable], optional): An id per vector. Defaults to insertion positions.
+
+        Returns:
+            List[Hashable]: The ids of the added vectors.
+        """
+        vectors = normalize(vectors)
+        start = len(self.ids)
+        ids = list(ids) if ids is not None else list(range(start, start + len(vectors)))
+        if len(ids) != len(vectors):
+            raise ValueError("ids must have one entry per vector")
+        if not self.is_trained:
+            self._train(vectors)
+            self._trained_on = len(vectors)
+
+        self._insert(vectors, np.arange(start, start + len(vectors)))
+        self.ids.extend(ids)
+        if self._trained_on is not None and self.retrain_growth and len(self.ids) >= self.retrain_growth * self._trained_on:
+            self._retrain()
+        return ids
+
+    def _insert(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """Append vectors, with their row numbers, to the posting lists of their closest centroids."""
+        assignments = assign(vectors, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        clusters, bounds = np.unique(assignments[order], return_index=True)
+        for cluster, group in zip(clusters, np.split(order, bounds[1:])):
+            self._append(int(cluster), vectors[group], rows[group])
+
+    def _retrain(self) -> None:
+        """Train on every stored vector and redistribute them over the new centroids."""
+        vectors = np.concatenate([self._lists[c][:self._sizes[c]] for c in range(self.nlist)])
+        rows = np.concatenate([self._rows[c][:self._sizes[c]] for c in range(self.nlist)])
+        order = np.argsort(rows)
+        vectors, rows = vectors[order], rows[order]
+        self._train(vectors)
+        self._trained_on = len(vectors)
+        self._insert(vectors, rows)
+
+    def _append(self, cluster: int, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """Append to a cluster's posting list, growing its buffers geometrically."""
+        size = self._sizes[cluster]
+        needed = size + len(vectors)
+        if needed > len(self._lists[cluster]):
+            capacity = max(needed, 2 * len(self._lists[cluster]), 16)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self._lists[cluster][:size]
+            grown_rows = np.empty(capacity, dtype=np.int64)
+            grown_rows[:size] = self._rows[cluster][:size]
+            self._lists[cluster], self._rows[cluster] = grown, grown_rows
+        self._lists[cluster][size:needed] = vectors
+        self._rows[cluster][size:needed] = rows
+        self._sizes[cluster] = needed
+
+    def search(
+        self,
+        query: Union[List[float], np.ndarray],
+        k: int = 10,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Find the approximate k nearest stored vectors to a query vector.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            k (int): Number of results to return. Defaults to 10.
+            nprobe (int, optional): Clusters to scan, overriding the index default.
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id, score) tuples sorted in descending order
+                of cosine similarity.
+        """
+        if not self.ids:
+            return []
+        query = normalize(query)
+        probes = top_k(self.centroids @ query, nprobe or self.nprobe)
+
+        scores, rows = [], []
+        for cluster in probes:
+            size = self._sizes[cluster]
+            if size:
+                scores.append(self._lists[cluster][:size] @ query)
+                rows.append(self._rows[cluster][:size])
+        if not scores:
+            return []
+        scores, rows = np.concatenate(scores), np.concatenate(rows)
+
+        best = top_k(scores, k)
+        return [(self.ids[row], float(score)) for row, score in zip(rows[best], scores[best])]
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Save the index to a single .npz file. Ids are stored as JSON, so they must be str or int.
+
+        Args:
+            path (Union[str, Path]): Destination file.
+
+        Returns:
+            Path: The path the index was saved to.
+        """
+        check_json_ids(self.ids)
+        path = Path(path)
+        vectors = [self._lists[c][:self._sizes[c]] for c in range(self.nlist or 0)]
+        rows = [self._rows[c][:self._sizes[c]] for c in range(self.nlist or 0)]
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids if self.is_trained else np.empty((0, 0), dtype=np.float32),
+                vectors=np.concatenate(vectors) if vectors else np.empty((0, 0), dtype=np.float32),
+                rows=np.concatenate(rows) if rows else np.empty(0, dtype=np.int64),
+                sizes=np.array(self._sizes, dtype=np.int64),
+                config=np.array(json.dumps({
+                    "nprobe": self.nprobe,
+                    "seed": self.seed,
+                    "ids": self.ids,
+                    "nlist": self._requested_nlist,
+                    "retrain_growth": self.retrain_growth,
+                    "trained_on": self._trained_on,
+                })),
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IVFIndex":
+        """
+        Load an index saved with `save`.
+
+        Args:
+            path (Union[str, Path]): The .npz file to load.
+
+        Returns:
+            IVFIndex: The restored index.
+        """
+        with np.load(path) as data:
+            config = json.loads(str(data["config"]))
+            index = cls(
+                nlist=config.get("nlist"),
+                nprobe=config["nprobe"],
+                seed=config["seed"],
+                retrain_growth=config.get("retrain_growth"),
+            )
+            index.ids = config["ids"]
+            index._trained_on = config.get("trained_on")
+            if data["centroids"].size:
+                index.centroids = data["centroids"]
+                index.nlist = len(index.centroids)
+                sizes = data["sizes"]
+                bounds = np.cumsum(sizes)[:-1]
+                index._lists = np.split(data["vectors"], bounds)
+                index._rows = np.split(data["rows"], bounds)
+                index._sizes = sizes.tolist()
+        return index
+
+
+def benchmark(
+    index,
+    queries: Union[List[List[float]], np.ndarray],
+    vectors: Union[List[List[float]], np.ndarray],
+    k: int = 10,
+    params: Iterable[dict] = ({},),
+) -> List[dict]:
+    """
+    Measure the recall and latency of an index against exact `Embedding.rank` results.
+
+    The index must have been built from `vectors` with the default ids, so that ids
+    are positions in `vectors`.
+
+    Args:
+        index: Any index with a `search(query, k, **params)` method.
+        queries (Union[List[List[float]], np.ndarray]): Query vectors.
+        vectors (Union[List[List[float]], np.ndarray]): The indexed corpus.
+        k (int): Number of neighbours compared per query. Defaults to 10.
+        params (Iterable[dict]): Search keyword arguments to try, e.g. [{"nprobe": 1}, {"nprobe": 8}].
+
+    Returns:
+        List[dict]: Per parameter set, the `recall` at k, mean `latency_ms` and `qps`.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    exact = [{idx for idx, _ in Embedding.rank(query, vectors)[:k]} for query in queries]
+
+    report = []
+    for search_params in params:
+        found, total = 0, 0
+        start = time.perf_counter()
+        results = [index.search(query, k=k, **search_params) for query in queries]
+        elapsed = time.perf_counter() - start
+        for truth, result in zip(exact, results):
+            found += len(truth & {id for id, *_ in result})
+            total += len(truth)
+        report.append({
+            **search_params,
+            "recall": found / total if total else 1.0,
+            "latency_ms": 1000 * elapsed / len(queries),
+            "qps": len(queries) / elapsed,
+        })
+    return report
@@ -0,0 +1,176 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Union
+
+
+class EmbeddingCache:
+    """
+    A persistent cache for embedding vectors backed by SQLite.
+
+    Vectors are stored as float32 blobs keyed by a hash of (model, dimensions, text),
+    so the same text embedded with a different model or output size never collides.
+    Lookups return read-only NumPy views over the stored bytes, without copying.
+
+    Args:
+        path (Union[str, Path], optional): SQLite database file. Use ":memory:" for a
+            process-local cache. Defaults to "embeddings.sqlite".
+        max_bytes (int, optional): Evict least recently used vectors once the stored
+            vectors exceed this size. Defaults to None (unbounded).
+        max_entries (int, optional): Evict least recently used vectors once more than
+            this many are stored. Defaults to None (unbounded).
+
+    Attributes:
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups not found in the cache.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "embeddings.sqlite",
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, dimensions: Optional[int], text: str) -> str:
+        """Hash a (model, dimensions, text) triple into a cache key."""
+        digest = hashlib.sha256(f"{model}\0{dimensions}\0{text}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, model: str, dimensions: Optional[int], texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors for a list of texts.
+
+        Args:
+            model (str): The embedding model identifier.
+            dimensions (Optional[int]): The requested output size, or None for the model default.
+            texts (List[str]): The texts to look up.
+
+        Returns:
+            List[Optional[np.ndarray]]: A float32 vector per text, or None for cache misses.
+        """
+        keys = [self.key(model, dimensions, text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                )
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return [
+            np.frombuffer(found[key], dtype=np.float32) if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, model: str, dimensions: Optional[int], texts: List[str], vectors) -> None:
+        """
+        Store vectors for a list of texts, evicting old entries if over capacity.
+
+        Args:
+            model (str): The embedding model identifier.
+            dimensions (Optional[int]): The requested output size, or None for the model default.
+            texts (List[str]): The texts that were embedded.
+            vectors: One embedding vector per text.
+        """
+        now = time.time()
+        rows = [
+            (self.key(model, dimensions, text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both capacity limits are met."""
+        if self.max_entries is not None:
+            self._conn.execute(
+                """
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            doomed = []
+            for key, size in self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used ASC"
+            ):
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached vector and reset the statistics."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
@@ -0,0 +1,251 @@
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from .embedding import estimate_tokens
+
+PARAGRAPH = re.compile(r"\S(?:.*?\S)?(?=\s*\n\s*\n|\s*$)", re.DOTALL)
+SENTENCE = re.compile(r"\S.*?(?:[.!?…。！？]+(?=\s)|$)", re.DOTALL)
+WORD = re.compile(r"\S+")
+
+
+class Chunk(NamedTuple):
+    """A piece of a source text, with its character offsets in that text."""
+
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+def load_token_counter(encoding: str = "cl100k_base") -> Callable[[str], int]:
+    """
+    Return a function counting tokens with tiktoken, if available.
+
+    Falls back to `estimate_tokens`, a conservative byte-based estimate, when tiktoken
+    is not installed or the encoding cannot be loaded.
+    """
+    try:
+        import tiktoken
+
+        encoder = tiktoken.get_encoding(encoding)
+    except Exception:
+        return estimate_tokens
+    return lambda text: len(encoder.encode_ordinary(text))
+
+
+class Chunker:
+    """
+    Split long texts into token-bounded, overlapping chunks for `Embedding`.
+
+    Text is split into sentences, which never span paragraph boundaries (blank lines),
+    and sentences longer than the budget into words. The pieces are packed greedily
+    into chunks of at most `max_tokens` tokens, and consecutive chunks share up to
+    `overlap` tokens of trailing sentences. Each chunk keeps the character offsets of
+    its span in the source, and its text is the exact source slice, whitespace included.
+
+    Token counts come from tiktoken when it is installed and fall back to a
+    conservative estimate otherwise. Counts are cached per sentence and separator,
+    which pays off on corpora with repeated boilerplate. Pieces are packed by the sum
+    of their counts, separators included, and a chunk's count is that of its joined
+    text, checked against the budget before the chunk is emitted.
+
+    Args:
+        max_tokens (int, optional): Maximum tokens per chunk. Defaults to 512.
+        overlap (int, optional): Tokens of trailing context repeated in the next chunk. Defaults to 64.
+        encoding (str, optional): tiktoken encoding name. Defaults to "cl100k_base".
+        count_tokens (Callable[[str], int], optional): Custom token counter, overriding the encoding.
+        cache_size (int, optional): Number of token counts cached. Defaults to 65536.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        overlap: int = 64,
+        encoding: str = "cl100k_base",
+        count_tokens: Optional[Callable[[str], int]] = None,
+        cache_size: int = 65536,
+    ):
+        if overlap >= max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        # Whole chunks and word windows rarely repeat, so they are counted without the cache
+        self._count_text = count_tokens or load_token_counter(encoding)
+        self.count_tokens = lru_cache(maxsize=cache_size)(self._count_text)
+
+    def _pieces(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, tokens) sentence spans no larger than max_tokens, in order."""
+        for paragraph in PARAGRAPH.finditer(text):
+            for sentence in SENTENCE.finditer(text, paragraph.start(), paragraph.end()):
+                tokens = self.count_tokens(sentence.group())
+                if tokens <= self.max_tokens:
+                    yield sentence.start(), sentence.end(), tokens
+                    continue
+                for word in WORD.finditer(text, sentence.start(), sentence.end()):
+                    yield from self._split_word(word.start(), word.end(), text)
+
+    def _split_word(self, start: int, end: int, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Split a span that is over budget on its own into the longest windows that fit."""
+        tokens = self.count_tokens(text[start:end])
+        if tokens <= self.max_tokens:
+            yield start, end, tokens
+            return
+        # A character can cost several tokens, so search for each window's end
+        window = start
+        while window < end:
+            low, high = window + 1, end
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self._count_text(text[window:middle]) <= self.max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            # A single character over budget cannot be split further
+            yield window, low, self._count_text(text[window:low])
+            window = low
+
+    def _gap(self, text: str, left: Tuple[int, int, int], right: Tuple[int, int, int]) -> int:
+        """Tokens of the separator between two consecutive pieces."""
+        return self.count_tokens(text[left[1]:right[0]]) if right[0] > left[1] else 0
+
+    def _estimate(self, text: str, window: List[Tuple[int, int, int]]) -> int:
+        """Tokens of a window's pieces and the separators between them."""
+        return sum(piece[2] for piece in window) + sum(self._gap(text, a, b) for a, b in zip(window, window[1:]))
+
+    def chunk(self, text: str) -> Iterator[Chunk]:
+        """
+        Lazily split a text into chunks.
+
+        Args:
+            text (str): The text to split.
+
+        Yields:
+            Chunk: (text, start, end, tokens) for each chunk, in order.
+        """
+        pieces = self._pieces(text)
+        # Pieces put back by `_emit`, next one last
+        pending: List[Tuple[int, int, int]] = []
+        window: List[Tuple[int, int, int]] = []
+        window_tokens = 0
+        # Leading pieces of the window repeated from the previous chunk
+        carried = 0
+        while True:
+            piece = pending.pop() if pending else next(pieces, None)
+            if piece is None and not window:
+                return
+            cost = 0 if piece is None else piece[2] + (self._gap(text, window[-1], piece) if window else 0)
+            if piece is None or (window and window_tokens + cost > self.max_tokens):
+                chunk, emitted = self._emit(text, window)
+                if emitted <= carried:
+                    # The overlap leaves no room for any new piece, so drop it
+                    window = window[carried:]
+                    chunk, emitted = self._emit(text, window)
+                yield chunk
+                if piece is not None:
+                    pending.append(piece)
+                pending.extend(reversed(window[emitted:]))
+                if not pending:
+                    return
+                window, window_tokens = self._carry(text, window[:emitted], pending[-1])
+                carried = len(window)
+                continue
+            window.append(piece)
+            window_tokens += cost
+
+    def _carry(
+        self,
+        text: str,
+        emitted: List[Tuple[int, int, int]],
+        upcoming: Tuple[int, int, int],
+    ) -> Tuple[List[Tuple[int, int, int]], int]:
+        """The longest suffix of an emitted window within the overlap budget that leaves room for the next piece."""
+        carried: List[Tuple[int, int, int]] = []
+        for piece in reversed(emitted):
+            if self._estimate(text, [piece] + carried) > self.overlap:
+                break
+            carried.insert(0, piece)
+        while carried and self._estimate(text, carried + [upcoming]) > self.max_tokens:
+            carried.pop(0)
+        return carried, self._estimate(text, carried)
+
+    def _emit(self, text: str, window: List[Tuple[int, int, int]]) -> Tuple[Chunk, int]:
+        """
+        The chunk of the longest prefix of the window whose joined text fits the budget,
+        and the number of pieces it holds.
+        """
+        for size in range(len(window), 0, -1):
+            start, end = window[0][0], window[size - 1][1]
+            tokens = self._count_text(text[start:end])
+            if tokens <= self.max_tokens or size == 1:
+                return Chunk(text[start:end], start, end, tokens), size
+
+    def __call__(self, text: str) -> List[Chunk]:
+        """Split a text into a list of chunks."""
+        return list(self.chunk(text))
+
+    def chunk_documents(
+        self,
+        documents: Iterable[Union[str, dict]],
+        text_key: str = "text",
+        id_key: str = "id",
+    ) -> Iterator[dict]:
+        """
+        Lazily chunk a stream of documents into records for `EmbeddingPipeline`.
+
+        Args:
+            documents (Iterable[Union[str, dict]]): Strings, or dicts with the text under
+                `text_key` and an optional id under `id_key`. Other fields are copied to
+                every chunk.
+            text_key (str): Key of the text in dict documents. Defaults to "text".
+            id_key (str): Key of the id in dict documents. Defaults to "id".
+
+        Yields:
+            dict: One record per chunk, with id "<document id>:<chunk number>", the chunk
+                text, and `document_id`, `start`, `end` and `tokens` fields.
+        """
+        for position, document in enumerate(documents):
+            if isinstance(document, str):
+                document = {text_key: document}
+            document_id = document.get(id_key, position)
+            extra = {key: value for key, value in document.items() if key not in (text_key, id_key)}
+            for number, chunk in enumerate(self.chunk(document[text_key])):
+                yield {
+                    **extra,
+                    id_key: f"{document_id}:{number}",
+                    text_key: chunk.text,
+                    "document_id": document_id,
+                    "start": chunk.start,
+                    "end": chunk.end,
+                    "tokens": chunk.tokens,
+                }
+
+    def benchmark(self, texts: Iterable[str]) -> dict:
+        """
+        Measure chunking throughput over a sample of texts.
+
+        Args:
+            texts (Iterable[str]): Sample texts.
+
+        Returns:
+            dict: Totals of `documents`, `chunks`, `characters` and `tokens`, the elapsed
+                `seconds`, and `chars_per_second` and `tokens_per_second` throughput.
+        """
+        documents = chunks = characters = tokens = 0
+        start = time.perf_counter()
+        for text in texts:
+            documents += 1
+            characters += len(text)
+            for chunk in self.chunk(text):
+                chunks += 1
+                tokens += chunk.tokens
+        seconds = time.perf_counter() - start
+        return {
+            "documents": documents,
+            "chunks": chunks,
+            "characters": characters,
+            "tokens": tokens,
+            "seconds": seconds,
+            "chars_per_second": characters / seconds if seconds else 0.0,
+            "tokens_per_second": tokens / seconds if seconds else 0.0,
+        }
@@ -1,3 +1,4 @@
 from .base import Program
+from .dataset import Dataset
 
-__all__ = ["Program"]
\ No newline at end of file
+__all__ = ["Program", "Dataset"]
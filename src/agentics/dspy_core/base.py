@@ -1,10 +1,56 @@
 from abc import abstractmethod, ABCMeta
 from functools import wraps
-import asyncio, inspect, json, platform, datetime
+import asyncio, contextlib, contextvars, inspect, json, math, os, platform, random, datetime, threading
+from collections import OrderedDict
+import cloudpickle
 import dspy
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Any, Callable, Optional, Literal
+from tqdm.auto import tqdm
 from dspy.teleprompt.teleprompt import Teleprompter
+from dspy.evaluate.evaluate import EvaluationResult
+from .checkpoint import OptimizationCheckpoint
+from .dataset import Dataset
+from .eval_cache import EvaluationCache, fingerprint, lm_fingerprint, program_fingerprint
+from .metrics import MetricBatcher, batch_scores
+from .telemetry import Telemetry
+from .registry import VersionRegistry, atomic_write_json, default_storage_root
+
+
+# Background evaluations started by `Program.save`; pending ones finish before exit
+_scoring_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="program-scoring")
+
+OPTIMIZERS = ("BootstrapFewShot", "MIPROv2", "SIMBA", "GEPA")
+
+# Train/validation splits of recently used datasets, see `Program._split_dataset`
+_splits: "OrderedDict[tuple, tuple]" = OrderedDict()
+_splits_lock = threading.Lock()
+SPLITS_SIZE = 16
+
+
+def _sweep_worker(program: "Program | bytes", optimizer_name: str, params: dict) -> dict:
+    """Run one sweep configuration: optimize, score on the valset and save a new version."""
+    if isinstance(program, bytes):
+        # dspy signatures are dynamic classes, which only cloudpickle can ship to a process
+        program = cloudpickle.loads(program)
+    try:
+        optimized = getattr(program, optimizer_name)(**params)
+        path = optimized.save(wait_for_score=True)
+    except Exception as e:
+        return {"score": None, "path": None, "error": repr(e), "telemetry": None}
+    totals = optimized.telemetry["totals"] if optimized.telemetry else None
+    return {"score": optimized.score, "path": str(path), "error": None, "telemetry": totals}
+
+
+def _evaluate_worker(program: bytes, examples: "list | bytes", num_threads: int) -> list[tuple]:
+    """Evaluate one shard in a worker process, returning (prediction, score) per example."""
+    program = cloudpickle.loads(program)
+    if isinstance(examples, bytes):
+        # A shard of a file-backed Dataset, read from the file here
+        examples = cloudpickle.loads(examples).to_list()
+    results = program._evaluate(examples, num_threads, display_progress=False).results
+    return [(prediction, score) for _, prediction, score in results]
 
 
 class ProgramMeta(type(dspy.Module), ABCMeta):
@@ -12,13 +58,17 @@ class ProgramMeta(type(dspy.Module), ABCMeta):
 
 
 class Program(dspy.Module, metaclass=ProgramMeta):
-    def __init__(self, lm: dspy.LM = None, seed: int = 42):
+    def __init__(self, lm: dspy.LM = None, seed: int = 42, storage_root: Path | str | None = None):
         super().__init__()
         self.seed = seed
         self.lm: dspy.LM = lm or dspy.settings.lm
+        self.storage_root = Path(storage_root) if storage_root else default_storage_root()
         self.optimizer: Teleprompter = None
         self.optimized_program = None
         self.score = None
+        self.evaluation_report = None
+        self.scoring: Future | None = None
+        self.telemetry: dict | None = None
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -43,13 +93,14 @@ class Program(dspy.Module, metaclass=ProgramMeta):
 
     async def acall(self, *a, **k):
         with dspy.context(lm=self.lm):
-            sup_acall = getattr(super(), "acall", None)
-            if callable(sup_acall) and inspect.iscoroutinefunction(sup_acall):
-                return await sup_acall(*a, **k)
-            af = getattr(self, "aforward", None)
-            if callable(af) and inspect.iscoroutinefunction(af):
-                return await af(*a, **k)
-            return await asyncio.to_thread(lambda: super().__call__(*a, **k))
+            if self.has_native_aforward():
+                return await super().acall(*a, **k)
+            return await asyncio.to_thread(self.__call__, *a, **k)
+
+    @classmethod
+    def has_native_aforward(cls) -> bool:
+        """Whether a subclass implements `aforward` instead of inheriting the placeholder."""
+        return cls.aforward is not Program.aforward
 
     @abstractmethod
     def forward(self, *args, **kwargs):
@@ -58,27 +109,191 @@ class Program(dspy.Module, metaclass=ProgramMeta):
     async def aforward(self, *args, **kwargs):
         raise NotImplementedError
 
+    ##### Bulk inference #####
+
+    @staticmethod
+    def _batch_inputs(inputs) -> list[dict]:
+        """Keyword arguments of each input: dicts as-is, dspy.Examples by their input fields."""
+        return [dict(item.inputs()) if isinstance(item, dspy.Example) else dict(item) for item in inputs]
+
+    @staticmethod
+    def _progress(total: int, progress: bool | Callable[[int, int], None]):
+        """Return (update, close) callbacks for a progress bar or a (done, total) callback."""
+        if callable(progress):
+            done = 0
+
+            def update():
+                nonlocal done
+                done += 1
+                progress(done, total)
+
+            return update, lambda: None
+        if progress:
+            bar = tqdm(total=total)
+            return lambda: bar.update(1), bar.close
+        return lambda: None, lambda: None
+
+    def batch(
+        self,
+        inputs: list[dict | dspy.Example],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+        progress: bool | Callable[[int, int], None] = False,
+    ) -> list[Any]:
+        """
+        Run the program over many inputs in a thread pool.
+
+        Each call runs under this program's LM and a copy of the caller's dspy context.
+        Results come back in input order.
+
+        Args:
+            inputs: Keyword-argument dicts, or dspy.Examples whose input fields are used.
+            concurrency: Maximum calls in flight. Defaults to 8.
+            return_exceptions: Put a failed item's exception in its result slot instead of
+                raising it. Defaults to True.
+            progress: Show a progress bar, or call `progress(done, total)` after each item.
+
+        Returns:
+            list: One prediction, or exception, per input.
+        """
+        items = self._batch_inputs(inputs)
+        results: list[Any] = [None] * len(items)
+        update, close = self._progress(len(items), progress)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.__call__, **kwargs): i
+                for i, kwargs in enumerate(items)
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[futures[future]] = e
+                update()
+        finally:
+            executor.shutdown(cancel_futures=True)
+            close()
+        return results
+
+    async def abatch(
+        self,
+        inputs: list[dict | dspy.Example],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+        progress: bool | Callable[[int, int], None] = False,
+    ) -> list[Any]:
+        """
+        Async version of `batch`.
+
+        Uses the subclass's native `aforward` when it has one, and worker threads otherwise.
+
+        Args:
+            inputs: Keyword-argument dicts, or dspy.Examples whose input fields are used.
+            concurrency: Maximum calls in flight. Defaults to 8.
+            return_exceptions: Put a failed item's exception in its result slot instead of
+                raising it. Defaults to True.
+            progress: Show a progress bar, or call `progress(done, total)` after each item.
+
+        Returns:
+            list: One prediction, or exception, per input.
+        """
+        items = self._batch_inputs(inputs)
+        update, close = self._progress(len(items), progress)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(kwargs):
+            async with semaphore:
+                try:
+                    return await self.acall(**kwargs)
+                finally:
+                    update()
+
+        tasks = [asyncio.ensure_future(run(kwargs)) for kwargs in items]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            close()
+
     ##### Required for optimization #####
+
+    # Share of `dataset` held out as the default valset
+    validation_split: float = 0.2
+
     @property
     def dataset(self):
-        """Full dataset, list[dspy.Example] - optional, used for training"""
+        """Full dataset, list[dspy.Example] or Dataset - optional, split into trainset and valset by default"""
         return []
 
     @property
     def trainset(self):
-        """Training set, list[dspy.Example] - optional, used for training"""
-        return []
+        """Training set, list[dspy.Example] or Dataset - optional, used for training"""
+        return self._split_dataset()[0]
 
     @property
     def valset(self):
-        """Validation set, list[dspy.Example] - optional, used for validation"""
-        return []
+        """Validation set, list[dspy.Example] or Dataset - optional, used for validation"""
+        return self._split_dataset()[1]
+
+    def _split_dataset(self) -> tuple:
+        """
+        `dataset` split into train and validation parts with `self.seed`, or two empty lists.
+
+        Splits are memoized per dataset, so reading `trainset` and `valset` again reuses
+        them: a file-backed Dataset is identified by its file, anything else by identity
+        (and length, for lists).
+        """
+        dataset = self.dataset
+        from_file = isinstance(dataset, Dataset) and dataset._key is not None
+        if not isinstance(dataset, Dataset) and not dataset:
+            return [], []
+        identity = dataset._key if from_file else (id(dataset), len(dataset) if isinstance(dataset, list) else None)
+        key = (identity, self.seed, self.validation_split)
+        with _splits_lock:
+            hit = _splits.get(key)
+            # Entries keep their dataset alive, so a matching id is the same object
+            if hit is not None and (from_file or hit[0] is dataset):
+                _splits.move_to_end(key)
+                return hit[1]
+        source = dataset if isinstance(dataset, Dataset) else Dataset(dataset)
+        parts = source.split(1 - self.validation_split, self.validation_split, seed=self.seed)
+        with _splits_lock:
+            _splits[key] = (dataset, parts)
+            while len(_splits) > SPLITS_SIZE:
+                _splits.popitem(last=False)
+        return parts
+
+    def _examples(self, name: str) -> list:
+        """The trainset or valset as a list, reading the property once."""
+        examples = getattr(self, name)
+        return examples.to_list() if isinstance(examples, Dataset) else examples
 
     @staticmethod
     def metric(example: dspy.Example, prediction: dspy.Prediction, trace=None, pred_name=None, pred_trace=None) -> float:
         """Evaluation metric for this program - optional, used for evaluation"""
         return 0.0
 
+    # Optional `batch_metric(examples, predictions) -> list[float]`, scoring many pairs at once.
+    # When defined, evaluation and optimizers use it instead of `metric`.
+    batch_metric: Optional[Callable[[list, list], Any]] = None
+    metric_batch_size: int = 64
+
+    def _scoring_metric(self) -> Callable:
+        """The metric scores come from: `batch_metric` if defined, else `metric`."""
+        return self.batch_metric if self.batch_metric is not None else self.metric
+
+    def _optimizer_metric(self) -> Callable:
+        """Per-example metric for optimizers, batching concurrent calls when `batch_metric` is defined."""
+        if self.batch_metric is None:
+            return self.metric
+        return MetricBatcher(self.batch_metric, self.metric_batch_size)
+
     ##### Optimizer Metadata #####
     @property
     def optimizer_name(self) -> str:
@@ -105,16 +320,183 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         return json_serializable_params
 
     ##### Evaluate #####
-    def evaluate(self, num_threads: int = 10):
+    def evaluate(
+        self,
+        num_threads: int = 10,
+        cache: bool = False,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+    ):
+        """
+        Score the program on the valset and store the result in `self.score`.
+
+        With `cache`, each example's prediction and metric score are stored in
+        `<storage_root>/evaluations.sqlite`, keyed by the program's learned state and
+        `forward` source, the LM, the metric's name and source, and the example, and only
+        examples without a stored result are run. Reuse is reported in
+        `self.evaluation_report`. Edits to helpers called by `forward` or the metric are
+        not detected, so pass `cache=False` (the default) after changing them.
+
+        With `executor="process"`, uncached examples are sharded across worker processes,
+        each running its shard with `num_threads` threads, so CPU-heavy metrics are not
+        serialized on the GIL. Results are aggregated exactly as `dspy.Evaluate` does.
+        Workers receive a copy of the program but not the caller's dspy settings, so a
+        metric calling an LM must set its own.
+
+        Args:
+            num_threads: Threads used to run uncached examples, per process. Defaults to 10.
+            cache: Reuse and store per-example results. Defaults to False.
+            executor: "thread" (default) or "process" workers.
+            max_workers: Worker processes. Defaults to the number of CPUs.
+
+        Returns:
+            dspy.evaluate.EvaluationResult: The percentage score and (example, prediction, score) results.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        source = self.valset
+        valset = source.to_list() if isinstance(source, Dataset) else source
+        if not valset:
+            # Let dspy.Evaluate raise its usual error
+            return self._evaluate(valset, num_threads)
+        source = source if isinstance(source, Dataset) and source.streamed else None
+        results, cached = self._evaluate_examples(valset, num_threads, cache, executor, max_workers, source)
+
+        ncorrect = sum(score for *_, score in results)
+        result = EvaluationResult(score=round(100 * ncorrect / len(valset), 2), results=results)
+        self.score = result.score
+        self.evaluation_report = {"total": len(valset), "cached": cached, "evaluated": len(valset) - cached}
+        if cache:
+            print(f"♻️  Reused {cached}/{len(valset)} cached evaluations")
+        return result
+
+    def _evaluate_examples(
+        self,
+        examples: list,
+        num_threads: int = 10,
+        cache: bool = False,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+        source: Dataset | None = None,
+    ) -> tuple[list, int]:
+        """
+        (example, prediction, score) for each example, and how many came from the evaluation cache.
+
+        `source` is a file-backed Dataset holding `examples`, which process workers stream their shards from.
+        """
+        if not cache:
+            return self._evaluate(
+                examples, num_threads, executor=executor, max_workers=max_workers, source=source
+            ).results, 0
+
+        store = EvaluationCache(self.storage_root / "evaluations.sqlite")
+        try:
+            keys = store.keys(self, self.lm, self._scoring_metric(), examples)
+            cached = store.get_many(keys)
+            results = [None if hit is None else (example, *hit) for example, hit in zip(examples, cached)]
+            misses = [i for i, hit in enumerate(cached) if hit is None]
+            if misses:
+                fresh = self._evaluate(
+                    [examples[i] for i in misses],
+                    num_threads,
+                    executor=executor,
+                    max_workers=max_workers,
+                    source=source.select(misses) if source is not None else None,
+                ).results
+                for i, row in zip(misses, fresh):
+                    results[i] = row
+                # Failed examples come back as empty predictions; retry those next time
+                store.put_many([
+                    (keys[i], prediction, score)
+                    for i, (_, prediction, score) in zip(misses, fresh)
+                    if prediction.keys()
+                ])
+        finally:
+            store.close()
+        return results, len(examples) - len(misses)
+
+    def _evaluate(
+        self,
+        devset: list,
+        num_threads: int,
+        display_progress: bool = True,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+        source: Dataset | None = None,
+    ):
+        if executor == "process" and devset:
+            return self._evaluate_processes(devset, num_threads, max_workers, source)
+        if self.batch_metric is None or not devset:
+            evaluator = dspy.Evaluate(
+                devset=devset,
+                num_threads=num_threads,
+                display_progress=display_progress,
+                metric=self.metric,
+            )
+            return evaluator(self)
+
+        # Run predictions through dspy.Evaluate, noting which succeeded, then score them in batches
+        succeeded = set()
+
+        def collect(example, prediction, trace=None):
+            succeeded.add(id(prediction))
+            return 0.0
+
         evaluator = dspy.Evaluate(
-            devset=self.valset,
+            devset=devset,
             num_threads=num_threads,
-            display_progress=True,
-            metric=self.metric,
+            display_progress=display_progress,
+            metric=collect,
         )
-        result = evaluator(self)
-        self.score = result.score
-        return result
+        results = evaluator(self).results
+        ok = [i for i, (_, prediction, _) in enumerate(results) if id(prediction) in succeeded]
+        scores = batch_scores(
+            self.batch_metric,
+            [results[i][0] for i in ok],
+            [results[i][1] for i in ok],
+            self.metric_batch_size,
+        )
+        rows = [(example, prediction, 0.0) for example, prediction, _ in results]
+        for i, score in zip(ok, scores):
+            rows[i] = (rows[i][0], rows[i][1], score)
+        ncorrect = sum(score for *_, score in rows)
+        return EvaluationResult(score=round(100 * ncorrect / len(devset), 2), results=rows)
+
+    def _evaluate_processes(
+        self,
+        devset: list,
+        num_threads: int,
+        max_workers: int | None = None,
+        source: Dataset | None = None,
+    ):
+        """
+        Evaluate strided shards of `devset` in worker processes and aggregate like dspy.Evaluate.
+
+        With a file-backed `source` Dataset, each worker is sent `source.shard(i, n)` and reads
+        its examples from the file, instead of receiving them pickled.
+        """
+        shards = min(max_workers or os.cpu_count() or 1, len(devset))
+        program = self._worker_copy(serialize=True)
+        rows: list = [None] * len(devset)
+        with ProcessPoolExecutor(max_workers=shards) as workers, tqdm(total=len(devset)) as bar:
+            futures = {
+                workers.submit(
+                    _evaluate_worker,
+                    program,
+                    cloudpickle.dumps(source.shard(shard, shards)) if source is not None else devset[shard::shards],
+                    num_threads,
+                ): shard
+                for shard in range(shards)
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                for offset, (prediction, score) in enumerate(future.result()):
+                    i = shard + offset * shards
+                    rows[i] = (devset[i], prediction, score)
+                bar.update(len(devset[shard::shards]))
+
+        ncorrect = sum(score for *_, score in rows)
+        return EvaluationResult(score=round(100 * ncorrect / len(devset), 2), results=rows)
 
     ##### Ensure Requirements #####
 
@@ -127,11 +509,11 @@ class Program(dspy.Module, metaclass=ProgramMeta):
                 "❌ Metric is not implemented. You must define a 'metric' method that takes "
                 "(example: dspy.Example, prediction: dspy.Prediction, trace=None) and returns a float score."
             )
-        elif self.metric == Program.metric:
+        elif self.metric == Program.metric and self.batch_metric is None:
             # Check if it's still the default implementation
             errors.append(
                 "❌ Metric is using default implementation. You must override the 'metric' method "
-                "with your own evaluation logic that returns a meaningful score."
+                "(or define 'batch_metric') with your own evaluation logic that returns a meaningful score."
             )
 
         if errors:
@@ -145,23 +527,34 @@ class Program(dspy.Module, metaclass=ProgramMeta):
                 "    return 1.0 if prediction.answer == example.answer else 0.0"
             )
 
+    @staticmethod
+    def _scan_examples(examples) -> tuple[int, list[int]]:
+        """Count the examples and find the indices of non-dspy.Example items, in one pass."""
+        count = 0
+        invalid_items = []
+        for i, item in enumerate(examples):
+            count += 1
+            if not isinstance(item, dspy.Example):
+                invalid_items.append(i)
+        return count, invalid_items
+
     def ensure_trainset(self):
         """Check if the trainset is properly implemented."""
         errors = []
         warnings = []
 
-        if not isinstance(self.trainset, list):
+        trainset = self.trainset
+        if not isinstance(trainset, (list, Dataset)):
             errors.append(
-                "❌ trainset must be a list of dspy.Example objects."
-            )
-        elif len(self.trainset) == 0:
-            warnings.append(
-                "⚠️  trainset is empty. Optimization will not be effective without training examples."
+                "❌ trainset must be a list of dspy.Example objects or a Dataset."
             )
         else:
-            # Check if all items are dspy.Example
-            invalid_items = [i for i, item in enumerate(self.trainset) if not isinstance(item, dspy.Example)]
-            if invalid_items:
+            count, invalid_items = self._scan_examples(trainset)
+            if count == 0:
+                warnings.append(
+                    "⚠️  trainset is empty. Optimization will not be effective without training examples."
+                )
+            elif invalid_items:
                 errors.append(
                     f"❌ trainset contains invalid items at indices {invalid_items}. "
                     "All items must be dspy.Example objects."
@@ -187,18 +580,18 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         errors = []
         warnings = []
 
-        if not isinstance(self.valset, list):
+        valset = self.valset
+        if not isinstance(valset, (list, Dataset)):
             errors.append(
-                "❌ valset must be a list of dspy.Example objects."
-            )
-        elif len(self.valset) == 0:
-            warnings.append(
-                "⚠️  valset is empty. You won't be able to evaluate optimization performance."
+                "❌ valset must be a list of dspy.Example objects or a Dataset."
             )
         else:
-            # Check if all items are dspy.Example
-            invalid_items = [i for i, item in enumerate(self.valset) if not isinstance(item, dspy.Example)]
-            if invalid_items:
+            count, invalid_items = self._scan_examples(valset)
+            if count == 0:
+                warnings.append(
+                    "⚠️  valset is empty. You won't be able to evaluate optimization performance."
+                )
+            elif invalid_items:
                 errors.append(
                     f"❌ valset contains invalid items at indices {invalid_items}. "
                     "All items must be dspy.Example objects."
@@ -227,7 +620,7 @@ class Program(dspy.Module, metaclass=ProgramMeta):
 
     ##### Save and Load #####
 
-    def get_metadata(self) -> dict:
+    def get_metadata(self, evaluate: bool = True) -> dict:
 
         metadata = {
             "python_version": platform.python_version(),
@@ -238,7 +631,7 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         if not self.optimizer:
             return metadata
 
-        if self.score is None:
+        if self.score is None and evaluate:
             print("⏳ Evaluating score...")
             self.evaluate()
 
@@ -251,13 +644,27 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         metadata.update(optimization_metadata)
         return metadata
 
-    def save(self, path: Optional[Path] = None) -> Path:
+    @property
+    def model_folder(self) -> Path:
+        """Folder holding the saved versions of this program's LM, one subfolder per optimizer."""
+        return self.storage_root / str(self.lm.model).split("/")[-1]
+
+    def registry(self, optimizer_name: str) -> VersionRegistry:
+        """Version registry of this program's LM and the given optimizer."""
+        return VersionRegistry(self.model_folder / optimizer_name)
+
+    def save(self, path: Optional[Path] = None, wait_for_score: bool = False) -> Path:
         """
         Save this program.
         Overrides dspy's save method to add automatic versioning when no path is provided.
 
+        An auto-versioned program without a score is written right away and scored in a
+        background thread; its metadata and registry entry are updated atomically once the
+        score is ready. `self.scoring` holds the future of that evaluation.
+
         Args:
             path: Explicit path to save to. If None, uses auto-versioning with optimizer metadata.
+            wait_for_score: Evaluate before returning instead of in the background.
 
         Returns:
             Path: Full path where the model was saved
@@ -271,35 +678,47 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         if not self.optimizer:
             raise ValueError("No optimizer found. This program was not optimized.")
 
-        optimizer_name = self.optimizer.__class__.__name__
-
-        script_dir = Path(__file__).parent
-        base_path = script_dir / "optim"
-
-        # Create directory structure: base_path / model_name / optimizer_name
-        model_name = str(self.lm.model).split("/")[-1]
-        folder = base_path / model_name / optimizer_name
-        folder.mkdir(parents=True, exist_ok=True)
-
-        # Find next available version number (up to 999)
-        for version in range(1, 1000):
-            auto_path = folder / f"v{version}.json"
-            metadata_path = folder / f"v{version}_metadata.json"
-            if not auto_path.exists() and not metadata_path.exists():
-                break
-        else:
-            raise RuntimeError("No available version slot found in 1000 attempts.")
+        registry = self.registry(self.optimizer.__class__.__name__)
+        version = registry.allocate()
+        auto_path = registry.path(version)
 
         # Call dspy's original save method
         super().save(auto_path)
+        if self.telemetry:
+            atomic_write_json(registry.telemetry_path(version), self.telemetry)
+        if self.score is None and not wait_for_score:
+            metadata = self.get_metadata(evaluate=False)
+            atomic_write_json(registry.metadata_path(version), metadata)
+            registry.record(version, metadata, status="scoring")
+            # Score a snapshot, so changes made after save returns don't leak into this version
+            snapshot = self._worker_copy()
+            self.scoring = _scoring_executor.submit(self._score_version, snapshot, registry, version, metadata)
+            print(f"💾 Saved optimized model to: {auto_path} (⏳ scoring in background)")
+            return auto_path
+
         metadata = self.get_metadata()
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f)
+        atomic_write_json(registry.metadata_path(version), metadata)
+        registry.record(version, metadata)
 
         print(f"💾 Saved optimized model to: {auto_path}")
 
         return auto_path
 
+    def _score_version(self, program: "Program", registry: VersionRegistry, version: int, metadata: dict) -> float:
+        """Evaluate a snapshot of the saved program and publish its score to the version's metadata."""
+        try:
+            program.evaluate()
+        except Exception:
+            registry.record(version, metadata, status="failed")
+            raise
+        metadata = {**metadata, "score": program.score}
+        atomic_write_json(registry.metadata_path(version), metadata)
+        registry.record(version, metadata)
+        if self.score is None:
+            self.score = program.score
+        print(f"✅ Scored {registry.path(version).name}: {program.score}")
+        return program.score
+
     def load(
         self,
         path: Path | str | None = None,
@@ -317,45 +736,26 @@ class Program(dspy.Module, metaclass=ProgramMeta):
                 try:
                     with open(metadata_path, "r") as f:
                         metadata = json.load(f)
-                    self.score = metadata.get("score")
+                    program_score = metadata.get("score")
                 except (json.JSONDecodeError, KeyError):
-                    self.score = None
-            else:
-                self.score = None
+                    program_score = None
         elif optimizer is not None:
             # Extract optimizer name
             optimizer_name = optimizer.__class__.__name__
 
-            model_name = str(self.lm.model).split("/")[-1]
-
-            # Construct base path
-            script_dir = Path(__file__).parent
-            base_path = script_dir / "optim"
-            folder = base_path / model_name / optimizer_name
-
+            folder = self.model_folder / optimizer_name
             if not folder.exists():
                 raise FileNotFoundError(f"Optimizer folder not found: {folder}")
+            registry = VersionRegistry(folder)
 
-            if version is not None:
-                # Use specific version
-                load_path = folder / f"v{version}.json"
-                metadata_path = folder / f"v{version}_metadata.json"
-                if not load_path.exists():
-                    raise FileNotFoundError(f"Version {version} not found: {load_path}")
-            else:
-                # Find latest version by checking in reverse order
-                load_path = None
-                metadata_path = None
-                for version_num in range(999, 0, -1):  # 999 down to 1
-                    candidate_path = folder / f"v{version_num}.json"
-                    candidate_metadata = folder / f"v{version_num}_metadata.json"
-                    if candidate_path.exists():
-                        load_path = candidate_path
-                        metadata_path = candidate_metadata
-                        break
-
-                if load_path is None:
+            if version is None:
+                version = registry.latest()
+                if version is None:
                     raise FileNotFoundError(f"No versions found in {folder}")
+            load_path = registry.path(version)
+            metadata_path = registry.metadata_path(version)
+            if not load_path.exists():
+                raise FileNotFoundError(f"Version {version} not found: {load_path}")
 
             # Load from the determined path
             super().load(load_path)
@@ -379,27 +779,34 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         self.optimized_program = None
         self.optimizer = None
 
-    def load_best(self, optimizer: Teleprompter | None = None):
+    def load_best(
+        self,
+        optimizer: Teleprompter | None = None,
+        wait: bool = False,
+        timeout: float | None = None,
+    ):
         """
         Load the best performing model based on score from metadata files.
 
+        Versions still being scored in the background have no score yet and are skipped,
+        unless `wait` is set.
+
         Args:
             optimizer: Optional optimizer to filter by. If provided, only models
                       from that optimizer will be considered.
+            wait: Wait for versions still being scored before choosing.
+            timeout: Maximum seconds to wait. Defaults to no limit.
 
         Returns:
             TimeStructureBlueprintGenerator: Self with the best model loaded
         """
-        model_name = str(self.lm.model).split("/")[-1]
-        script_dir = Path(__file__).parent
-        base_path = script_dir / "optim" / model_name
+        base_path = self.model_folder
 
         if not base_path.exists():
             raise FileNotFoundError(f"Model folder not found: {base_path}")
 
         best_score = -1
         best_path = None
-        best_metadata_path = None
         best_optimizer_name = None
 
         if optimizer is not None:
@@ -417,26 +824,15 @@ class Program(dspy.Module, metaclass=ProgramMeta):
             ]
 
         for optimizer_folder in optimizer_folders:
-            if not optimizer_folder.exists():
-                continue
-
-            # Find all metadata files in this optimizer folder
-            for metadata_file in optimizer_folder.glob("v*_metadata.json"):
-                try:
-                    with open(metadata_file, "r") as f:
-                        metadata = json.load(f)
-
-                    score = metadata.get("score")
-                    if score is not None and score > best_score:
-                        best_score = score
-                        best_metadata_path = metadata_file
-                        # Get corresponding model file
-                        version = metadata_file.stem.replace("_metadata", "")
-                        best_path = optimizer_folder / f"{version}.json"
-                        best_optimizer_name = optimizer_folder.name
-                except (json.JSONDecodeError, KeyError, FileNotFoundError):
-                    # Skip invalid metadata files
-                    continue
+            # Each registry manifest already tracks its best version
+            registry = VersionRegistry(optimizer_folder)
+            if wait:
+                registry.wait(timeout)
+            best = registry.best()
+            if best is not None and best[1] > best_score:
+                best_score = best[1]
+                best_path = registry.path(best[0])
+                best_optimizer_name = optimizer_folder.name
 
         if best_path is None or not best_path.exists():
             optimizer_info = (
@@ -454,6 +850,285 @@ class Program(dspy.Module, metaclass=ProgramMeta):
 
 
 
+    ##### Racing #####
+
+    def _saved_versions(self, optimizer: Teleprompter | None = None) -> list[tuple[str, int, Path]]:
+        """(optimizer name, version, path) of every saved version, optionally of one optimizer."""
+        if optimizer is not None:
+            folders = [self.model_folder / optimizer.__class__.__name__]
+        elif self.model_folder.exists():
+            folders = sorted(folder for folder in self.model_folder.iterdir() if folder.is_dir())
+        else:
+            folders = []
+        versions = []
+        for folder in folders:
+            if not folder.exists():
+                continue
+            registry = VersionRegistry(folder)
+            for version, entry in registry.read()["versions"].items():
+                path = registry.path(int(version))
+                if entry["status"] != "pending" and path.exists():
+                    versions.append((folder.name, int(version), path))
+        return sorted(versions, key=lambda item: (item[0], item[1]))
+
+    def race(
+        self,
+        optimizer: Teleprompter | None = None,
+        initial: int = 8,
+        growth: float = 2,
+        confidence: float = 0.95,
+        score_range: float = 1.0,
+        num_threads: int = 10,
+        cache: bool = False,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+    ) -> list[dict]:
+        """
+        Re-evaluate saved versions on the current LM and valset, dropping clearly worse ones
+        early, and load the winner.
+
+        Candidates are scored on a seeded shuffle of the valset, on subsets that start at
+        `initial` examples and grow by `growth` each round. After each round, a Hoeffding
+        confidence interval is computed around every candidate's mean metric, and candidates
+        whose upper bound falls below the best lower bound are eliminated. The race stops
+        when one candidate is left or the valset is exhausted, and the candidate with the
+        highest mean wins. With `cache`, per-example results go through the evaluation cache.
+
+        The winner's `score` is its race score if it was evaluated on the whole valset, and
+        None otherwise, rather than the score saved with it on another LM or valset.
+
+        Args:
+            optimizer: Only race versions saved by this optimizer. Defaults to all.
+            initial: Examples in the first round. Defaults to 8.
+            growth: Factor by which the subset grows each round. Defaults to 2.
+            confidence: Probability that no candidate is eliminated wrongly, across all
+                candidates and rounds. Defaults to 0.95.
+            score_range: Difference between the highest and lowest metric values.
+                Defaults to 1.0.
+            num_threads: Threads used to evaluate each round, per process. Defaults to 10.
+            cache: Reuse and store per-example results, as in `evaluate`. Defaults to False.
+            executor: "thread" (default) or "process" workers, as in `evaluate`.
+            max_workers: Worker processes. Defaults to the number of CPUs.
+
+        Returns:
+            list[dict]: One row per candidate, winner first, with its `optimizer`, `version`,
+                `path`, `score` and bounds as percentages, the `examples` it was scored on
+                and the round it was `eliminated` in, if any.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        if initial < 1 or growth <= 1:
+            raise ValueError("initial must be at least 1 and growth greater than 1")
+        self.ensure_metric()
+        valset = list(self._examples("valset"))
+        if not valset:
+            raise ValueError("❌ valset is empty, nothing to race on")
+        versions = self._saved_versions(optimizer)
+        if not versions:
+            optimizer_info = f" for optimizer {optimizer.__class__.__name__}" if optimizer else ""
+            raise FileNotFoundError(f"No saved versions found{optimizer_info}")
+
+        random.Random(self.seed).shuffle(valset)
+        sizes = []
+        size = min(initial, len(valset))
+        while not sizes or sizes[-1] < len(valset):
+            sizes.append(size)
+            size = min(len(valset), max(size + 1, math.ceil(size * growth)))
+        # Union bound over every candidate and round
+        delta = (1 - confidence) / (len(versions) * len(sizes))
+
+        candidates = []
+        for name, version, path in versions:
+            program = self.deepcopy()
+            program.optimized_program = None
+            program.scoring = None
+            program.load(path=path)
+            candidates.append({
+                "optimizer": name,
+                "version": version,
+                "path": str(path),
+                "program": program,
+                "scores": [],
+                "eliminated": None,
+            })
+
+        evaluations = 0
+        alive = candidates
+        for round_number, size in enumerate(sizes, start=1):
+            for candidate in alive:
+                done = len(candidate["scores"])
+                results, cached = candidate["program"]._evaluate_examples(
+                    valset[done:size], num_threads, cache, executor, max_workers
+                )
+                candidate["scores"].extend(score for *_, score in results)
+                evaluations += size - done - cached
+            for candidate in alive:
+                n = len(candidate["scores"])
+                mean = sum(candidate["scores"]) / n
+                width = score_range * math.sqrt(math.log(2 / delta) / (2 * n))
+                candidate.update(mean=mean, lower=mean - width, upper=mean + width)
+            best_lower = max(candidate["lower"] for candidate in alive)
+            for candidate in alive:
+                if candidate["upper"] < best_lower:
+                    candidate["eliminated"] = round_number
+            alive = [candidate for candidate in alive if candidate["eliminated"] is None]
+            print(f"🏁 Round {round_number}: {len(alive)}/{len(candidates)} candidates left after {size} examples")
+            if len(alive) == 1:
+                break
+
+        leaderboard = [
+            {
+                "optimizer": candidate["optimizer"],
+                "version": candidate["version"],
+                "path": candidate["path"],
+                "score": round(100 * candidate["mean"], 2),
+                "lower": round(100 * candidate["lower"], 2),
+                "upper": round(100 * candidate["upper"], 2),
+                "examples": len(candidate["scores"]),
+                "eliminated": candidate["eliminated"],
+            }
+            for candidate in sorted(
+                candidates,
+                key=lambda candidate: (candidate["eliminated"] is not None, -candidate["mean"]),
+            )
+        ]
+        best = leaderboard[0]
+        full = len(candidates) * len(valset)
+        print(f"🏆 Race winner: {best['optimizer']} v{best['version']} with score {best['score']:.2f}")
+        print(f"📉 Ran {evaluations}/{full} evaluations")
+
+        self.load(path=best["path"])
+        # Only a score on the whole valset is a full evaluation; the saved one is stale
+        self.score = best["score"] if best["examples"] == len(valset) else None
+        return leaderboard
+
+    ##### Checkpoints #####
+
+    def checkpoint(self, optimizer_name: str, **config) -> OptimizationCheckpoint:
+        """
+        Checkpoint of an optimizer run, identified by the optimizer, its configuration, the
+        seed, the LM, this program's state and its trainset and valset.
+
+        Runs with the same identity share a folder under `<model>/<optimizer>/runs/`.
+        """
+        config = {"optimizer": optimizer_name, "seed": self.seed, "lm": lm_fingerprint(self.lm), **config}
+        run_id = fingerprint([
+            config,
+            program_fingerprint(self),
+            [example.toDict() for example in self._examples("trainset")],
+            [example.toDict() for example in self._examples("valset")],
+        ])[:16]
+        return OptimizationCheckpoint(self.model_folder / optimizer_name / "runs" / run_id, config)
+
+    def _optimize(
+        self,
+        optimizer: Teleprompter,
+        compile: Callable,
+        checkpoint: OptimizationCheckpoint | None = None,
+        resume: bool = False,
+        roles: dict | None = None,
+    ):
+        """
+        Run `compile` collecting telemetry, under a checkpoint if given, resuming or reusing
+        a previous run if asked.
+
+        `roles` maps role names ("teacher", "reflection") to the optimizer's own LMs, so
+        their usage is reported apart from the program's "task" LM.
+        """
+        if checkpoint is not None and resume and checkpoint.completed:
+            print(f"♻️  Reusing completed run: {checkpoint.folder}")
+            optimized_program = self.deepcopy()
+            optimized_program.optimized_program = None
+            optimized_program.load(path=checkpoint.program_path)
+            telemetry = checkpoint.telemetry()
+        else:
+            if checkpoint is not None and not resume:
+                checkpoint.reset()
+            elif checkpoint is not None and checkpoint.state():
+                print(f"♻️  Resuming run: {checkpoint.folder} ({checkpoint.state()['trials']} trials recorded)")
+            collector = Telemetry({"task": self.lm, **(roles or {})})
+            with contextlib.ExitStack() as stack:
+                if checkpoint is not None:
+                    stack.enter_context(checkpoint.activate())
+                stack.enter_context(collector.activate())
+                optimized_program = compile()
+            telemetry = collector.summary()
+            if checkpoint is not None:
+                checkpoint.complete(optimized_program, telemetry)
+
+        optimized_program.score = None
+        optimized_program.optimizer = optimizer
+        optimized_program.telemetry = telemetry
+        self.optimized_program = optimized_program
+        return optimized_program
+
+    ##### Sweeps #####
+
+    def sweep(
+        self,
+        configs: list[str | dict],
+        max_workers: int | None = None,
+        executor: Literal["thread", "process"] = "process",
+    ) -> list[dict]:
+        """
+        Run several optimizer configurations in parallel and load the best result.
+
+        Each configuration runs on its own copy of the program, in a separate worker
+        process by default so LM contexts and dspy settings are fully isolated. Every
+        optimized program is scored on the valset and saved as a new version. A
+        configuration that fails is reported in the leaderboard instead of stopping the sweep.
+
+        Args:
+            configs: Optimizer names, or dicts with an "optimizer" name and that optimizer's
+                arguments, e.g. {"optimizer": "MIPROv2", "auto": "light"}.
+            max_workers: Configurations run at once. Defaults to one per configuration.
+            executor: "process" (default) or "thread" workers.
+
+        Returns:
+            list[dict]: The leaderboard, best first, with each configuration's `optimizer`,
+                `params`, `score`, saved `path`, `error` and telemetry totals.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        runs = []
+        for config in configs:
+            params = {"optimizer": config} if isinstance(config, str) else dict(config)
+            name = params.pop("optimizer", None)
+            if name not in OPTIMIZERS:
+                raise ValueError(f"Unknown optimizer: {name}. Choose from {', '.join(OPTIMIZERS)}")
+            runs.append((name, params))
+        if not runs:
+            raise ValueError("No configurations to sweep")
+        self.ensure_optim_requirements()
+
+        pool = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool(max_workers=max_workers or len(runs)) as workers:
+            futures = [
+                workers.submit(_sweep_worker, self._worker_copy(serialize=executor == "process"), name, params)
+                for name, params in runs
+            ]
+            results = [future.result() for future in futures]
+
+        leaderboard = sorted(
+            ({"optimizer": name, "params": params, **result} for (name, params), result in zip(runs, results)),
+            key=lambda row: (row["score"] is None, -(row["score"] or 0)),
+        )
+        best = leaderboard[0]
+        if best["score"] is None:
+            errors = "\n".join(f"{row['optimizer']} {row['params']}: {row['error']}" for row in leaderboard)
+            raise RuntimeError(f"❌ Every sweep configuration failed:\n{errors}")
+
+        self.load(path=best["path"])
+        print(f"🏆 Best configuration: {best['optimizer']} {best['params']} with score {best['score']:.4f}")
+        return leaderboard
+
+    def _worker_copy(self, serialize: bool = False) -> "Program | bytes":
+        """A fresh copy of this program for a sweep or evaluation worker, cloudpickled for processes."""
+        program = self.deepcopy()
+        program.optimized_program = None
+        program.scoring = None
+        return cloudpickle.dumps(program) if serialize else program
+
     ##### Optimizers #####
 
     def BootstrapFewShot(
@@ -472,7 +1147,7 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         """
         self.ensure_optim_requirements()
         optimizer = dspy.BootstrapFewShot(
-            metric=self.metric,
+            metric=self._optimizer_metric(),
             max_bootstrapped_demos=max_bootstrapped_demos,
             max_labeled_demos=max_labeled_demos,
             max_rounds=max_rounds,
@@ -486,45 +1161,43 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         else:
             teacher_program = None
 
-        optimized_program: Program = optimizer.compile(
-            student=self, trainset=self.trainset, teacher=teacher_program
-        )
-
-        optimized_program.score = None
-        optimized_program.optimizer = optimizer
-        self.optimized_program = optimized_program
-
-        return optimized_program
+        return self._optimize(optimizer, lambda: optimizer.compile(
+            student=self, trainset=self._examples("trainset"), teacher=teacher_program
+        ), roles={"teacher": teacher})
 
     def MIPROv2(
         self,
         auto: Literal["light", "medium", "heavy"] = "medium",
         num_threads: int = 10,
         teacher: Optional[dspy.LM] = None,
+        checkpoint: bool = False,
+        resume: bool = False,
     ):
         """
         Optimize the program using MIPROv2 and return the optimized program with metadata.
+
+        With `checkpoint=True`, every trial is recorded and LM calls are cached in the run
+        folder, so with `resume=True` (which implies it) an interrupted run replays its
+        completed trials from disk, and a completed run is reused as-is.
         """
         self.ensure_optim_requirements()
         # Initialize optimizer
         teleprompter = dspy.MIPROv2(
-            metric=self.metric,
+            metric=self._optimizer_metric(),
             auto=auto,  # Can choose between light, medium, and heavy optimization runs
             seed=self.seed,
             num_threads=num_threads,
             teacher_settings={"lm": teacher},
         )
+        checkpoint = self.checkpoint(
+            "MIPROv2", auto=auto, teacher=lm_fingerprint(teacher) if teacher else None
+        ) if checkpoint or resume else None
 
-        optimized_program: Program = teleprompter.compile(
+        return self._optimize(teleprompter, lambda: teleprompter.compile(
             student=self,
-            trainset=self.trainset,
-            valset=self.valset,
-        )
-
-        optimized_program.score = None
-        optimized_program.optimizer = teleprompter
-        self.optimized_program = optimized_program
-        return optimized_program
+            trainset=self._examples("trainset"),
+            valset=self._examples("valset"),
+        ), checkpoint, resume, roles={"teacher": teacher})
 
     def SIMBA(
         self,
@@ -532,23 +1205,26 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         num_candidates: int = 6,
         max_steps: int = 8,
         num_threads: Optional[int] = None,
+        checkpoint: bool = False,
+        resume: bool = False,
     ):
         self.ensure_optim_requirements()
         optimizer = dspy.SIMBA(
-            metric=self.metric,
+            metric=self._optimizer_metric(),
             bsize=bsize,
             num_candidates=num_candidates,
             max_steps=max_steps,
             num_threads=num_threads,
         )
-        optimized_program: Program = optimizer.compile(
+        checkpoint = self.checkpoint(
+            "SIMBA", bsize=bsize, num_candidates=num_candidates, max_steps=max_steps
+        ) if checkpoint or resume else None
+
+        return self._optimize(optimizer, lambda: optimizer.compile(
             student=self,
-            trainset=self.trainset,
+            trainset=self._examples("trainset"),
             seed=self.seed,
-        )
-        optimized_program.optimizer = optimizer
-        self.optimized_program = optimized_program
-        return optimized_program
+        ), checkpoint, resume)
 
 
     def GEPA(
@@ -557,18 +1233,29 @@ class Program(dspy.Module, metaclass=ProgramMeta):
         reflection_lm: Optional[dspy.LM] = None,
         num_threads: Optional[int] = None,
         teacher: Optional[dspy.LM] = None,
+        checkpoint: bool = False,
+        resume: bool = False,
     ):
         self.ensure_optim_requirements()
 
         # GEPA needs a 5-argument metric (gold, pred, trace, pred_name, pred_trace)
 
         reflection_lm = reflection_lm or self.lm
+        checkpoint = self.checkpoint(
+            "GEPA",
+            auto=auto,
+            reflection_lm=lm_fingerprint(reflection_lm),
+            teacher=lm_fingerprint(teacher) if teacher else None,
+        ) if checkpoint or resume else None
 
         optimizer = dspy.GEPA(
-            metric=self.metric,
+            metric=self._optimizer_metric(),
             auto=auto,
             reflection_lm=reflection_lm,
             num_threads=num_threads,
+            seed=self.seed,
+            # GEPA keeps its own search state here and resumes from it
+            log_dir=str(checkpoint.folder / "gepa") if checkpoint else None,
         )
 
         if teacher:
@@ -576,13 +1263,10 @@ class Program(dspy.Module, metaclass=ProgramMeta):
             teacher_program.lm = teacher
         else:
             teacher_program = None
-        
-        optimized_program: Program = optimizer.compile(
+
+        return self._optimize(optimizer, lambda: optimizer.compile(
             student=self,
-            trainset=self.trainset,
-            valset=self.valset,
+            trainset=self._examples("trainset"),
+            valset=self._examples("valset"),
             teacher=teacher_program,
-        )
-        optimized_program.optimizer = optimizer
-        self.optimized_program = optimized_program
-        return optimized_program
+        ), checkpoint, resume, roles={"reflection": reflection_lm, "teacher": teacher})
@@ -0,0 +1,195 @@
+import datetime
+import json
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import dspy
+from dspy.clients.cache import Cache
+from dspy.utils.callback import BaseCallback
+from .registry import atomic_write_json
+
+STATE = "state.json"
+TRIALS = "trials.jsonl"
+PROGRAM = "program.json"
+TELEMETRY = "telemetry.json"
+LM_CACHE = "lm_cache"
+
+
+class RoutedCache:
+    """
+    Stand-in for `dspy.cache` that forwards to the cache set by the current `dspy.context`.
+
+    dspy looks its LM cache up through the `dspy.cache` global. Installing this once and
+    overriding the `lm_cache` setting keeps each run's cache local to its context, and to
+    the worker threads dspy propagates the context to, so concurrent runs never swap the
+    global under each other.
+    """
+
+    def __init__(self, default: Cache):
+        self.default = default
+
+    @property
+    def current(self) -> Cache:
+        return dspy.settings.get("lm_cache") or self.default
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+
+_route_lock = threading.Lock()
+
+
+def route_lm_cache() -> None:
+    """Install `RoutedCache` as `dspy.cache`, wrapping the cache in place, if not done yet."""
+    with _route_lock:
+        if not isinstance(dspy.cache, RoutedCache):
+            dspy.cache = RoutedCache(dspy.cache)
+
+
+class TrialRecorder(BaseCallback):
+    """dspy callback appending every evaluation run during an optimization to a checkpoint."""
+
+    def __init__(self, checkpoint: "OptimizationCheckpoint"):
+        self.checkpoint = checkpoint
+        self._started = {}
+
+    def on_evaluate_start(self, call_id: str, instance: Any, inputs: dict) -> None:
+        program = inputs.get("program")
+        state = program.dump_state() if isinstance(program, dspy.Module) else None
+        self._started[call_id] = (time.perf_counter(), state)
+
+    def on_evaluate_end(self, call_id: str, outputs: Any, exception: Optional[BaseException] = None) -> None:
+        start, state = self._started.pop(call_id, (time.perf_counter(), None))
+        self.checkpoint.record_trial(
+            score=getattr(outputs, "score", None),
+            duration=time.perf_counter() - start,
+            state=state,
+            error=repr(exception) if exception else None,
+        )
+
+
+class OptimizationCheckpoint:
+    """
+    Persistent state of one optimizer run, so an interrupted run can resume cheaply.
+
+    The run folder holds:
+
+    - `state.json`: status ("running" or "completed"), configuration, trial count and best score
+    - `trials.jsonl`: one line per evaluation during the run, with its score, duration
+      and the candidate program's state
+    - `lm_cache/`: a disk cache of every LM call made during the run
+    - `program.json` and `telemetry.json`: the optimized program and run telemetry, once
+      the run completes
+
+    Within `activate`, dspy's LM cache is backed by `lm_cache/`, so a resumed
+    run with the same configuration and seed replays its completed LM calls from disk
+    instead of paying for them again, and every evaluation is appended to `trials.jsonl`.
+
+    Args:
+        folder (Union[str, Path]): The run folder, created if missing.
+        config (dict, optional): The run configuration, recorded in `state.json`.
+    """
+
+    def __init__(self, folder, config: Optional[dict] = None):
+        self.folder = Path(folder)
+        self.config = config or {}
+        self._lock = threading.Lock()
+
+    @property
+    def state_path(self) -> Path:
+        return self.folder / STATE
+
+    @property
+    def program_path(self) -> Path:
+        return self.folder / PROGRAM
+
+    def state(self) -> dict:
+        """The run state, or an empty dict if the run never started."""
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    @property
+    def completed(self) -> bool:
+        return self.state().get("status") == "completed" and self.program_path.exists()
+
+    def trials(self) -> list:
+        """Every evaluation recorded so far, in order."""
+        if not (self.folder / TRIALS).exists():
+            return []
+        with open(self.folder / TRIALS) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def reset(self) -> None:
+        """Discard everything recorded for this run."""
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    ##### Recording #####
+
+    def _update(self, **changes) -> None:
+        state = self.state() or {
+            "config": self.config,
+            "created_utc": datetime.datetime.now(datetime.UTC).isoformat(),
+            "trials": 0,
+            "best_score": None,
+        }
+        state.update(changes, updated_utc=datetime.datetime.now(datetime.UTC).isoformat())
+        atomic_write_json(self.state_path, state)
+
+    def record_trial(self, score: Optional[float], duration: float, state: Optional[dict] = None, error: Optional[str] = None) -> None:
+        """Append one evaluation to the trial history and update the run state."""
+        trial = {"score": score, "duration": duration, "error": error, "state": state}
+        with self._lock:
+            with open(self.folder / TRIALS, "a") as f:
+                f.write(json.dumps(trial, default=str) + "\n")
+            current = self.state()
+            best = current.get("best_score")
+            if score is not None and (best is None or score > best):
+                best = score
+            self._update(trials=current.get("trials", 0) + 1, best_score=best)
+
+    def telemetry(self) -> Optional[dict]:
+        """Telemetry of the completed run, if recorded."""
+        if not (self.folder / TELEMETRY).exists():
+            return None
+        with open(self.folder / TELEMETRY) as f:
+            return json.load(f)
+
+    def complete(self, program: dspy.Module, telemetry: Optional[dict] = None) -> None:
+        """Save the optimized program and its telemetry, and mark the run completed."""
+        dspy.Module.save(program, self.program_path)
+        if telemetry is not None:
+            atomic_write_json(self.folder / TELEMETRY, telemetry)
+        with self._lock:
+            self._update(status="completed")
+
+    ##### Running #####
+
+    @contextmanager
+    def activate(self, disk_size_limit_bytes: int = 4 * 2**30) -> Iterator["OptimizationCheckpoint"]:
+        """
+        Route dspy's LM cache to this run's folder and record evaluations, for the duration.
+
+        The override is local to the current `dspy.context`, so runs in other threads keep
+        their own caches.
+        """
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._update(status="running")
+        route_lm_cache()
+        cache = Cache(
+            enable_disk_cache=True,
+            enable_memory_cache=True,
+            disk_cache_dir=str(self.folder / LM_CACHE),
+            disk_size_limit_bytes=disk_size_limit_bytes,
+        )
+        callbacks = list(dspy.settings.get("callbacks") or [])
+        try:
+            with dspy.context(callbacks=callbacks + [TrialRecorder(self)], lm_cache=cache):
+                yield self
+        finally:
+            cache.disk_cache.close()
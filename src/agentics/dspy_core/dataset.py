@@ -0,0 +1,245 @@
+import csv
+import json
+import random
+import threading
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import dspy
+
+# Records of recently loaded files, keyed by path, modification time, size and options
+_memo: "OrderedDict[tuple, List[dspy.Example]]" = OrderedDict()
+_memo_lock = threading.Lock()
+MEMO_SIZE = 16
+
+
+def _example(record, inputs: Sequence[str]) -> dspy.Example:
+    if isinstance(record, dspy.Example):
+        return record
+    example = dspy.Example(**record)
+    return example.with_inputs(*inputs) if inputs else example
+
+
+class Dataset:
+    """
+    A lazily loaded, re-iterable collection of `dspy.Example`s.
+
+    Nothing is read until the dataset is first iterated. Iterating streams examples from
+    the source, so validation and sharded evaluation never need the whole file in memory
+    at once. With `cache`, the first complete pass is memoized: later passes, `len` and
+    indexing read the memo, and file-backed datasets share it across instances as long
+    as the file is unchanged, so a `trainset` property that builds a new Dataset on every
+    access still reads its file once.
+
+    `split`, `sample` and `shard` return new datasets selecting examples by position, so
+    the same seed always gives the same examples, in source order. They count examples
+    without memoizing them. Pickling a dataset leaves the memo behind, so a shard of a
+    file-backed dataset sent to a worker process reads its examples from the file there.
+
+    Args:
+        source (Union[Iterable, Callable[[], Iterable]]): Examples or dicts, or a function
+            returning a fresh iterable of them on every call.
+        inputs (Sequence[str], optional): Input fields set on examples built from dicts.
+        cache (bool, optional): Memoize the first complete pass. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        source: Union[Iterable, Callable[[], Iterable]],
+        inputs: Sequence[str] = (),
+        cache: bool = True,
+        key: Optional[tuple] = None,
+    ):
+        self._source = source if callable(source) else (lambda: source)
+        self.inputs = tuple(inputs)
+        self.cache = cache
+        self._key = key
+        self._examples: Optional[List[dspy.Example]] = None
+        # Whether examples are read from a file, so a pickled copy doesn't carry them
+        self.streamed = key is not None
+
+    def __getstate__(self):
+        return {**self.__dict__, "_examples": None}
+
+    ##### Files #####
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], inputs: Sequence[str] = (), cache: bool = True, **options) -> "Dataset":
+        """Load a `.jsonl`, `.csv` or `.parquet` file, chosen by its suffix."""
+        loaders = {".jsonl": cls.from_jsonl, ".csv": cls.from_csv, ".parquet": cls.from_parquet}
+        suffix = Path(path).suffix.lower()
+        if suffix not in loaders:
+            raise ValueError(f"Unsupported dataset format: {suffix}. Use one of {', '.join(loaders)}")
+        return loaders[suffix](path, inputs=inputs, cache=cache, **options)
+
+    @classmethod
+    def _from_path(cls, path: Union[str, Path], read: Callable[[Path], Iterator[dict]], inputs, cache, options) -> "Dataset":
+        path = Path(path)
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size, read.__name__, tuple(inputs), repr(sorted(options.items())))
+        return cls(lambda: read(path, **options), inputs=inputs, cache=cache, key=key)
+
+    @classmethod
+    def from_jsonl(cls, path: Union[str, Path], inputs: Sequence[str] = (), cache: bool = True) -> "Dataset":
+        """One example per JSON object line; blank lines are skipped."""
+        return cls._from_path(path, _read_jsonl, inputs, cache, {})
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path], inputs: Sequence[str] = (), cache: bool = True, **options) -> "Dataset":
+        """One example per row, with the header as field names. `options` go to `csv.DictReader`."""
+        return cls._from_path(path, _read_csv, inputs, cache, options)
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path: Union[str, Path],
+        inputs: Sequence[str] = (),
+        cache: bool = True,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = 1024,
+    ) -> "Dataset":
+        """One example per row, read in record batches. Requires `pyarrow`."""
+        options = {"columns": tuple(columns) if columns else None, "batch_size": batch_size}
+        return cls._from_path(path, _read_parquet, inputs, cache, options)
+
+    ##### Access #####
+
+    def _memoized(self) -> Optional[List[dspy.Example]]:
+        if self._examples is None and self._key is not None and self.cache:
+            with _memo_lock:
+                if self._key in _memo:
+                    _memo.move_to_end(self._key)
+                    self._examples = _memo[self._key]
+        return self._examples
+
+    def _remember(self, examples: List[dspy.Example]) -> None:
+        self._examples = examples
+        if self._key is not None:
+            with _memo_lock:
+                _memo[self._key] = examples
+                while len(_memo) > MEMO_SIZE:
+                    _memo.popitem(last=False)
+
+    def __iter__(self) -> Iterator[dspy.Example]:
+        memoized = self._memoized()
+        if memoized is not None:
+            yield from memoized
+            return
+        seen = [] if self.cache else None
+        for record in self._source():
+            example = _example(record, self.inputs)
+            if seen is not None:
+                seen.append(example)
+            yield example
+        if seen is not None:
+            self._remember(seen)
+
+    def to_list(self) -> List[dspy.Example]:
+        """Every example, loading the source if it is not memoized."""
+        memoized = self._memoized()
+        return list(memoized) if memoized is not None else list(iter(self))
+
+    def __len__(self) -> int:
+        memoized = self._memoized()
+        if memoized is not None:
+            return len(memoized)
+        if self.cache:
+            return len(self.to_list())
+        return self._count()
+
+    def _count(self) -> int:
+        """Number of examples, streamed from the source unless already memoized."""
+        memoized = self._memoized()
+        return len(memoized) if memoized is not None else sum(1 for _ in self._source())
+
+    def __getitem__(self, index):
+        memoized = self._memoized()
+        return (memoized if memoized is not None else self.to_list())[index]
+
+    def __bool__(self) -> bool:
+        return next(iter(self), None) is not None
+
+    def __repr__(self) -> str:
+        size = len(self._examples) if self._examples is not None else "?"
+        return f"Dataset(examples={size}, inputs={list(self.inputs)})"
+
+    ##### Selection #####
+
+    def _derive(self, source: Callable[[], Iterable]) -> "Dataset":
+        derived = Dataset(source, cache=self.cache)
+        derived.streamed = self.streamed
+        return derived
+
+    def _select(self, keep: Callable[[int], bool]) -> "Dataset":
+        return self._derive(lambda: (example for i, example in enumerate(self) if keep(i)))
+
+    def select(self, positions: Iterable[int]) -> "Dataset":
+        """The examples at the given positions, in source order."""
+        return self._select(set(positions).__contains__)
+
+    def take(self, n: int) -> "Dataset":
+        """The first `n` examples, read without touching the rest of the source."""
+        return self._derive(lambda: islice(self, n))
+
+    def shard(self, index: int, count: int) -> "Dataset":
+        """
+        Every `count`-th example starting at `index`, so `count` workers each streaming
+        their own shard cover the dataset exactly once.
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Shard index must be in [0, {count}), got {index}")
+        return self._select(lambda i: i % count == index)
+
+    def sample(self, n: int, seed: int = 42) -> "Dataset":
+        """`n` examples drawn without replacement, deterministic for a given seed."""
+        total = self._count()
+        return self.select(random.Random(seed).sample(range(total), min(n, total)))
+
+    def split(self, *fractions: float, seed: int = 42) -> Tuple["Dataset", ...]:
+        """
+        Partition the examples into parts of the given fractions, deterministic for a
+        given seed. Fractions summing to less than 1 leave the rest out.
+
+        Example:
+            trainset, valset = dataset.split(0.8, 0.2, seed=self.seed)
+        """
+        if not fractions or any(f < 0 for f in fractions) or sum(fractions) > 1 + 1e-9:
+            raise ValueError("Fractions must be non-negative and sum to at most 1")
+        total = self._count()
+        order = list(range(total))
+        random.Random(seed).shuffle(order)
+        # One byte per example records which part it falls in, with 255 for none
+        parts = bytearray([255]) * total
+        start = 0
+        for part, fraction in enumerate(fractions):
+            end = min(total, start + round(fraction * total))
+            if part == len(fractions) - 1 and abs(sum(fractions) - 1) < 1e-9:
+                # Rounding leftovers go to the last part
+                end = total
+            for i in order[start:end]:
+                parts[i] = part
+            start = end
+        return tuple(self._select(lambda i, part=part: parts[i] == part) for part in range(len(fractions)))
+
+
+def _read_jsonl(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv(path: Path, **options) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f, **options)
+
+
+def _read_parquet(path: Path, columns: Optional[Sequence[str]] = None, batch_size: int = 1024) -> Iterator[dict]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet datasets requires pyarrow: pip install pyarrow") from e
+    reader = pq.ParquetFile(path)
+    for batch in reader.iter_batches(batch_size=batch_size, columns=list(columns) if columns else None):
+        yield from batch.to_pylist()
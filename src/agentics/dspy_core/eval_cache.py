@@ -0,0 +1,155 @@
+import hashlib
+import inspect
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+import dspy
+
+
+def fingerprint(value: Any) -> str:
+    """Stable sha256 of a JSON-like value, with non-JSON leaves rendered as strings."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def code_fingerprint(function: Any) -> str:
+    """
+    Hash of a function's source code, or of its bytecode and constants when the source
+    is unavailable. Callable objects are hashed by their `__call__`.
+    """
+    function = inspect.unwrap(getattr(function, "__func__", function))
+    if not inspect.isfunction(function) and callable(function):
+        function = inspect.unwrap(type(function).__call__)
+    try:
+        return fingerprint(inspect.getsource(function))
+    except (OSError, TypeError):
+        code = getattr(function, "__code__", None)
+        if code is None:
+            return fingerprint(repr(function))
+        return fingerprint([code.co_code.hex(), repr(code.co_consts)])
+
+
+def program_fingerprint(program: dspy.Module) -> str:
+    """Hash of a program's class, `forward` source and learned state: demos, instructions and signatures."""
+    cls = type(program)
+    # `Program.optimized_program` is a result of optimizing, not part of the program itself
+    state = {
+        name: value
+        for name, value in program.dump_state().items()
+        if not name.startswith("optimized_program.")
+    }
+    return fingerprint([f"{cls.__module__}.{cls.__qualname__}", code_fingerprint(cls.forward), state])
+
+
+def lm_fingerprint(lm: Optional[dspy.LM]) -> str:
+    """Hash of an LM's model and default request parameters."""
+    if lm is None:
+        return fingerprint(None)
+    return fingerprint([getattr(lm, "model", None), getattr(lm, "kwargs", None)])
+
+
+class EvaluationCache:
+    """
+    A persistent cache of per-example predictions and metric scores, backed by SQLite.
+
+    Entries are keyed by a hash of (program state and `forward` source, LM, metric name
+    and source, example), so changing any of the demos, instructions, `forward`, LM
+    settings, metric or example fields yields a fresh key and re-runs only the examples
+    affected. Changes to helpers that `forward` or the metric call are not detected. Predictions are stored pickled; those
+    that cannot be pickled are simply not cached.
+
+    Args:
+        path (Union[str, Path], optional): SQLite database file. Use ":memory:" for a
+            process-local cache. Defaults to "evaluations.sqlite".
+    """
+
+    def __init__(self, path: Union[str, Path] = "evaluations.sqlite"):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                prediction BLOB NOT NULL,
+                score TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def keys(program: dspy.Module, lm: Optional[dspy.LM], metric, examples: List[dspy.Example]) -> List[str]:
+        """Cache keys of examples evaluated with a program, LM and metric."""
+        metric_name = f"{getattr(metric, '__module__', '')}.{getattr(metric, '__qualname__', repr(metric))}"
+        metric_id = f"{metric_name}:{code_fingerprint(metric)}"
+        prefix = f"{program_fingerprint(program)}\0{lm_fingerprint(lm)}\0{metric_id}\0"
+        return [
+            hashlib.sha256((prefix + fingerprint(example.toDict())).encode("utf-8")).hexdigest()
+            for example in examples
+        ]
+
+    def get_many(self, keys: List[str]) -> List[Optional[Tuple[dspy.Prediction, Any]]]:
+        """
+        Look up cached results.
+
+        Args:
+            keys (List[str]): Keys from `keys`.
+
+        Returns:
+            List[Optional[Tuple[dspy.Prediction, Any]]]: (prediction, score) per key, or None for misses.
+        """
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, prediction, score FROM evaluations WHERE key IN ({placeholders})", chunk
+                )
+                found.update({key: (prediction, score) for key, prediction, score in rows})
+        results = []
+        for key in keys:
+            if key not in found:
+                results.append(None)
+                continue
+            prediction, score = found[key]
+            results.append((pickle.loads(prediction), json.loads(score)))
+        return results
+
+    def put_many(self, entries: List[Tuple[str, dspy.Prediction, Any]]) -> int:
+        """
+        Store (key, prediction, score) results, returning the number stored.
+
+        Predictions or scores that cannot be serialized are skipped.
+        """
+        rows = []
+        now = time.time()
+        for key, prediction, score in entries:
+            try:
+                rows.append((key, pickle.dumps(prediction), json.dumps(score), now))
+            except (pickle.PicklingError, TypeError, AttributeError):
+                continue
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def clear(self) -> None:
+        """Remove every cached result."""
+        with self._lock:
+            self._conn.execute("DELETE FROM evaluations")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+import dspy
+
+
+def batch_scores(
+    batch_metric: Callable[[List[dspy.Example], List[dspy.Prediction]], Sequence[Any]],
+    examples: List[dspy.Example],
+    predictions: List[dspy.Prediction],
+    batch_size: int = 64,
+) -> List[Any]:
+    """
+    Score (example, prediction) pairs with a batched metric, `batch_size` pairs per call.
+
+    NumPy scores are converted to Python numbers, so they aggregate and serialize like
+    the per-example metric's.
+    """
+    scores = []
+    for start in range(0, len(examples), batch_size):
+        batch = examples[start:start + batch_size]
+        chunk = list(batch_metric(batch, predictions[start:start + batch_size]))
+        if len(chunk) != len(batch):
+            raise ValueError(f"batch_metric returned {len(chunk)} scores for {len(batch)} examples")
+        scores.extend(score.item() if hasattr(score, "item") else score for score in chunk)
+    return scores
+
+
+class _Pending:
+    __slots__ = ("example", "prediction", "done", "score", "error")
+
+    def __init__(self, example, prediction):
+        self.example = example
+        self.prediction = prediction
+        self.done = False
+        self.score = None
+        self.error = None
+
+
+class MetricBatcher:
+    """
+    A per-example metric that scores concurrent calls with one `batch_metric` call.
+
+    dspy optimizers call their metric once per example from several threads. Each call
+    waits up to `max_wait` seconds for others to join its batch; the batch is scored as
+    soon as it holds `batch_size` pairs or the wait runs out, and every caller gets its
+    own score. Calls with a trace (bootstrapping demos) are scored right away, alone.
+
+    Args:
+        batch_metric (Callable): `batch_metric(examples, predictions)` returning one score per pair.
+        batch_size (int, optional): Largest batch scored at once. Defaults to 64.
+        max_wait (float, optional): Seconds a call waits for others to join. Defaults to 0.005.
+    """
+
+    def __init__(self, batch_metric: Callable, batch_size: int = 64, max_wait: float = 0.005):
+        self.batch_metric = batch_metric
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._condition = threading.Condition()
+        self._pending: List[_Pending] = []
+
+    def __getstate__(self):
+        return {"batch_metric": self.batch_metric, "batch_size": self.batch_size, "max_wait": self.max_wait}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __call__(self, example, prediction, trace=None, pred_name=None, pred_trace=None):
+        if trace is not None:
+            return batch_scores(self.batch_metric, [example], [prediction])[0]
+
+        item = _Pending(example, prediction)
+        batch: Optional[List[_Pending]] = None
+        with self._condition:
+            self._pending.append(item)
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            else:
+                deadline = time.monotonic() + self.max_wait
+                while not item.done and item in self._pending and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+                if not item.done and item in self._pending:
+                    batch = self._take()
+        if batch is not None:
+            self._score(batch)
+        with self._condition:
+            # Another caller took this item into its batch and is scoring it
+            while not item.done:
+                self._condition.wait()
+        if item.error is not None:
+            raise item.error
+        return item.score
+
+    def _take(self) -> List[_Pending]:
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        return batch
+
+    def _score(self, batch: List[_Pending]) -> None:
+        try:
+            scores = batch_scores(
+                self.batch_metric,
+                [item.example for item in batch],
+                [item.prediction for item in batch],
+                self.batch_size,
+            )
+            errors = [None] * len(batch)
+        except Exception as e:
+            scores, errors = [None] * len(batch), [e] * len(batch)
+        with self._condition:
+            for item, score, error in zip(batch, scores, errors):
+                item.score, item.error, item.done = score, error, True
+            self._condition.notify_all()
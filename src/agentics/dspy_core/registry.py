@@ -0,0 +1,252 @@
+import json
+import os
+import re
+import socket
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import ctypes
+    import msvcrt
+
+MANIFEST = "registry.json"
+LOCK = ".registry.lock"
+VERSION_FILE = re.compile(r"v(\d+)_metadata\.json")
+
+
+def default_storage_root() -> Path:
+    """Root folder for saved programs: $AGENTICS_OPTIM_DIR, or `optim/` next to this package."""
+    root = os.environ.get("AGENTICS_OPTIM_DIR")
+    return Path(root) if root else Path(__file__).parent / "optim"
+
+
+def atomic_write_json(path: Path, data) -> None:
+    """Write JSON to a temporary file in the same folder and rename it over `path`."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on `path` across threads and processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def current_owner() -> dict:
+    """Identity of this process, recorded on versions it is scoring."""
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def owner_alive(owner: Optional[dict]) -> bool:
+    """
+    Whether the process that recorded an entry may still be running. Processes on other
+    hosts cannot be checked and are assumed alive.
+    """
+    if not owner:
+        return False
+    if owner.get("host") != socket.gethostname():
+        return True
+    pid = owner.get("pid")
+    if pid == os.getpid():
+        return True
+    if fcntl is None:
+        # PROCESS_QUERY_LIMITED_INFORMATION, and STILL_ACTIVE as the exit code
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class VersionRegistry:
+    """
+    Index of the program versions saved in one model/optimizer folder.
+
+    A `registry.json` manifest records every version with its score and timestamp, plus
+    the latest and best versions, so lookups read one small file instead of probing or
+    parsing every version. Version numbers are allocated under a file lock and the
+    manifest is replaced atomically, so concurrent saves from threads or processes never
+    share a slot or lose an entry.
+
+    Folders written before the manifest existed are indexed from their
+    `v*_metadata.json` files on first use.
+
+    Args:
+        folder (Union[str, Path]): The model/optimizer folder, created if missing.
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.folder / MANIFEST
+        self.lock_path = self.folder / LOCK
+
+    def path(self, version: int) -> Path:
+        """Program file of a version."""
+        return self.folder / f"v{version}.json"
+
+    def metadata_path(self, version: int) -> Path:
+        """Metadata file of a version."""
+        return self.folder / f"v{version}_metadata.json"
+
+    def telemetry_path(self, version: int) -> Path:
+        """Optimization telemetry file of a version."""
+        return self.folder / f"v{version}_telemetry.json"
+
+    ##### Manifest #####
+
+    def read(self) -> dict:
+        """The manifest, built from existing version files and persisted if there is none yet."""
+        if not self.manifest_path.exists():
+            with file_lock(self.lock_path):
+                if not self.manifest_path.exists():
+                    atomic_write_json(self.manifest_path, self._scan())
+        return self._read()
+
+    def _read(self) -> dict:
+        """The manifest, or a scan of the folder if there is none. Call with the lock held."""
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return self._scan()
+
+    def _scan(self) -> dict:
+        manifest = {"next_version": 1, "latest": None, "best": None, "versions": {}}
+        for metadata_path in self.folder.glob("v*_metadata.json"):
+            match = VERSION_FILE.fullmatch(metadata_path.name)
+            if not match or not self.path(int(match.group(1))).exists():
+                continue
+            try:
+                with open(metadata_path) as f:
+                    metadata = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+            self._add_entry(manifest, int(match.group(1)), metadata)
+        return manifest
+
+    @staticmethod
+    def _add_entry(manifest: dict, version: int, metadata: dict, status: str = "saved") -> None:
+        manifest["versions"][str(version)] = {
+            "status": status,
+            "score": metadata.get("score"),
+            "timestamp_utc": metadata.get("timestamp_utc"),
+        }
+        if status == "scoring":
+            manifest["versions"][str(version)]["owner"] = current_owner()
+        manifest["next_version"] = max(manifest["next_version"], version + 1)
+        if manifest["latest"] is None or version > manifest["latest"]:
+            manifest["latest"] = version
+        score = metadata.get("score")
+        best = manifest["best"]
+        if score is not None and (best is None or score > manifest["versions"][str(best)]["score"]):
+            manifest["best"] = version
+
+    ##### Writes #####
+
+    def allocate(self) -> int:
+        """Reserve the next version number."""
+        with file_lock(self.lock_path):
+            manifest = self._read()
+            version = manifest["next_version"]
+            manifest["next_version"] = version + 1
+            manifest["versions"][str(version)] = {"status": "pending"}
+            atomic_write_json(self.manifest_path, manifest)
+        return version
+
+    def record(self, version: int, metadata: dict, status: str = "saved") -> None:
+        """
+        Index an allocated version's score and timestamp.
+
+        Args:
+            version (int): The version number.
+            metadata (dict): The version's metadata, with an optional "score".
+            status (str): "saved", "scoring" while its score is computed in the
+                background by this process, or "failed" if scoring failed. Defaults to "saved".
+        """
+        with file_lock(self.lock_path):
+            manifest = self._read()
+            self._add_entry(manifest, version, metadata, status)
+            atomic_write_json(self.manifest_path, manifest)
+
+    ##### Lookups #####
+
+    def latest(self) -> Optional[int]:
+        """The most recently saved version, or None."""
+        return self.read()["latest"]
+
+    def scoring(self) -> list:
+        """
+        Versions whose score is still being computed.
+
+        Versions left "scoring" by a process that no longer runs are marked "failed".
+        """
+        versions = self.read()["versions"]
+        scoring = [version for version, entry in versions.items() if entry["status"] == "scoring"]
+        stale = [version for version in scoring if not owner_alive(versions[version].get("owner"))]
+        if stale:
+            with file_lock(self.lock_path):
+                manifest = self._read()
+                for version in stale:
+                    entry = manifest["versions"].get(version, {})
+                    if entry.get("status") == "scoring" and not owner_alive(entry.get("owner")):
+                        entry["status"] = "failed"
+                atomic_write_json(self.manifest_path, manifest)
+        return sorted(int(version) for version in scoring if version not in stale)
+
+    def wait(self, timeout: Optional[float] = None, interval: float = 0.5) -> bool:
+        """
+        Wait until no version is being scored, polling the manifest.
+
+        Returns:
+            bool: True if scoring finished, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.scoring():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def best(self) -> Optional[tuple]:
+        """(version, score) of the highest scoring version, or None."""
+        manifest = self.read()
+        if manifest["best"] is None:
+            return None
+        return manifest["best"], manifest["versions"][str(manifest["best"])]["score"]
@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import numpy as np
+import dspy
+from dspy.utils.callback import BaseCallback
+from .eval_cache import lm_fingerprint
+
+
+class Telemetry(BaseCallback):
+    """
+    dspy callback collecting telemetry for an optimization run.
+
+    Every LM call is attributed to a role, e.g. "task" for the program's LM and
+    "reflection" or "teacher" for the optimizer's. Optimizers call deep copies of these
+    LMs, so calls are matched by model and request parameters, or by model alone when a
+    copy changed its parameters (e.g. a higher temperature). Per role it tracks the call
+    count, cache hits, prompt and completion tokens, the cost reported by litellm and
+    the latency distribution. Every evaluation is recorded as a trial with its score
+    and duration.
+
+    Token counts and costs are read from each LM's history, so they are only available
+    while dspy history is enabled.
+
+    Args:
+        roles (Dict[str, dspy.LM], optional): LM of each role. LMs that match several roles
+            are counted under the first. Unmatched LMs count as "other".
+    """
+
+    def __init__(self, roles: Optional[Dict[str, Optional[dspy.LM]]] = None):
+        self._roles: Dict[str, str] = {}
+        self._models: Dict[str, str] = {}
+        for role, lm in (roles or {}).items():
+            if lm is not None:
+                self._roles.setdefault(lm_fingerprint(lm), role)
+                self._models.setdefault(getattr(lm, "model", None), role)
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, tuple] = {}
+        self._claimed: set = set()
+        self.trials: list = []
+        self.started = self.finished = None
+
+    def _role(self, role: str) -> Dict[str, Any]:
+        return self._calls.setdefault(role, {
+            "calls": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost": 0.0,
+            "latencies": [],
+        })
+
+    def _role_of(self, instance: Any) -> str:
+        role = self._roles.get(lm_fingerprint(instance))
+        return role or self._models.get(getattr(instance, "model", None), "other")
+
+    ##### Callbacks #####
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: dict) -> None:
+        history = getattr(instance, "history", None) or []
+        # The LM's newest history entry so far; this call's entry is appended after it
+        cursor = history[-1].get("uuid") if history else None
+        self._pending[call_id] = (instance, time.perf_counter(), cursor)
+
+    def on_lm_end(self, call_id: str, outputs: Any, exception: Optional[BaseException] = None) -> None:
+        instance, start, cursor = self._pending.pop(call_id, (None, time.perf_counter(), None))
+        latency = time.perf_counter() - start
+        with self._lock:
+            stats = self._role(self._role_of(instance))
+            stats["calls"] += 1
+            stats["latencies"].append(latency)
+            if exception is not None:
+                stats["errors"] += 1
+                return
+            entry = self._claim(instance, cursor)
+            if entry is None:
+                return
+            usage = entry.get("usage") or {}
+            stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            stats["completion_tokens"] += usage.get("completion_tokens") or 0
+            if getattr(entry.get("response"), "cache_hit", False):
+                stats["cache_hits"] += 1
+            else:
+                stats["cost"] += entry.get("cost") or 0.0
+
+    def _claim(self, instance: Any, cursor: Optional[str]) -> Optional[dict]:
+        """
+        The newest history entry of an LM not yet attributed to a call, among those added
+        since `cursor`, so each call only scans the entries of calls that overlapped it.
+        """
+        for entry in reversed(getattr(instance, "history", None) or []):
+            if cursor is not None and entry.get("uuid") == cursor:
+                break
+            if entry.get("uuid") not in self._claimed:
+                self._claimed.add(entry.get("uuid"))
+                return entry
+        return None
+
+    def on_evaluate_start(self, call_id: str, instance: Any, inputs: dict) -> None:
+        self._pending[call_id] = (instance, time.perf_counter(), None)
+
+    def on_evaluate_end(self, call_id: str, outputs: Any, exception: Optional[BaseException] = None) -> None:
+        _, start, _ = self._pending.pop(call_id, (None, time.perf_counter(), None))
+        with self._lock:
+            self.trials.append({
+                "score": getattr(outputs, "score", None),
+                "duration": time.perf_counter() - start,
+                "error": repr(exception) if exception else None,
+            })
+
+    ##### Running #####
+
+    @contextmanager
+    def activate(self) -> Iterator["Telemetry"]:
+        """Collect telemetry for everything run inside the block."""
+        self.started = time.time()
+        callbacks = list(dspy.settings.get("callbacks") or [])
+        try:
+            with dspy.context(callbacks=callbacks + [self]):
+                yield self
+        finally:
+            self.finished = time.time()
+
+    def summary(self) -> dict:
+        """JSON-serializable telemetry: wall time, per-role LM usage and per-trial results."""
+        with self._lock:
+            roles = {}
+            for role, stats in self._calls.items():
+                latencies = np.asarray(stats["latencies"], dtype=np.float64)
+                roles[role] = {
+                    **{key: value for key, value in stats.items() if key != "latencies"},
+                    "latency": {
+                        "mean": float(latencies.mean()) if len(latencies) else None,
+                        "p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                        "p90": float(np.percentile(latencies, 90)) if len(latencies) else None,
+                        "p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+                        "max": float(latencies.max()) if len(latencies) else None,
+                    },
+                }
+            totals = {
+                key: sum(stats[key] for stats in roles.values())
+                for key in ("calls", "errors", "cache_hits", "prompt_tokens", "completion_tokens", "cost")
+            }
+            finished = self.finished or time.time()
+            return {
+                "wall_time": finished - self.started if self.started else None,
+                "totals": totals,
+                "lm": roles,
+                "trials": list(self.trials),
+            }
@@ -1,6 +1,31 @@
+import base64
+import time
 import numpy as np
+import openai
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from typing import Union, List, Tuple
+from typing import Union, List, Optional, Tuple
+from .cache import EmbeddingCache
+from .index import blocked_top_k
+
+# Errors worth retrying a batch for; anything else is raised immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap upper-bound estimate of the number of tokens in a text.
+
+    Tokenizers average around 4 characters per token for English, but a single
+    character can cost a whole token in other scripts, so UTF-8 bytes / 3 is used
+    to stay on the safe side of the per-request token limit.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
 
 class Embedding:
     """
@@ -12,68 +37,183 @@ class Embedding:
     Args:
         model (str, optional): The model identifier to use. Defaults to "text-embedding-3-small".
         client (OpenAI, optional): OpenAI client instance. If None, a new instance is created.
+        batch_size (int, optional): Maximum number of inputs sent per request. Defaults to 2048.
+        max_batch_tokens (int, optional): Maximum estimated tokens sent per request. Defaults to 300_000.
+        max_concurrency (int, optional): Maximum number of requests in flight at once. Defaults to 4.
+        max_retries (int, optional): Retries per batch on rate limits and transient errors. Defaults to 3.
+        cache (EmbeddingCache, optional): Persistent cache consulted before calling the API. Defaults to None.
+        as_numpy (bool, optional): Return float32 NumPy arrays, transferred as base64, instead of
+            Python lists. Defaults to False.
+        dimensions (int, optional): Output size for models that support shortened embeddings
+            (text-embedding-3 and later). Defaults to None (the model's full size).
 
     Attributes:
         client (OpenAI): The OpenAI client instance.
         model (str): The model identifier being used.
     """
 
-    def __init__(self, model: str = "text-embedding-3-small", client: OpenAI = None):
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        client: OpenAI = None,
+        batch_size: int = 2048,
+        max_batch_tokens: int = 300_000,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        cache: EmbeddingCache = None,
+        as_numpy: bool = False,
+        dimensions: Optional[int] = None,
+    ):
         self.client = client or OpenAI()
         self.model = model
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.cache = cache
+        self.as_numpy = as_numpy
+        self.dimensions = dimensions
 
-    def __call__(self, input: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+    def __call__(
+        self, input: Union[str, List[str]], dimensions: Optional[int] = None
+    ) -> Union[List[float], List[List[float]], np.ndarray]:
         """
         Callable interface for generating embeddings.
 
         Args:
             input (Union[str, List[str]]): Text input, either a single string or a list of strings.
+            dimensions (int, optional): Output size, overriding the instance default.
 
         Returns:
-            Union[List[float], List[List[float]]]: 
+            Union[List[float], List[List[float]], np.ndarray]: 
                 - If a single string is provided, returns a list of floats (embedding).
                 - If a list of strings is provided, returns a list of embeddings.
+                - With `as_numpy=True`, a float32 array of shape (d,) or (n, d) instead.
         """
-        return self.embed(input)
+        return self.embed(input, dimensions)
 
-    def embed(self, input: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+    def embed(
+        self, input: Union[str, List[str]], dimensions: Optional[int] = None
+    ) -> Union[List[float], List[List[float]], np.ndarray]:
         """
         Generate embeddings for the given text input.
 
+        Lists are de-duplicated, split into batches bounded by `batch_size` and
+        `max_batch_tokens`, sent concurrently (up to `max_concurrency` requests)
+        and reassembled in input order. When a cache is configured, only texts
+        missing from it are sent to the API.
+
         Args:
             input (Union[str, List[str]]): Text input, either a single string or a list of strings.
+            dimensions (int, optional): Output size, overriding the instance default.
 
         Returns:
-            Union[List[float], List[List[float]]]: 
+            Union[List[float], List[List[float]], np.ndarray]: 
                 - If a single string is provided, returns a list of floats (embedding).
                 - If a list of strings is provided, returns a list of embeddings.
+                - With `as_numpy=True`, a float32 array of shape (d,) or (n, d) instead.
         """
-        response = self.client.embeddings.create(input=input, model=self.model)
+        dimensions = dimensions or self.dimensions
         if isinstance(input, str):
-            return response.data[0].embedding
-        return [data.embedding for data in response.data]
+            return self.embed([input], dimensions)[0]
+
+        unique = list(dict.fromkeys(input))
+        embeddings = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(self.model, dimensions, unique)
+            embeddings.update(
+                (text, vector if self.as_numpy else vector.tolist())
+                for text, vector in zip(unique, cached)
+                if vector is not None
+            )
+
+        missing = [text for text in unique if text not in embeddings]
+        batches = self._make_batches(missing)
+
+        if len(batches) <= 1:
+            results = [self._embed_batch(batch, dimensions) for batch in batches]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda batch: self._embed_batch(batch, dimensions), batches))
+
+        for batch, vectors in zip(batches, results):
+            embeddings.update(zip(batch, vectors))
+            if self.cache is not None:
+                self.cache.put_many(self.model, dimensions, batch, vectors)
+
+        if self.as_numpy:
+            if not input:
+                return np.empty((0, dimensions or 0), dtype=np.float32)
+            return np.stack([embeddings[text] for text in input])
+        return [embeddings[text] for text in input]
 
-    def cosine_similarity(self, a: List[float], b: List[float]) -> float:
+    def _make_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into consecutive batches bounded by count and estimated tokens."""
+        batches, batch, batch_tokens = [], [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_batch(
+        self, batch: List[str], dimensions: Optional[int] = None
+    ) -> Union[List[List[float]], List[np.ndarray]]:
+        """Embed a single batch with one request, retrying transient failures with backoff."""
+        params = {"input": batch, "model": self.model}
+        if dimensions:
+            params["dimensions"] = dimensions
+        if self.as_numpy:
+            params["encoding_format"] = "base64"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(**params)
+                break
+            except RETRYABLE_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+        data = sorted(response.data, key=lambda item: item.index)
+        if self.as_numpy:
+            return [np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32) for item in data]
+        return [item.embedding for item in data]
+
+    @staticmethod
+    def cosine_similarity(a: Union[List[float], np.ndarray], b: Union[List[float], np.ndarray]) -> float:
         """
         Compute the cosine similarity between two embedding vectors.
 
         Args:
-            a (List[float]): The first embedding vector.
-            b (List[float]): The second embedding vector.
+            a (Union[List[float], np.ndarray]): The first embedding vector.
+            b (Union[List[float], np.ndarray]): The second embedding vector.
 
         Returns:
             float: The cosine similarity score between -1 and 1.
         """
-        a, b = np.array(a), np.array(b)
+        a, b = np.asarray(a), np.asarray(b)
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
-    def rank(self, vector: List[float], vectors: List[List[float]], return_vectors: bool = False) -> List[Tuple[Union[int, List[float]], float]]:
+    @staticmethod
+    def rank(
+        vector: Union[List[float], np.ndarray],
+        vectors: Union[List[List[float]], np.ndarray],
+        return_vectors: bool = False,
+    ) -> List[Tuple[Union[int, List[float], np.ndarray], float]]:
         """
         Rank a list of vectors by similarity to a given vector using cosine similarity.
 
+        NumPy arrays are used as-is, without copying, and returned vectors stay arrays.
+
         Args:
-            vector (List[float]): The reference embedding vector.
-            vectors (List[List[float]]): A list of embedding vectors to compare against.
+            vector (Union[List[float], np.ndarray]): The reference embedding vector.
+            vectors (Union[List[List[float]], np.ndarray]): Embedding vectors to compare against.
             return_vectors (bool): If True, returns the actual vectors instead of their indices.
 
         Returns:
@@ -83,8 +223,9 @@ class Embedding:
                 - The cosine similarity score (higher is more similar).
                 The list is sorted in descending order of similarity.
         """
-        vector = np.array(vector)  # (d,)
-        vectors = np.array(vectors)  # (n, d)
+        as_arrays = isinstance(vectors, np.ndarray)
+        vector = np.asarray(vector)  # (d,)
+        vectors = np.asarray(vectors)  # (n, d)
         
         # Compute dot products between the reference vector and all vectors
         dot_products = np.dot(vectors, vector)  # (n,)
@@ -99,7 +240,36 @@ class Embedding:
         # Sort by highest similarity
         sorted_indices = np.argsort(-similarities)  # Order descending
         
-        if return_vectors:
+        if return_vectors and as_arrays:
+            return [(vectors[idx], float(similarities[idx])) for idx in sorted_indices]
+        elif return_vectors:
             return [(vectors[idx].tolist(), float(similarities[idx])) for idx in sorted_indices]
         else:
-            return [(int(idx), float(similarities[idx])) for idx in sorted_indices]
\ No newline at end of file
+            return [(int(idx), float(similarities[idx])) for idx in sorted_indices]
+
+    @staticmethod
+    def rank_many(
+        queries: Union[List[List[float]], np.ndarray],
+        vectors: Union[List[List[float]], np.ndarray],
+        k: int = 10,
+        memory_budget: int = 256 * 2**20,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank a corpus against many query vectors at once, keeping the top k per query.
+
+        Similarities are computed as blocked matrix-matrix products over query and
+        corpus tiles sized to `memory_budget`, so the corpus is normalized once per
+        tile rather than once per query and memory stays bounded.
+
+        Args:
+            queries (Union[List[List[float]], np.ndarray]): Query embedding vectors, shape (q, d).
+            vectors (Union[List[List[float]], np.ndarray]): Embedding vectors to compare against, shape (n, d).
+            k (int): Number of results per query. Defaults to 10.
+            memory_budget (int): Approximate bytes of working memory. Defaults to 256 MiB.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (ids, scores), both of shape (q, min(k, n)):
+                - The indices of the most similar vectors for each query.
+                - Their cosine similarity scores, in descending order.
+        """
+        return blocked_top_k(queries, vectors, k=k, memory_budget=memory_budget)
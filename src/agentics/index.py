@@ -0,0 +1,384 @@
+import numpy as np
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+Filter = Union[Dict[str, Any], Callable[[dict], bool]]
+
+
+def normalize(vectors: Union[List[float], List[List[float]], np.ndarray]) -> np.ndarray:
+    """
+    L2-normalize vectors into a contiguous float32 array.
+
+    Zero vectors are left as zeros instead of producing NaNs.
+
+    Args:
+        vectors: A single vector (d,) or a matrix of vectors (n, d).
+
+    Returns:
+        np.ndarray: The normalized float32 vector(s), same shape as the input.
+    """
+    vectors = np.array(vectors, dtype=np.float32, copy=True, order="C")
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def truncate(vectors: Union[List[float], List[List[float]], np.ndarray], dims: int) -> np.ndarray:
+    """
+    Shorten Matryoshka embeddings to their first `dims` dimensions and re-normalize them.
+
+    Models trained with Matryoshka representation learning, such as text-embedding-3-*,
+    keep most of their quality in the leading dimensions.
+
+    Args:
+        vectors: A single vector (d,) or a matrix of vectors (n, d).
+        dims (int): Number of leading dimensions to keep.
+
+    Returns:
+        np.ndarray: The truncated, normalized float32 vector(s).
+    """
+    return normalize(np.asarray(vectors)[..., :dims])
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, sorted in descending order.
+
+    Uses `argpartition` so only the selected k scores are sorted, O(n + k log k).
+
+    Args:
+        scores (np.ndarray): A 1D array of scores.
+        k (int): Number of indices to return.
+
+    Returns:
+        np.ndarray: Indices of the top-k scores.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise `top_k`: indices of the k highest scores in each row, sorted descending."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def blocked_top_k(
+    queries: Union[List[List[float]], np.ndarray],
+    vectors: Union[List[List[float]], np.ndarray],
+    k: int = 10,
+    memory_budget: int = 256 * 2**20,
+    normalized: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine similarity search for many queries at once, in bounded memory.
+
+    Similarities are computed as matrix-matrix products over query and corpus tiles,
+    sized so each tile of scores and normalized vectors fits in `memory_budget` bytes.
+    A running top-k per query is merged after every corpus tile, so the full
+    (queries x corpus) similarity matrix is never materialized.
+
+    Args:
+        queries: Query vectors of shape (q, d).
+        vectors: Corpus vectors of shape (n, d). May be a memory map.
+        k (int): Results per query. Defaults to 10.
+        memory_budget (int): Approximate bytes of working memory. Defaults to 256 MiB.
+        normalized (bool): The corpus vectors are already L2-normalized float32, so tiles
+            are scored in place instead of being normalized into a copy.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (ids, scores), both of shape (q, min(k, n)), with the
+            corpus row indices and cosine similarities of each query's best matches.
+    """
+    queries = normalize(queries)
+    vectors = np.asarray(vectors)
+    n, dim = vectors.shape
+    k = min(k, n)
+
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    scores = np.empty((len(queries), k), dtype=np.float32)
+    if k == 0 or len(queries) == 0:
+        return ids, scores
+
+    # Each corpus row in a tile costs a normalized copy plus one score per query
+    query_tile = min(len(queries), 1024)
+    corpus_tile = max(k, min(n, memory_budget // (4 * (dim + query_tile))))
+    for q_start in range(0, len(queries), query_tile):
+        query_block = queries[q_start:q_start + query_tile]
+        best_ids = np.empty((len(query_block), 0), dtype=np.int64)
+        best_scores = np.empty((len(query_block), 0), dtype=np.float32)
+        for c_start in range(0, n, corpus_tile):
+            tile = vectors[c_start:c_start + corpus_tile]
+            block = query_block @ (tile if normalized else normalize(tile)).T
+            local = top_k_rows(block, k)
+            best_ids = np.concatenate([best_ids, local + c_start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(block, local, axis=1)], axis=1)
+            keep = top_k_rows(best_scores, k)
+            best_ids = np.take_along_axis(best_ids, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        ids[q_start:q_start + query_tile] = best_ids
+        scores[q_start:q_start + query_tile] = best_scores
+    return ids, scores
+
+
+def last_occurrences(ids: List[Hashable]) -> List[int]:
+    """Positions of the last occurrence of each id, in order, so a repeated id keeps its final value."""
+    last = {id: i for i, id in enumerate(ids)}
+    return sorted(last.values())
+
+
+def check_json_ids(ids: Iterable[Hashable]) -> None:
+    """Raise unless every id is a str or int, the ids that come back unchanged from JSON."""
+    for id in ids:
+        if not isinstance(id, (str, int)):
+            raise ValueError(f"Persisted ids must be str or int, got {type(id).__name__}: {id!r}")
+
+
+def matches(metadata: dict, filter: Optional[Filter]) -> bool:
+    """
+    Check whether a metadata dict passes a filter.
+
+    A dict filter requires every key to be equal to the given value, or to be one of
+    the values when a list, tuple or set is given. A callable filter receives the
+    metadata dict and returns a bool.
+    """
+    if filter is None:
+        return True
+    if callable(filter):
+        return bool(filter(metadata))
+    for key, expected in filter.items():
+        value = metadata.get(key)
+        if isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class EmbeddingIndex:
+    """
+    An in-memory vector index for fast cosine similarity search.
+
+    Vectors are normalized once when added and kept in a contiguous float32 matrix,
+    so each query costs a single matrix-vector product plus an O(n) top-k selection.
+
+    For Matryoshka embeddings, `search(..., coarse_dims=256)` first scans a normalized
+    prefix of every vector and only re-scores a shortlist at full dimension.
+
+    Args:
+        dim (int, optional): Vector dimensionality. If None, inferred from the first add.
+
+    Attributes:
+        dim (int): The vector dimensionality.
+        ids (List[Hashable]): The id of each stored vector, in row order.
+        metadata (List[dict]): The metadata of each stored vector, in row order.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.ids: List[Hashable] = []
+        self.metadata: List[dict] = []
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._rows: Dict[Hashable, int] = {}
+        self._next_id = 0
+        self._prefixes: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, id: Hashable) -> bool:
+        return id in self._rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The normalized vectors currently stored, shape (n, dim)."""
+        return self._matrix[:len(self.ids)]
+
+    def add(
+        self,
+        vectors: Union[List[List[float]], np.ndarray],
+        ids: Optional[Iterable[Hashable]] = None,
+        metadata: Optional[Iterable[dict]] = None,
+    ) -> List[Hashable]:
+        """
+        Add vectors to the index. Existing ids are overwritten, and an id repeated within
+        the call keeps its last vector.
+
+        Args:
+            vectors (Union[List[List[float]], np.ndarray]): Vectors of shape (n, dim).
+            ids (Iterable[Hashable], optional): An id per vector. Defaults to increasing integers.
+            metadata (Iterable[dict], optional): A metadata dict per vector. Defaults to empty dicts.
+
+        Returns:
+            List[Hashable]: The ids of the added vectors.
+        """
+        vectors = normalize(vectors)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+        n = len(vectors)
+        if ids is None:
+            ids = list(range(self._next_id, self._next_id + n))
+        else:
+            ids = list(ids)
+        metadata = [dict(m) for m in metadata] if metadata is not None else [{} for _ in range(n)]
+        if len(ids) != n or len(metadata) != n:
+            raise ValueError("ids and metadata must have one entry per vector")
+        keep = last_occurrences(ids)
+        if len(keep) < n:
+            vectors, ids, metadata = vectors[keep], [ids[i] for i in keep], [metadata[i] for i in keep]
+            n = len(keep)
+
+        self.remove([id for id in ids if id in self._rows])
+        self._prefixes.clear()
+        self._reserve(len(self.ids) + n)
+        start = len(self.ids)
+        self._matrix[start:start + n] = vectors
+        for offset, id in enumerate(ids):
+            self._rows[id] = start + offset
+        self.ids.extend(ids)
+        self.metadata.extend(metadata)
+        self._next_id = max([self._next_id] + [id + 1 for id in ids if isinstance(id, int)])
+        return ids
+
+    def _reserve(self, size: int) -> None:
+        """Grow the backing matrix geometrically so appends are amortized O(1)."""
+        capacity = len(self._matrix)
+        if size <= capacity:
+            return
+        matrix = np.empty((max(size, 2 * capacity, 16), self.dim), dtype=np.float32)
+        matrix[:len(self.ids)] = self.vectors
+        self._matrix = matrix
+
+    def remove(self, ids: Iterable[Hashable]) -> int:
+        """
+        Remove vectors from the index by id. Unknown ids are ignored.
+
+        Each removal moves the last row into the freed slot, so it costs O(dim).
+
+        Args:
+            ids (Iterable[Hashable]): The ids to remove.
+
+        Returns:
+            int: The number of vectors removed.
+        """
+        removed = 0
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is None:
+                continue
+            last = len(self.ids) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self.ids[row] = self.ids[last]
+                self.metadata[row] = self.metadata[last]
+                self._rows[self.ids[row]] = row
+            self.ids.pop()
+            self.metadata.pop()
+            removed += 1
+        if removed:
+            self._prefixes.clear()
+        return removed
+
+    def _prefix(self, dims: int) -> np.ndarray:
+        """Contiguous, normalized `dims`-prefix of every vector, rebuilt after changes."""
+        if dims not in self._prefixes:
+            self._prefixes[dims] = truncate(self.vectors, dims)
+        return self._prefixes[dims]
+
+    def get(self, id: Hashable) -> Tuple[np.ndarray, dict]:
+        """Return the normalized vector and metadata stored for an id."""
+        row = self._rows[id]
+        return self._matrix[row], self.metadata[row]
+
+    def score(self, query: Union[List[float], np.ndarray], ids: Iterable[Hashable]) -> np.ndarray:
+        """
+        Cosine similarity of a query to the given stored ids only.
+
+        Costs O(len(ids) * dim), so candidates preselected by another retriever can be
+        re-scored without scanning the whole index.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            ids (Iterable[Hashable]): Stored ids to score.
+
+        Returns:
+            np.ndarray: One float32 score per id, in the given order.
+        """
+        rows = np.fromiter((self._rows[id] for id in ids), dtype=np.int64)
+        return self._matrix[rows] @ normalize(query)
+
+    def search(
+        self,
+        query: Union[List[float], np.ndarray],
+        k: int = 10,
+        filter: Optional[Filter] = None,
+        return_metadata: bool = False,
+        coarse_dims: Optional[int] = None,
+        candidates: Optional[int] = None,
+    ) -> List[Tuple]:
+        """
+        Find the k stored vectors most similar to a query vector.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            k (int): Number of results to return. Defaults to 10.
+            filter (Union[dict, Callable], optional): Only consider vectors whose metadata
+                matches. A dict requires equal values (or membership for list/tuple/set values),
+                a callable receives the metadata dict and returns a bool.
+            return_metadata (bool): If True, each result also includes the metadata dict.
+            coarse_dims (int, optional): Shortlist with a scan of only the first `coarse_dims`
+                dimensions (Matryoshka embeddings), then re-score the shortlist in full.
+                The prefix matrix is cached until the next add or remove.
+            candidates (int, optional): Shortlist size for coarse_dims. Defaults to 10 * k.
+
+        Returns:
+            List[Tuple]: (id, score) tuples, or (id, score, metadata) when return_metadata
+                is True, sorted in descending order of cosine similarity.
+        """
+        if not self.ids:
+            return []
+        query = normalize(query)
+
+        rows = None
+        if filter is not None:
+            rows = np.fromiter(
+                (row for row, metadata in enumerate(self.metadata) if matches(metadata, filter)),
+                dtype=np.int64,
+            )
+
+        if coarse_dims and coarse_dims < self.dim:
+            prefix = self._prefix(coarse_dims)
+            coarse = (prefix if rows is None else prefix[rows]) @ truncate(query, coarse_dims)
+            shortlist = top_k(coarse, candidates or 10 * k)
+            rows = shortlist if rows is None else rows[shortlist]
+
+        scores = self.vectors @ query if rows is None else self._matrix[rows] @ query
+
+        best = top_k(scores, k)
+        if rows is not None:
+            best_rows = rows[best]
+        else:
+            best_rows = best
+
+        if return_metadata:
+            return [
+                (self.ids[row], float(score), self.metadata[row])
+                for row, score in zip(best_rows, scores[best])
+            ]
+        return [(self.ids[row], float(score)) for row, score in zip(best_rows, scores[best])]
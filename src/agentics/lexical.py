@@ -0,0 +1,323 @@
+import math
+import re
+import numpy as np
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Literal, Optional, Sequence, Tuple, Union
+from .embedding import Embedding
+from .index import EmbeddingIndex, last_occurrences, top_k
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, for lexical matching."""
+    return TOKEN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several rankings with reciprocal rank fusion (RRF).
+
+    Each id scores the sum over rankings of weight / (k + rank), with ranks starting at 1,
+    so ids ranked well by several retrievers rise to the top regardless of how each
+    retriever scales its scores.
+
+    Args:
+        rankings (Sequence[Sequence[Hashable]]): Ranked id lists, best first.
+        k (int): Damping constant; higher values flatten the rank contribution. Defaults to 60.
+        weights (Sequence[float], optional): A weight per ranking. Defaults to 1.0 each.
+
+    Returns:
+        List[Tuple[Hashable, float]]: (id, fused score) tuples sorted in descending order.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] += weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    An in-process inverted index with Okapi BM25 scoring.
+
+    Only the postings of the query terms are read, so a query costs time proportional to
+    the number of documents containing those terms rather than the corpus size.
+
+    Args:
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Document length normalization. Defaults to 0.75.
+
+    Attributes:
+        ids (List[Hashable]): The id of each indexed row, in insertion order. Rows of
+            removed or replaced documents keep their entry but are never returned.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[Hashable] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._deleted: set = set()
+        self._rows: Dict[Hashable, int] = {}
+        self._total_length = 0
+        self._length_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, id: Hashable) -> bool:
+        return id in self._rows
+
+    def add(self, texts: Iterable[str], ids: Optional[Iterable[Hashable]] = None) -> List[Hashable]:
+        """
+        Index documents. Existing ids are replaced, and an id repeated within the call
+        keeps its last text.
+
+        Args:
+            texts (Iterable[str]): The document texts.
+            ids (Iterable[Hashable], optional): An id per document. Defaults to insertion positions.
+
+        Returns:
+            List[Hashable]: The ids of the added documents.
+        """
+        texts = list(texts)
+        start = len(self.ids)
+        ids = list(ids) if ids is not None else list(range(start, start + len(texts)))
+        if len(ids) != len(texts):
+            raise ValueError("ids must have one entry per text")
+        keep = last_occurrences(ids)
+        if len(keep) < len(ids):
+            texts, ids = [texts[i] for i in keep], [ids[i] for i in keep]
+
+        self.remove([id for id in ids if id in self._rows])
+        for row, (id, text) in enumerate(zip(ids, texts), start=start):
+            terms = Counter(tokenize(text))
+            for term, count in terms.items():
+                self._postings[term].append((row, count))
+                self._arrays.pop(term, None)
+            length = sum(terms.values())
+            self._lengths.append(length)
+            self._total_length += length
+            self.ids.append(id)
+            self._rows[id] = row
+        self._length_array = None
+        return ids
+
+    def remove(self, ids: Iterable[Hashable]) -> int:
+        """
+        Remove documents by id. Unknown ids are ignored.
+
+        Args:
+            ids (Iterable[Hashable]): The ids to remove.
+
+        Returns:
+            int: The number of documents removed.
+        """
+        removed = 0
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is None:
+                continue
+            self._deleted.add(row)
+            self._total_length -= self._lengths[row]
+            removed += 1
+        return removed
+
+    def _posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and term frequencies of a term's live postings, as cached arrays."""
+        if term not in self._arrays:
+            postings = self._postings.get(term, ())
+            rows = np.array([row for row, _ in postings], dtype=np.int64)
+            tfs = np.array([tf for _, tf in postings], dtype=np.float32)
+            self._arrays[term] = (rows, tfs)
+        return self._arrays[term]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k documents that best match a query under BM25.
+
+        Args:
+            query (str): The query text.
+            k (int): Number of results to return. Defaults to 10.
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id, score) tuples for documents sharing at least
+                one term with the query, sorted in descending order of BM25 score.
+        """
+        n = len(self._rows)
+        if not n:
+            return []
+        if self._deleted:
+            self._compact_postings()
+        average_length = self._total_length / n
+        if self._length_array is None:
+            self._length_array = np.asarray(self._lengths, dtype=np.float32)
+        lengths = self._length_array
+
+        rows_list, scores_list = [], []
+        for term in set(tokenize(query)):
+            rows, tfs = self._posting(term)
+            if not len(rows):
+                continue
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[rows] / average_length)
+            rows_list.append(rows)
+            scores_list.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not rows_list:
+            return []
+
+        rows = np.concatenate(rows_list)
+        term_scores = np.concatenate(scores_list)
+        unique, inverse = np.unique(rows, return_inverse=True)
+        totals = np.zeros(len(unique), dtype=np.float32)
+        np.add.at(totals, inverse, term_scores)
+        best = top_k(totals, k)
+        return [(self.ids[unique[i]], float(totals[i])) for i in best]
+
+    def _compact_postings(self) -> None:
+        """Drop removed rows from every posting list, once after a batch of removals."""
+        deleted = self._deleted
+        self._arrays.clear()
+        for term in list(self._postings):
+            postings = [(row, tf) for row, tf in self._postings[term] if row not in deleted]
+            if postings:
+                self._postings[term] = postings
+            else:
+                del self._postings[term]
+        self._deleted = set()
+
+
+class HybridRetriever:
+    """
+    Hybrid retrieval combining BM25 lexical matching with vector similarity.
+
+    In "prefilter" mode, BM25 selects up to `candidates` documents and only those are
+    scored against the query vector, cutting vector work by orders of magnitude on
+    keyword-heavy queries; queries with no lexical hits fall back to a full vector
+    search. In "union" mode, the lexical and vector top candidates are both retrieved
+    over the whole corpus. Either way the two rankings are fused with reciprocal rank
+    fusion.
+
+    Args:
+        index (EmbeddingIndex, optional): The vector index. Defaults to a new one.
+        lexical (BM25Index, optional): The lexical index. Defaults to a new one.
+        embedding (Embedding, optional): Used to embed texts and queries when vectors are not given.
+        mode (Literal["prefilter", "union"], optional): Candidate strategy. Defaults to "prefilter".
+        candidates (int, optional): Candidates taken from each retriever. Defaults to 100.
+        rrf_k (int, optional): Reciprocal rank fusion constant. Defaults to 60.
+        weights (Tuple[float, float], optional): (lexical, vector) fusion weights. Defaults to (1.0, 1.0).
+    """
+
+    def __init__(
+        self,
+        index: Optional[EmbeddingIndex] = None,
+        lexical: Optional[BM25Index] = None,
+        embedding: Optional[Embedding] = None,
+        mode: Literal["prefilter", "union"] = "prefilter",
+        candidates: int = 100,
+        rrf_k: int = 60,
+        weights: Tuple[float, float] = (1.0, 1.0),
+    ):
+        if mode not in ("prefilter", "union"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.index = index if index is not None else EmbeddingIndex()
+        self.lexical = lexical if lexical is not None else BM25Index()
+        self.embedding = embedding
+        self.mode = mode
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.weights = weights
+
+    def _vectorize(self, texts: Union[str, List[str]], vectors):
+        if vectors is not None:
+            return vectors
+        if self.embedding is None:
+            raise ValueError("Pass vectors explicitly or configure an embedding")
+        return self.embedding.embed(texts)
+
+    def add(
+        self,
+        texts: List[str],
+        vectors: Optional[Union[List[List[float]], np.ndarray]] = None,
+        ids: Optional[Iterable[Hashable]] = None,
+        metadata: Optional[Iterable[dict]] = None,
+    ) -> List[Hashable]:
+        """
+        Add documents to both indexes. Existing ids are replaced, and an id repeated
+        within the call keeps its last document.
+
+        Args:
+            texts (List[str]): The document texts.
+            vectors (Union[List[List[float]], np.ndarray], optional): Their embeddings.
+                Embedded with `embedding` if omitted.
+            ids (Iterable[Hashable], optional): An id per document.
+            metadata (Iterable[dict], optional): A metadata dict per document.
+
+        Returns:
+            List[Hashable]: The ids of the added documents.
+        """
+        texts = list(texts)
+        n = len(texts)
+        metadata = list(metadata) if metadata is not None else None
+        if vectors is not None and len(vectors) != n:
+            raise ValueError("vectors must have one entry per text")
+        if metadata is not None and len(metadata) != n:
+            raise ValueError("metadata must have one entry per text")
+        if ids is not None:
+            ids = list(ids)
+            if len(ids) != n:
+                raise ValueError("ids must have one entry per text")
+            # Both indexes get the same documents, so they never fall out of sync
+            keep = last_occurrences(ids)
+            if len(keep) < n:
+                texts, ids = [texts[i] for i in keep], [ids[i] for i in keep]
+                vectors = np.asarray(vectors)[keep] if vectors is not None else None
+                metadata = [metadata[i] for i in keep] if metadata is not None else None
+
+        ids = self.index.add(self._vectorize(texts, vectors), ids=ids, metadata=metadata)
+        self.lexical.add(texts, ids=ids)
+        return ids
+
+    def remove(self, ids: Iterable[Hashable]) -> int:
+        """Remove documents from both indexes, returning the number removed."""
+        ids = list(ids)
+        self.lexical.remove(ids)
+        return self.index.remove(ids)
+
+    def search(
+        self,
+        query: str,
+        vector: Optional[Union[List[float], np.ndarray]] = None,
+        k: int = 10,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Retrieve the k best documents for a query.
+
+        Args:
+            query (str): The query text.
+            vector (Union[List[float], np.ndarray], optional): The query embedding.
+                Embedded with `embedding` if omitted.
+            k (int): Number of results to return. Defaults to 10.
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id, fused score) tuples sorted in descending order.
+        """
+        vector = self._vectorize(query, vector)
+        lexical = [id for id, _ in self.lexical.search(query, k=self.candidates)]
+
+        if self.mode == "prefilter" and lexical:
+            scores = self.index.score(vector, lexical)
+            dense = [lexical[i] for i in top_k(scores, len(scores))]
+        else:
+            dense = [id for id, _ in self.index.search(vector, k=self.candidates)]
+
+        fused = reciprocal_rank_fusion([lexical, dense], k=self.rrf_k, weights=self.weights)
+        return fused[:k]
@@ -1,6 +1,8 @@
 import base64
+import hashlib
 from pydantic import BaseModel, Field
 from openai import OpenAI
+from .semantic_cache import SemanticCache
 from .utils import (
     create_tool_schema,
     execute_tool,
@@ -26,6 +28,11 @@ class LLM:
         model (str, optional): The model identifier to use. Defaults to "gpt-4o-mini".
         client (OpenAI, optional): OpenAI client instance. If None, creates new instance.
         messages (list[dict], optional): Initial conversation messages. Defaults to None.
+        semantic_cache (SemanticCache, optional): Serve paraphrases of earlier prompts from
+            this cache. Only `cast` and first-turn `chat` calls without tools or extra
+            arguments are cached, since later turns depend on the conversation. Defaults to None.
+        cache_namespace (str, optional): Semantic cache namespace. Defaults to the model
+            name plus a hash of the system prompt.
 
     Attributes:
         client (OpenAI): The OpenAI client instance
@@ -40,8 +47,12 @@ class LLM:
         model: str = "gpt-4o-mini",
         client: OpenAI = None,
         messages: list[dict] = None,
+        semantic_cache: SemanticCache = None,
+        cache_namespace: str = None,
     ):
         self.client = client or OpenAI()
+        self.semantic_cache = semantic_cache
+        self.cache_namespace = cache_namespace
         self.system_prompt = system_prompt
         self.model = model
         self.messages = messages or []
@@ -124,9 +135,27 @@ class LLM:
         Returns:
             BaseModel: Structured response matching response_format schema
         """
+        namespace = self._namespace([])
+        if self.semantic_cache:
+            cached = self.semantic_cache.get(prompt, namespace, response_format)
+            if cached is not None:
+                return cached
+
         messages = [user_message(prompt)]
         completion = self._cast(messages=messages, response_format=response_format)
-        return completion.choices[0].message.parsed
+        parsed = completion.choices[0].message.parsed
+        if self.semantic_cache and parsed is not None:
+            self.semantic_cache.put(prompt, parsed, namespace, response_format)
+        return parsed
+
+    def _namespace(self, messages: list[dict]) -> str:
+        """Semantic cache namespace for prompts sent after the given system messages."""
+        if self.cache_namespace:
+            return self.cache_namespace
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        if not system:
+            return self.model
+        return f"{self.model}:{hashlib.sha256(system.encode('utf-8')).hexdigest()[:16]}"
 
     def chat(
         self,
@@ -158,6 +187,22 @@ class LLM:
         Raises:
             ValueError: If no response is received from the model
         """
+        cacheable = bool(
+            self.semantic_cache
+            and prompt
+            and not tools
+            and not kwargs
+            and all(message["role"] == "system" for message in self.messages)
+        )
+        if cacheable:
+            namespace = self._namespace(self.messages)
+            cached = self.semantic_cache.get(prompt, namespace, response_format)
+            if cached is not None:
+                raw = cached.model_dump_json() if isinstance(cached, BaseModel) else cached
+                self.messages.append(user_message(prompt))
+                self.messages.append(assistant_message(raw))
+                return cached
+
         if prompt:
             self.messages.append(user_message(prompt))
 
@@ -183,11 +228,15 @@ class LLM:
                 validated_data: BaseModel = choice.message.parsed
                 raw_response = choice.message.content
                 self.messages.append(assistant_message(raw_response))
+                if cacheable:
+                    self.semantic_cache.put(prompt, validated_data, namespace, response_format)
                 return validated_data
 
             elif choice.message.content:
                 text_response = choice.message.content
                 self.messages.append(assistant_message(text_response))
+                if cacheable and not response_format:
+                    self.semantic_cache.put(prompt, text_response, namespace)
                 return text_response
             else:
                 raise ValueError("No response from the model")
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterable, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from .embedding import Embedding
+
+Record = Union[str, dict]
+Batch = Tuple[int, List[Any], List[str], List[dict]]
+
+
+class EmbeddingPipeline:
+    """
+    Stream records from an iterable or async iterable through `Embedding` into a vector sink.
+
+    Records are read lazily and grouped into batches. At most `max_in_flight` batches are
+    being embedded at any time; once that many are pending, reading stops until the oldest
+    one is written (backpressure), so memory stays constant however large the source is.
+    Batches are written to the sink in source order, and after each write the number of
+    records consumed is checkpointed, so an interrupted run can resume where it stopped.
+
+    Records may be strings, or dicts holding the text under `text_key`, an optional id under
+    `id_key`, and any other fields, which are kept as metadata. Records without an id get
+    their offset in the source as id.
+
+    The sink is a `VectorStore`, an `EmbeddingIndex`, or any callable taking
+    `(vectors, ids, metadata)`. A crash between a write and its checkpoint replays that one
+    batch on resume, which sinks keyed by id (as both classes are) absorb as an overwrite.
+
+    Args:
+        embedding (Embedding): The embedding client.
+        sink: Where embedded batches are written.
+        batch_size (int, optional): Records per batch. Defaults to 512.
+        max_in_flight (int, optional): Batches embedded concurrently. Defaults to 4.
+        checkpoint_path (Union[str, Path], optional): JSON file recording progress.
+            Defaults to None (no checkpointing).
+        text_key (str, optional): Key of the text in dict records. Defaults to "text".
+        id_key (str, optional): Key of the id in dict records. Defaults to "id".
+
+    Attributes:
+        offset (int): Number of source records written to the sink so far.
+    """
+
+    def __init__(
+        self,
+        embedding: Embedding,
+        sink,
+        batch_size: int = 512,
+        max_in_flight: int = 4,
+        checkpoint_path: Optional[Union[str, Path]] = None,
+        text_key: str = "text",
+        id_key: str = "id",
+    ):
+        self.embedding = embedding
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.text_key = text_key
+        self.id_key = id_key
+        self.offset = 0
+        self._write = self._sink_writer(sink)
+
+    @staticmethod
+    def _sink_writer(sink) -> Callable[[np.ndarray, List[Any], List[dict]], Any]:
+        if hasattr(sink, "append"):
+            return lambda vectors, ids, metadata: sink.append(vectors, ids=ids, metadata=metadata)
+        if hasattr(sink, "add"):
+            return lambda vectors, ids, metadata: sink.add(vectors, ids=ids, metadata=metadata)
+        if callable(sink):
+            return sink
+        raise TypeError("sink must have an append or add method, or be callable")
+
+    ##### Checkpoints #####
+
+    def _load_checkpoint(self) -> int:
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return 0
+        with open(self.checkpoint_path) as f:
+            return json.load(f)["offset"]
+
+    def _save_checkpoint(self) -> None:
+        if self.checkpoint_path is None:
+            return
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"offset": self.offset}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    ##### Batching #####
+
+    def _parse(self, record: Record, offset: int) -> Tuple[Any, str, dict]:
+        if isinstance(record, str):
+            return offset, record, {}
+        metadata = {key: value for key, value in record.items() if key not in (self.text_key, self.id_key)}
+        return record.get(self.id_key, offset), record[self.text_key], metadata
+
+    def _make_batch(self, chunk: List[Record], start: int) -> Batch:
+        """Turn records read from `start` into an (end offset, ids, texts, metadata) batch."""
+        parsed = [self._parse(record, start + i) for i, record in enumerate(chunk)]
+        ids, texts, metadata = (list(column) for column in zip(*parsed))
+        return start + len(chunk), ids, texts, metadata
+
+    def _batches(self, records: Iterator[Record], start: int) -> Iterator[Batch]:
+        offset = start
+        while True:
+            chunk = list(islice(records, self.batch_size))
+            if not chunk:
+                return
+            batch = self._make_batch(chunk, offset)
+            offset = batch[0]
+            yield batch
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedding.embed(texts), dtype=np.float32)
+
+    def _commit(self, batch: Batch, vectors: np.ndarray) -> None:
+        end, ids, _, metadata = batch
+        self._write(vectors, ids, metadata)
+        self.offset = end
+        self._save_checkpoint()
+
+    ##### Running #####
+
+    def run(self, source: Iterable[Record], resume: bool = True) -> int:
+        """
+        Embed every record of a source and write it to the sink.
+
+        Args:
+            source (Iterable[Record]): Strings or dict records, read lazily.
+            resume (bool): Skip the records already checkpointed. Defaults to True.
+
+        Returns:
+            int: The source offset reached, i.e. the number of records consumed.
+        """
+        self.offset = self._load_checkpoint() if resume else 0
+        records = islice(iter(source), self.offset, None)
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for batch in self._batches(records, self.offset):
+                if len(pending) >= self.max_in_flight:
+                    done, future = pending.popleft()
+                    self._commit(done, future.result())
+                pending.append((batch, executor.submit(self._embed, batch[2])))
+            while pending:
+                done, future = pending.popleft()
+                self._commit(done, future.result())
+        return self.offset
+
+    async def arun(self, source: Union[Iterable[Record], AsyncIterable[Record]], resume: bool = True) -> int:
+        """
+        Async version of `run`, also accepting async iterables as source.
+
+        Embedding requests and sink writes run in worker threads so the event loop
+        stays free.
+
+        Args:
+            source (Union[Iterable[Record], AsyncIterable[Record]]): Strings or dict records.
+            resume (bool): Skip the records already checkpointed. Defaults to True.
+
+        Returns:
+            int: The source offset reached, i.e. the number of records consumed.
+        """
+        self.offset = self._load_checkpoint() if resume else 0
+        offset, skip = self.offset, self.offset
+        pending = deque()
+        chunk: List[Record] = []
+
+        async def flush():
+            nonlocal offset
+            if len(pending) >= self.max_in_flight:
+                await self._acommit(*pending.popleft())
+            batch = self._make_batch(chunk, offset)
+            offset = batch[0]
+            pending.append((batch, asyncio.create_task(asyncio.to_thread(self._embed, batch[2]))))
+            chunk.clear()
+
+        try:
+            async for record in _aiter(source):
+                if skip:
+                    skip -= 1
+                    continue
+                chunk.append(record)
+                if len(chunk) == self.batch_size:
+                    await flush()
+            if chunk:
+                await flush()
+            while pending:
+                await self._acommit(*pending.popleft())
+        finally:
+            # After a failure, stop the batches still in flight and retrieve their outcome
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self.offset
+
+    async def _acommit(self, batch: Batch, task: "asyncio.Task[np.ndarray]") -> None:
+        await asyncio.to_thread(self._commit, batch, await task)
+
+
+async def _aiter(source: Union[Iterable[Record], AsyncIterable[Record]]):
+    """Iterate a sync or async iterable asynchronously."""
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
@@ -0,0 +1,244 @@
+import numpy as np
+from typing import Hashable, Iterable, List, Literal, Optional, Tuple, Union
+from .index import normalize, top_k
+from .store import VectorStore
+
+# Number of set bits in every possible byte, for Hamming distances on packed codes
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Scalar-quantize vectors to int8 using a per-dimension scale (max absolute value)."""
+    return np.clip(np.rint(vectors / scale * 127), -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Quantize vectors to one sign bit per dimension, packed 8 dimensions per byte."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Hamming distance between each packed binary code and a packed query code."""
+    return POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedIndex:
+    """
+    A compressed vector index with a fast approximate pass and exact re-ranking.
+
+    Stored vectors are quantized either to int8 (1 byte per dimension, 4x smaller than
+    float32) or to 1-bit signs (1 bit per dimension, 32x smaller). A query first scores
+    every code, with an int8 dot product or a Hamming distance, then re-scores the best
+    `k * rerank` candidates with full-precision vectors.
+
+    Full-precision vectors can be kept in memory, read from a memory-mapped `VectorStore`
+    (see `from_store`), or dropped entirely, in which case approximate scores are returned.
+
+    Args:
+        mode (Literal["int8", "binary"], optional): Quantization mode. Defaults to "int8".
+        rerank (int, optional): Candidates re-ranked per result, as a multiple of k. Defaults to 4.
+        keep_full_precision (bool, optional): Keep float32 copies in memory for re-ranking.
+            Defaults to True.
+
+    Attributes:
+        ids (List[Hashable]): The id of each stored vector, in insertion order.
+        codes (np.ndarray): The quantized vectors.
+        scale (np.ndarray): Per-dimension int8 scale, the largest absolute value seen so far.
+            Stored codes are re-quantized when a later add widens it.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["int8", "binary"] = "int8",
+        rerank: int = 4,
+        keep_full_precision: bool = True,
+    ):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.rerank = rerank
+        self.keep_full_precision = keep_full_precision
+        self.dim: Optional[int] = None
+        self.ids: List[Hashable] = []
+        self.codes: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        self._full_rows: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.mode == "binary":
+            return quantize_binary(vectors)
+        observed = np.abs(vectors).max(axis=0)
+        if self.scale is None:
+            self.scale = observed
+            self.scale[self.scale == 0] = 1.0
+        elif (observed > self.scale).any():
+            self._rescale(np.maximum(self.scale, observed))
+        return quantize_int8(vectors, self.scale)
+
+    def _rescale(self, scale: np.ndarray, chunk_size: int = 65536) -> None:
+        """Widen the int8 scale and re-quantize stored codes, so later vectors are not clipped."""
+        if self.codes is not None:
+            if self._full is not None:
+                codes = [
+                    quantize_int8(self._full[start:start + chunk_size], scale)
+                    for start in range(0, len(self.codes), chunk_size)
+                ]
+            else:
+                ratio = self.scale / scale
+                codes = [
+                    np.rint(self.codes[start:start + chunk_size] * ratio).astype(np.int8)
+                    for start in range(0, len(self.codes), chunk_size)
+                ]
+            self.codes = np.concatenate(codes)
+        self.scale = scale
+
+    def add(
+        self,
+        vectors: Union[List[List[float]], np.ndarray],
+        ids: Optional[Iterable[Hashable]] = None,
+    ) -> List[Hashable]:
+        """
+        Quantize and add vectors to the index.
+
+        Indexes built with `from_store` cannot be added to; append to the store instead
+        and rebuild.
+
+        Args:
+            vectors (Union[List[List[float]], np.ndarray]): Vectors of shape (n, d).
+            ids (Iterable[Hashable], optional): An id per vector. Defaults to insertion positions.
+
+        Returns:
+            List[Hashable]: The ids of the added vectors.
+        """
+        if self._full_rows is not None:
+            raise ValueError("This index reads vectors from a VectorStore; append to the store and rebuild it with from_store")
+        vectors = normalize(vectors)
+        start = len(self.ids)
+        ids = list(ids) if ids is not None else list(range(start, start + len(vectors)))
+        if len(ids) != len(vectors):
+            raise ValueError("ids must have one entry per vector")
+
+        self.dim = vectors.shape[1]
+        codes = self._quantize(vectors)
+        self.codes = codes if self.codes is None else np.concatenate([self.codes, codes])
+        if self.keep_full_precision:
+            self._full = vectors if self._full is None else np.concatenate([self._full, vectors])
+        self.ids.extend(ids)
+        return ids
+
+    @classmethod
+    def from_store(
+        cls,
+        store: VectorStore,
+        mode: Literal["int8", "binary"] = "int8",
+        rerank: int = 4,
+        chunk_size: int = 65536,
+    ) -> "QuantizedIndex":
+        """
+        Build a quantized index over the live vectors of a `VectorStore`.
+
+        Only the codes are held in memory; re-ranking reads full-precision rows straight
+        from the store's memory map.
+
+        Args:
+            store (VectorStore): The store to index.
+            mode (Literal["int8", "binary"]): Quantization mode. Defaults to "int8".
+            rerank (int): Candidates re-ranked per result, as a multiple of k. Defaults to 4.
+            chunk_size (int): Rows quantized at a time, bounds peak memory.
+
+        Returns:
+            QuantizedIndex: The index.
+        """
+        index = cls(mode=mode, rerank=rerank, keep_full_precision=False)
+        rows = store.live_rows()
+        index.dim = store.dim
+        index.ids = [store.ids[row] for row in rows]
+        if mode == "int8" and len(rows):
+            index.scale = np.zeros(store.dim, dtype=np.float32)
+            for start in range(0, len(rows), chunk_size):
+                block = store.vectors[rows[start:start + chunk_size]]
+                index.scale = np.maximum(index.scale, np.abs(block).max(axis=0))
+            index.scale[index.scale == 0] = 1.0
+        index.codes = np.concatenate(
+            [index._quantize(store.vectors[rows[start:start + chunk_size]]) for start in range(0, len(rows), chunk_size)]
+        ) if len(rows) else None
+        index._full = store.vectors
+        index._full_rows = rows
+        return index
+
+    def _approximate_scores(self, query: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """Score every code against the query; higher is more similar."""
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        if self.mode == "binary":
+            query_code = quantize_binary(query)
+            for start in range(0, len(self.codes), chunk_size):
+                distances = hamming_distances(self.codes[start:start + chunk_size], query_code)
+                # Angle estimate from the fraction of differing sign bits
+                scores[start:start + chunk_size] = np.cos(np.pi * distances / self.dim)
+        else:
+            scaled_query = query * self.scale / 127
+            for start in range(0, len(self.codes), chunk_size):
+                scores[start:start + chunk_size] = self.codes[start:start + chunk_size].astype(np.float32) @ scaled_query
+        return scores
+
+    def search(
+        self,
+        query: Union[List[float], np.ndarray],
+        k: int = 10,
+        rerank: Optional[int] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k stored vectors most similar to a query vector.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            k (int): Number of results to return. Defaults to 10.
+            rerank (int, optional): Candidates re-ranked per result, overriding the index default.
+                Use 0 to skip re-ranking and return approximate scores.
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id, score) tuples sorted in descending order of
+                cosine similarity (approximate when no full-precision vectors are available).
+        """
+        if not self.ids:
+            return []
+        query = normalize(query)
+        scores = self._approximate_scores(query)
+        rerank = self.rerank if rerank is None else rerank
+
+        if not rerank or self._full is None:
+            best = top_k(scores, k)
+            return [(self.ids[row], float(scores[row])) for row in best]
+
+        candidates = top_k(scores, k * rerank)
+        if self._full_rows is not None:
+            # Sorted reads keep memory-mapped access sequential
+            candidates = np.sort(candidates)
+            exact = self._full[self._full_rows[candidates]] @ query
+        else:
+            exact = self._full[candidates] @ query
+        best = top_k(exact, k)
+        return [(self.ids[candidates[i]], float(exact[i])) for i in best]
+
+    def memory_usage(self) -> dict:
+        """
+        Report the bytes held in memory compared to plain float32 storage.
+
+        Returns:
+            dict: `codes_bytes`, in-memory `full_precision_bytes`, the `float32_bytes` the
+                same vectors would take unquantized, and the resulting `compression` ratio.
+        """
+        codes_bytes = self.codes.nbytes if self.codes is not None else 0
+        in_memory_full = self._full is not None and not isinstance(self._full, np.memmap)
+        full_bytes = self._full.nbytes if in_memory_full else 0
+        float32_bytes = len(self.ids) * (self.dim or 0) * 4
+        return {
+            "codes_bytes": codes_bytes,
+            "full_precision_bytes": full_bytes,
+            "float32_bytes": float32_bytes,
+            "compression": float32_bytes / codes_bytes if codes_bytes else 0.0,
+        }
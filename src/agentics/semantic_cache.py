@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+import numpy as np
+from pydantic import BaseModel, ValidationError
+from .embedding import Embedding
+from .index import EmbeddingIndex
+
+Response = Union[str, BaseModel]
+
+
+def format_name(response_format: Optional[Type[BaseModel]]) -> str:
+    """Identify a response format, so responses of different formats never mix."""
+    if response_format is None:
+        return "text"
+    return f"{response_format.__module__}.{response_format.__qualname__}"
+
+
+class SemanticCache:
+    """
+    A response cache for `LLM` that matches prompts by meaning instead of exact text.
+
+    Prompts are embedded and kept in one `EmbeddingIndex` per (namespace, response format).
+    A lookup returns the response stored for the most similar earlier prompt, provided its
+    cosine similarity reaches `threshold` and it has not outlived `ttl`. Structured
+    responses are stored as JSON and re-validated against the requested `response_format`
+    on every hit; entries that no longer validate are dropped and count as misses.
+
+    Namespaces isolate unrelated traffic, e.g. different models, system prompts or tenants.
+
+    Args:
+        embedding (Embedding, optional): Embeds prompts. Defaults to `Embedding(as_numpy=True)`.
+        threshold (float, optional): Minimum cosine similarity for a hit. Defaults to 0.95.
+        ttl (float, optional): Seconds an entry stays valid. Defaults to None (forever).
+        candidates (int, optional): Nearest prompts checked per lookup. Defaults to 4.
+        clock (Callable[[], float], optional): Time source, in seconds. Defaults to `time.time`.
+    """
+
+    def __init__(
+        self,
+        embedding: Optional[Embedding] = None,
+        threshold: float = 0.95,
+        ttl: Optional[float] = None,
+        candidates: int = 4,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.embedding = embedding or Embedding(as_numpy=True)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.candidates = candidates
+        self.clock = clock
+        self._indexes: Dict[Tuple[str, str], EmbeddingIndex] = {}
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+        # A miss is usually followed by a put of the same prompt, so keep recent vectors
+        self._vector = lru_cache(maxsize=1024)(self._embed)
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        return np.asarray(self.embedding.embed(prompt), dtype=np.float32)
+
+    def get(
+        self,
+        prompt: str,
+        namespace: str = "default",
+        response_format: Optional[Type[BaseModel]] = None,
+    ) -> Optional[Response]:
+        """
+        Look up the response to a semantically equivalent earlier prompt.
+
+        Args:
+            prompt (str): The incoming prompt.
+            namespace (str): The namespace to search. Defaults to "default".
+            response_format (Type[BaseModel], optional): Expected response format. Hits
+                are re-validated against it.
+
+        Returns:
+            Optional[Response]: The cached text or validated model, or None on a miss.
+        """
+        vector = self._vector(prompt)
+        now = self.clock()
+        with self._lock:
+            index = self._indexes.get((namespace, format_name(response_format)))
+            results = index.search(vector, k=self.candidates, return_metadata=True) if index else []
+            for id, score, entry in results:
+                if score < self.threshold:
+                    break
+                if self.ttl is not None and now - entry["created"] > self.ttl:
+                    index.remove([id])
+                    continue
+                try:
+                    response = self._decode(entry["response"], response_format)
+                except ValidationError:
+                    index.remove([id])
+                    continue
+                self._counts[namespace]["hits"] += 1
+                return response
+            self._counts[namespace]["misses"] += 1
+            return None
+
+    def put(
+        self,
+        prompt: str,
+        response: Response,
+        namespace: str = "default",
+        response_format: Optional[Type[BaseModel]] = None,
+    ) -> None:
+        """
+        Store the response to a prompt.
+
+        Args:
+            prompt (str): The prompt that produced the response.
+            response (Response): The text or structured response.
+            namespace (str): The namespace to store in. Defaults to "default".
+            response_format (Type[BaseModel], optional): The format the response was requested in.
+        """
+        raw = response.model_dump_json() if isinstance(response, BaseModel) else response
+        vector = self._vector(prompt)
+        with self._lock:
+            key = (namespace, format_name(response_format))
+            index = self._indexes.setdefault(key, EmbeddingIndex())
+            # Re-asking a cached prompt refreshes its entry instead of duplicating it
+            existing = index.search(vector, k=1)
+            if existing and existing[0][1] >= 1 - 1e-6:
+                index.remove([existing[0][0]])
+            index.add(vector[None, :], metadata=[{"prompt": prompt, "response": raw, "created": self.clock()}])
+
+    @staticmethod
+    def _decode(raw: str, response_format: Optional[Type[BaseModel]]) -> Response:
+        if response_format is None:
+            return raw
+        return response_format.model_validate_json(raw)
+
+    def expire(self) -> int:
+        """Drop every entry older than `ttl`, returning the number removed."""
+        if self.ttl is None:
+            return 0
+        cutoff = self.clock() - self.ttl
+        removed = 0
+        with self._lock:
+            for index in self._indexes.values():
+                stale = [id for id, entry in zip(index.ids, index.metadata) if entry["created"] < cutoff]
+                removed += index.remove(stale)
+        return removed
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove every entry, or only those of one namespace, and reset its counters."""
+        with self._lock:
+            for key in list(self._indexes):
+                if namespace is None or key[0] == namespace:
+                    del self._indexes[key]
+            if namespace is None:
+                self._counts.clear()
+            else:
+                self._counts.pop(namespace, None)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, hit rate and entries, overall and per namespace."""
+        with self._lock:
+            namespaces = {}
+            for namespace in set(self._counts) | {key[0] for key in self._indexes}:
+                counts = self._counts.get(namespace, {"hits": 0, "misses": 0})
+                namespaces[namespace] = self._summary(
+                    counts["hits"],
+                    counts["misses"],
+                    sum(len(index) for key, index in self._indexes.items() if key[0] == namespace),
+                )
+        total = self._summary(
+            sum(s["hits"] for s in namespaces.values()),
+            sum(s["misses"] for s in namespaces.values()),
+            sum(s["entries"] for s in namespaces.values()),
+        )
+        return {**total, "namespaces": namespaces}
+
+    @staticmethod
+    def _summary(hits: int, misses: int, entries: int) -> Dict[str, Any]:
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
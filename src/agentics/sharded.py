@@ -0,0 +1,184 @@
+import os
+import weakref
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Hashable, Iterable, List, Literal, Optional, Tuple, Union
+from .index import blocked_top_k, normalize, top_k_rows
+
+# Corpus matrix attached in each worker process, see `_attach`
+_shared_matrix: Optional[np.ndarray] = None
+_shared_segment: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach(name: str, shape: Tuple[int, int]) -> None:
+    """Process pool initializer: map the shared corpus matrix without copying it."""
+    global _shared_matrix, _shared_segment
+    _shared_segment = shared_memory.SharedMemory(name=name)
+    _shared_matrix = np.ndarray(shape, dtype=np.float32, buffer=_shared_segment.buf)
+
+
+def _search_shard(
+    start: int,
+    stop: int,
+    queries: np.ndarray,
+    k: int,
+    memory_budget: int,
+    matrix: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-k over rows [start, stop) of the corpus, with global row indices."""
+    matrix = _shared_matrix if matrix is None else matrix
+    ids, scores = blocked_top_k(queries, matrix[start:stop], k, memory_budget, normalized=True)
+    return ids + start, scores
+
+
+def _release(executor: Executor, segment: Optional[shared_memory.SharedMemory]) -> None:
+    """Shut down a worker pool and unlink its shared memory segment."""
+    executor.shutdown(wait=False, cancel_futures=True)
+    if segment is not None:
+        segment.unlink()
+        try:
+            segment.close()
+        except BufferError:
+            # The index's matrix still views the buffer; the mapping is freed along with it
+            pass
+
+
+class ShardedIndex:
+    """
+    Exact cosine similarity search split across a pool of worker threads or processes.
+
+    The corpus is normalized once into a single float32 matrix and divided into
+    contiguous row shards. Each worker computes a local top-k for its shard and the
+    local results are merged, so results are exact, with the same scores as a
+    single-core scan, while the work spreads across cores.
+
+    With `executor="process"`, the matrix lives in a `multiprocessing.shared_memory`
+    segment that every worker maps, so vectors are never copied between processes.
+    Threads also scale because NumPy releases the GIL inside matrix products; processes
+    avoid contention in the Python-level top-k selection.
+
+    Use as a context manager, or call `close`, to release the pool and shared memory. An
+    index that is garbage-collected, or still open at exit, releases them too.
+
+    Args:
+        vectors (Union[List[List[float]], np.ndarray]): Corpus vectors of shape (n, d).
+        ids (Iterable[Hashable], optional): An id per vector. Defaults to row positions.
+        n_shards (int, optional): Number of shards and workers. Defaults to the CPU count.
+        executor (Literal["thread", "process"], optional): Worker type. Defaults to "thread".
+        memory_budget (int, optional): Working memory per shard, in bytes. Defaults to 64 MiB.
+
+    Attributes:
+        ids (List[Hashable]): The id of each stored vector, in row order.
+        shards (List[Tuple[int, int]]): The [start, stop) row range of each shard.
+    """
+
+    def __init__(
+        self,
+        vectors: Union[List[List[float]], np.ndarray],
+        ids: Optional[Iterable[Hashable]] = None,
+        n_shards: Optional[int] = None,
+        executor: Literal["thread", "process"] = "thread",
+        memory_budget: int = 64 * 2**20,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        vectors = normalize(vectors)
+        n = len(vectors)
+        self.ids: List[Hashable] = list(ids) if ids is not None else list(range(n))
+        if len(self.ids) != n:
+            raise ValueError("ids must have one entry per vector")
+
+        n_shards = max(1, min(n_shards or os.cpu_count() or 1, n or 1))
+        bounds = np.linspace(0, n, n_shards + 1).astype(int)
+        self.shards = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self.memory_budget = memory_budget
+        self._segment: Optional[shared_memory.SharedMemory] = None
+
+        if executor == "process":
+            self._segment = shared_memory.SharedMemory(create=True, size=max(vectors.nbytes, 1))
+            self._matrix = np.ndarray(vectors.shape, dtype=np.float32, buffer=self._segment.buf)
+            self._matrix[:] = vectors
+            self._executor: Executor = ProcessPoolExecutor(
+                max_workers=n_shards,
+                initializer=_attach,
+                initargs=(self._segment.name, vectors.shape),
+            )
+        else:
+            self._matrix = vectors
+            self._executor = ThreadPoolExecutor(max_workers=n_shards)
+        # Never leave the segment behind in /dev/shm, even without `close`
+        self._finalizer = weakref.finalize(self, _release, self._executor, self._segment)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __enter__(self) -> "ShardedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool and release the shared memory segment."""
+        self._executor.shutdown()
+        if self._segment is not None:
+            self._matrix = None
+            self._segment = None
+        self._finalizer()
+
+    def search_many(
+        self,
+        queries: Union[List[List[float]], np.ndarray],
+        k: int = 10,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k search for a batch of queries.
+
+        Args:
+            queries (Union[List[List[float]], np.ndarray]): Query vectors of shape (q, d).
+            k (int): Results per query. Defaults to 10.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (rows, scores), both of shape (q, min(k, n)), with
+                the row positions and cosine similarities of each query's best matches.
+                Map rows to ids through `ids`.
+        """
+        queries = normalize(queries)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        # Threads share the matrix directly; processes read it from shared memory
+        matrix = self._matrix if self._segment is None else None
+        futures = [
+            self._executor.submit(_search_shard, start, stop, queries, k, self.memory_budget, matrix)
+            for start, stop in self.shards
+            if stop > start
+        ]
+        results = [future.result() for future in futures]
+        if not results:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        rows = np.concatenate([ids for ids, _ in results], axis=1)
+        scores = np.concatenate([scores for _, scores in results], axis=1)
+        best = top_k_rows(scores, k)
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def search(
+        self,
+        query: Union[List[float], np.ndarray],
+        k: int = 10,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k stored vectors most similar to a query vector.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            k (int): Number of results to return. Defaults to 10.
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id, score) tuples sorted in descending order
+                of cosine similarity.
+        """
+        rows, scores = self.search_many(np.asarray(query)[None, :], k)
+        return [(self.ids[row], float(score)) for row, score in zip(rows[0], scores[0])]
@@ -0,0 +1,426 @@
+import json
+import os
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+from .index import Filter, check_json_ids, last_occurrences, matches, normalize, top_k
+
+
+class VectorStore:
+    """
+    A persistent, memory-mapped vector store for cosine similarity search.
+
+    Normalized float32 vectors live in a flat file that is memory-mapped read-only, so
+    any number of processes can open the same store and share one copy of it through
+    the OS page cache. Ids and metadata are kept in a JSON Lines sidecar.
+
+    Writes are append-only. Deleting a vector only records a tombstone; `compact`
+    rewrites the files without the deleted rows into a new generation. Every write
+    is committed by atomically replacing the `store.json` manifest, so readers never
+    see partial writes and a crashed append is simply discarded.
+
+    Only one process should write to a store at a time; any number may read.
+
+    Args:
+        path (Union[str, Path]): Directory holding the store. Created if missing.
+        dim (int, optional): Vector dimensionality. If None, inferred from the first append.
+        readonly (bool, optional): Open without write access. Defaults to False.
+
+    Attributes:
+        path (Path): The store directory.
+        dim (int): The vector dimensionality.
+        generation (int): Incremented on every compaction.
+    """
+
+    def __init__(self, path: Union[str, Path], dim: Optional[int] = None, readonly: bool = False):
+        self.path = Path(path)
+        self.readonly = readonly
+        self.dim = dim
+        self.generation: Optional[int] = None
+        self._mapped: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+
+        if not self._manifest_path.exists():
+            if readonly:
+                raise FileNotFoundError(f"Vector store not found: {self.path}")
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._write_manifest({
+                "dim": dim,
+                "generation": 0,
+                "count": 0,
+                "next_id": 0,
+                "records_bytes": 0,
+                "deleted_bytes": 0,
+            })
+        self.refresh()
+
+    ##### Files #####
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.path / "store.json"
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self.path / f"vectors-{generation}.f32"
+
+    def _records_path(self, generation: int) -> Path:
+        return self.path / f"records-{generation}.jsonl"
+
+    def _deleted_path(self, generation: int) -> Path:
+        return self.path / f"deleted-{generation}.txt"
+
+    def _write_manifest(self, manifest: dict) -> None:
+        """Commit a new manifest atomically."""
+        tmp = self._manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._manifest_path)
+        self._manifest = manifest
+
+    @staticmethod
+    def _append_file(path: Path, committed: int, data: bytes) -> int:
+        """Append to a file after discarding anything past the committed size."""
+        with open(path, "ab") as f:
+            f.truncate(committed)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return committed + len(data)
+
+    ##### Reading #####
+
+    def refresh(self) -> None:
+        """Pick up writes and compactions committed since the store was opened."""
+        with self._lock:
+            for attempt in range(3):
+                try:
+                    self._refresh()
+                    return
+                except FileNotFoundError:
+                    # A compaction removed the generation we were about to read
+                    if attempt == 2:
+                        raise
+
+    def _refresh(self) -> None:
+        with open(self._manifest_path) as f:
+            manifest = json.load(f)
+        self._manifest = manifest
+        self.dim = manifest["dim"]
+        generation = manifest["generation"]
+
+        if generation != self.generation:
+            self.generation = generation
+            self._ids: List[Hashable] = []
+            self._metadata: List[dict] = []
+            self._rows: Dict[Hashable, int] = {}
+            self._deleted: Set[int] = set()
+            self._records_offset = 0
+            self._deleted_offset = 0
+
+        count = manifest["count"]
+        if (generation, count) != self._mapped:
+            if count:
+                self._vectors = np.memmap(
+                    self._vectors_path(generation), dtype=np.float32, mode="r", shape=(count, self.dim)
+                )
+            else:
+                self._vectors = np.empty((0, self.dim or 0), dtype=np.float32)
+            self._mapped = (generation, count)
+
+        if manifest["records_bytes"] > self._records_offset:
+            with open(self._records_path(generation), "rb") as f:
+                f.seek(self._records_offset)
+                data = f.read(manifest["records_bytes"] - self._records_offset)
+            for line in data.splitlines():
+                record = json.loads(line)
+                self._rows[record["id"]] = len(self._ids)
+                self._ids.append(record["id"])
+                self._metadata.append(record["metadata"])
+            self._records_offset = manifest["records_bytes"]
+
+        if manifest["deleted_bytes"] > self._deleted_offset:
+            with open(self._deleted_path(generation), "rb") as f:
+                f.seek(self._deleted_offset)
+                data = f.read(manifest["deleted_bytes"] - self._deleted_offset)
+            for line in data.splitlines():
+                row = int(line)
+                self._deleted.add(row)
+                if self._rows.get(self._ids[row]) == row:
+                    del self._rows[self._ids[row]]
+            self._deleted_offset = manifest["deleted_bytes"]
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted)
+
+    def __contains__(self, id: Hashable) -> bool:
+        return id in self._rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Memory-mapped normalized vectors, including tombstoned rows, shape (rows, dim)."""
+        return self._vectors
+
+    @property
+    def ids(self) -> List[Hashable]:
+        """The id of each row of `vectors`, including tombstoned rows."""
+        return self._ids
+
+    def live_rows(self) -> np.ndarray:
+        """Indices of the rows of `vectors` that are not tombstoned."""
+        mask = np.ones(len(self._vectors), dtype=bool)
+        mask[list(self._deleted)] = False
+        return np.flatnonzero(mask)
+
+    def get(self, id: Hashable) -> Tuple[np.ndarray, dict]:
+        """Return the normalized vector and metadata stored for an id."""
+        row = self._rows[id]
+        return self._vectors[row], self._metadata[row]
+
+    def search(
+        self,
+        query: Union[List[float], np.ndarray],
+        k: int = 10,
+        filter: Optional[Filter] = None,
+        return_metadata: bool = False,
+        chunk_size: int = 65536,
+    ) -> List[Tuple]:
+        """
+        Find the k stored vectors most similar to a query vector.
+
+        The memory-mapped matrix is scanned in chunks, so only the pages being scored
+        need to be resident.
+
+        Args:
+            query (Union[List[float], np.ndarray]): The query embedding vector.
+            k (int): Number of results to return. Defaults to 10.
+            filter (Union[dict, Callable], optional): Metadata filter, as in `EmbeddingIndex.search`.
+            return_metadata (bool): If True, each result also includes the metadata dict.
+            chunk_size (int): Rows scored per matrix-vector product.
+
+        Returns:
+            List[Tuple]: (id, score) tuples, or (id, score, metadata) when return_metadata
+                is True, sorted in descending order of cosine similarity.
+        """
+        query = normalize(query)
+        excluded = set(self._deleted)
+        if filter is not None:
+            excluded.update(row for row, metadata in enumerate(self._metadata) if not matches(metadata, filter))
+        excluded = np.fromiter(excluded, dtype=np.int64)
+
+        best_rows, best_scores = [], []
+        for start in range(0, len(self._vectors), chunk_size):
+            scores = self._vectors[start:start + chunk_size] @ query
+            local = excluded[(excluded >= start) & (excluded < start + len(scores))] - start
+            scores[local] = -np.inf
+            best = top_k(scores, k)
+            best_rows.append(best + start)
+            best_scores.append(scores[best])
+        if not best_rows:
+            return []
+
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        best = top_k(scores, k)
+        best = best[np.isfinite(scores[best])]
+        if return_metadata:
+            return [(self._ids[row], float(score), self._metadata[row]) for row, score in zip(rows[best], scores[best])]
+        return [(self._ids[row], float(score)) for row, score in zip(rows[best], scores[best])]
+
+    ##### Writing #####
+
+    def _ensure_writable(self) -> None:
+        if self.readonly:
+            raise PermissionError(f"Vector store opened read-only: {self.path}")
+
+    def append(
+        self,
+        vectors: Union[List[List[float]], np.ndarray],
+        ids: Optional[Iterable[Hashable]] = None,
+        metadata: Optional[Iterable[dict]] = None,
+    ) -> List[Hashable]:
+        """
+        Append vectors to the store. Existing ids are tombstoned and replaced, and an id
+        repeated within the call keeps its last vector.
+
+        Args:
+            vectors (Union[List[List[float]], np.ndarray]): Vectors of shape (n, dim).
+            ids (Iterable[Hashable], optional): A str or int id per vector, as ids are
+                stored as JSON. Defaults to increasing integers.
+            metadata (Iterable[dict], optional): A JSON-serializable metadata dict per vector.
+
+        Returns:
+            List[Hashable]: The ids of the appended vectors.
+        """
+        self._ensure_writable()
+        vectors = normalize(vectors)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+
+        with self._lock:
+            self.refresh()
+            manifest = dict(self._manifest)
+            if manifest["dim"] is None:
+                manifest["dim"] = vectors.shape[1]
+            if vectors.shape[1] != manifest["dim"]:
+                raise ValueError(f"Expected vectors of dimension {manifest['dim']}, got {vectors.shape[1]}")
+
+            n = len(vectors)
+            next_id = manifest["next_id"]
+            ids = list(ids) if ids is not None else list(range(next_id, next_id + n))
+            metadata = list(metadata) if metadata is not None else [{} for _ in range(n)]
+            if len(ids) != n or len(metadata) != n:
+                raise ValueError("ids and metadata must have one entry per vector")
+            check_json_ids(ids)
+            keep = last_occurrences(ids)
+            if len(keep) < n:
+                vectors, ids, metadata = vectors[keep], [ids[i] for i in keep], [metadata[i] for i in keep]
+                n = len(keep)
+
+            replaced = [self._rows[id] for id in ids if id in self._rows]
+            if replaced:
+                manifest["deleted_bytes"] = self._append_file(
+                    self._deleted_path(self.generation),
+                    manifest["deleted_bytes"],
+                    "".join(f"{row}\n" for row in replaced).encode(),
+                )
+
+            row_size = 4 * manifest["dim"]
+            self._append_file(self._vectors_path(self.generation), manifest["count"] * row_size, vectors.tobytes())
+            manifest["records_bytes"] = self._append_file(
+                self._records_path(self.generation),
+                manifest["records_bytes"],
+                "".join(json.dumps({"id": id, "metadata": m}) + "\n" for id, m in zip(ids, metadata)).encode(),
+            )
+            manifest["count"] += n
+            manifest["next_id"] = max([next_id] + [id + 1 for id in ids if isinstance(id, int)])
+            self._write_manifest(manifest)
+            self.refresh()
+        return ids
+
+    def delete(self, ids: Iterable[Hashable]) -> int:
+        """
+        Tombstone vectors by id. Unknown ids are ignored.
+
+        Args:
+            ids (Iterable[Hashable]): The ids to delete.
+
+        Returns:
+            int: The number of vectors deleted.
+        """
+        self._ensure_writable()
+        with self._lock:
+            self.refresh()
+            rows = [self._rows[id] for id in dict.fromkeys(ids) if id in self._rows]
+            if rows:
+                manifest = dict(self._manifest)
+                manifest["deleted_bytes"] = self._append_file(
+                    self._deleted_path(self.generation),
+                    manifest["deleted_bytes"],
+                    "".join(f"{row}\n" for row in rows).encode(),
+                )
+                self._write_manifest(manifest)
+                self.refresh()
+        return len(rows)
+
+    def compact(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Rewrite the store without tombstoned rows into a new generation.
+
+        The bulk of the copy runs without blocking appends and deletes; only rows
+        written during the copy are reconciled under the write lock. Readers that still
+        map the previous generation keep working until they call `refresh`.
+
+        Args:
+            background (bool): Run in a daemon thread and return it. Defaults to False.
+
+        Returns:
+            Optional[threading.Thread]: The compaction thread when background is True.
+        """
+        self._ensure_writable()
+        if background:
+            thread = threading.Thread(target=self.compact, daemon=True)
+            thread.start()
+            return thread
+
+        with self._compact_lock:
+            with self._lock:
+                self.refresh()
+                old_generation = self.generation
+                snapshot = self._manifest["count"]
+                deleted = set(self._deleted)
+                vectors, ids, metadata = self._vectors, self._ids, self._metadata
+
+            generation = old_generation + 1
+            vectors_path = self._vectors_path(generation)
+            records_path = self._records_path(generation)
+            # Leftovers from a compaction that crashed before committing
+            vectors_path.unlink(missing_ok=True)
+            records_path.unlink(missing_ok=True)
+            remap = np.full(snapshot, -1, dtype=np.int64)
+            count = self._copy_rows(vectors, ids, metadata, range(snapshot), deleted, remap, 0, vectors_path, records_path)
+
+            with self._lock:
+                self.refresh()
+                manifest = dict(self._manifest)
+                # Reconcile writes that landed while the snapshot was being copied
+                total = manifest["count"]
+                remap = np.concatenate([remap, np.full(total - snapshot, -1, dtype=np.int64)])
+                count = self._copy_rows(
+                    self._vectors, self._ids, self._metadata, range(snapshot, total),
+                    self._deleted, remap, count, vectors_path, records_path,
+                )
+                tombstones = sorted(int(remap[row]) for row in self._deleted - deleted if remap[row] >= 0)
+                data = "".join(f"{row}\n" for row in tombstones).encode()
+                with open(self._deleted_path(generation), "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                manifest.update({
+                    "generation": generation,
+                    "count": count,
+                    "records_bytes": records_path.stat().st_size,
+                    "deleted_bytes": len(data),
+                })
+                self._write_manifest(manifest)
+                self.refresh()
+
+                for path in (
+                    self._vectors_path(old_generation),
+                    self._records_path(old_generation),
+                    self._deleted_path(old_generation),
+                ):
+                    path.unlink(missing_ok=True)
+        return None
+
+    @staticmethod
+    def _copy_rows(
+        vectors: np.ndarray,
+        ids: List[Hashable],
+        metadata: List[dict],
+        rows: range,
+        deleted: Set[int],
+        remap: np.ndarray,
+        count: int,
+        vectors_path: Path,
+        records_path: Path,
+        chunk_size: int = 65536,
+    ) -> int:
+        """Append the live rows of a range to new generation files, recording their new positions."""
+        with open(vectors_path, "ab") as vf, open(records_path, "ab") as rf:
+            for start in range(rows.start, rows.stop, chunk_size):
+                live = [row for row in range(start, min(start + chunk_size, rows.stop)) if row not in deleted]
+                if not live:
+                    continue
+                vf.write(np.ascontiguousarray(vectors[live]).tobytes())
+                rf.write("".join(json.dumps({"id": ids[row], "metadata": metadata[row]}) + "\n" for row in live).encode())
+                remap[live] = np.arange(count, count + len(live))
+                count += len(live)
+            vf.flush()
+            os.fsync(vf.fileno())
+            rf.flush()
+            os.fsync(rf.fileno())
+        return count
@@ -0,0 +1,115 @@
+import json
+
+import cloudpickle
+import dspy
+from agentics import Dataset, Program
+
+
+def write_jsonl(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"question": f"q{i}", "answer": f"a{i}"}) + "\n")
+    return path
+
+
+def test_dataset_loads_lazily_and_memoizes(tmp_path):
+    """1) Files are read on first use, once per unchanged file, and streamed when not cached."""
+    path = write_jsonl(tmp_path / "data.jsonl", 10)
+    dataset = Dataset.from_jsonl(path, inputs=["question"])
+    path.unlink()
+    assert dataset._examples is None
+
+    write_jsonl(path, 10)
+    dataset = Dataset.from_jsonl(path, inputs=["question"])
+    assert len(dataset) == 10 and dataset[3].answer == "a3"
+    assert list(dataset[0].inputs().keys()) == ["question"]
+
+    # A new instance over the same file reuses the memo; a changed file is read again
+    assert Dataset.from_jsonl(path, inputs=["question"])._memoized() is not None
+    write_jsonl(path, 12)
+    assert len(Dataset.from_jsonl(path, inputs=["question"])) == 12
+
+    reads = []
+
+    def source():
+        for i in range(1000):
+            reads.append(i)
+            yield {"question": f"q{i}"}
+
+    assert [example.question for example in Dataset(source).take(3)] == ["q0", "q1", "q2"]
+    assert len(reads) == 3
+
+    (tmp_path / "data.csv").write_text("question,answer\nq0,a0\nq1,a1\n")
+    assert [example.answer for example in Dataset.from_file(tmp_path / "data.csv")] == ["a0", "a1"]
+
+
+def test_dataset_split_sample_and_shard_are_deterministic():
+    """2) Splits partition the data, seeds reproduce selections and shards cover every example once."""
+    dataset = Dataset([{"question": f"q{i}"} for i in range(103)], inputs=["question"])
+    train, val = dataset.split(0.8, 0.2, seed=7)
+    train_questions = [example.question for example in train]
+    val_questions = [example.question for example in val]
+    assert (len(train_questions), len(val_questions)) == (82, 21)
+    assert sorted(train_questions + val_questions) == sorted(example.question for example in dataset)
+    assert [example.question for example in dataset.split(0.8, 0.2, seed=7)[1]] == val_questions
+    assert [example.question for example in dataset.split(0.8, 0.2, seed=8)[1]] != val_questions
+
+    assert [e.question for e in dataset.sample(5, seed=1)] == [e.question for e in dataset.sample(5, seed=1)]
+    shards = [[example.question for example in dataset.shard(i, 4)] for i in range(4)]
+    assert sorted(sum(shards, [])) == sorted(example.question for example in dataset)
+
+
+class SplitQA(Program):
+    reads = 0
+
+    def forward(self, question):
+        return dspy.Prediction(answer="")
+
+    @property
+    def dataset(self):
+        SplitQA.reads += 1
+        return [dspy.Example(question=f"q{i}").with_inputs("question") for i in range(50)]
+
+
+def test_program_splits_dataset_with_its_seed():
+    """3) trainset and valset default to a seeded split of dataset, validated in one pass each."""
+    program = SplitQA(lm=dspy.LM("openai/gpt-4o-mini"), seed=3)
+    assert (len(program.trainset), len(program.valset)) == (40, 10)
+    assert [e.question for e in program.valset] == [e.question for e in SplitQA(lm=program.lm, seed=3).valset]
+
+    SplitQA.reads = 0
+    program.ensure_trainset()
+    program.ensure_valset()
+    assert SplitQA.reads == 2
+
+
+class FileQA(Program):
+    path = None
+
+    def forward(self, question):
+        return dspy.Prediction(answer=f"a{question[1:]}" if int(question[1:]) % 4 else "wrong")
+
+    @property
+    def dataset(self):
+        return Dataset.from_jsonl(self.path, inputs=["question"])
+
+    @staticmethod
+    def metric(example, prediction, trace=None, pred_name=None, pred_trace=None):
+        return float(example.answer == prediction.answer)
+
+
+def test_file_backed_splits_are_reused_and_streamed_to_workers(tmp_path):
+    """4) A file's split is computed once without loading it, and process workers read their shards from the file."""
+    FileQA.path = write_jsonl(tmp_path / "data.jsonl", 4000)
+    program = FileQA(lm=dspy.LM("openai/gpt-4o-mini"))
+    valset = program.valset
+    assert program.valset is valset and program.trainset is program.trainset
+    assert Dataset.from_jsonl(FileQA.path, inputs=["question"])._memoized() is None
+
+    shard = valset.shard(0, 2)
+    examples = shard.to_list()
+    assert len(cloudpickle.dumps(shard)) < len(cloudpickle.dumps(examples)) / 2
+    assert [e.question for e in cloudpickle.loads(cloudpickle.dumps(shard))] == [e.question for e in examples]
+
+    threaded = program.evaluate(num_threads=2).score
+    assert program.evaluate(num_threads=2, executor="process", max_workers=2).score == threaded
@@ -0,0 +1,314 @@
+import base64
+import hashlib
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from agentics import Embedding
+
+
+class FakeEmbeddings:
+    """Deterministic stand-in for `client.embeddings` that records every request."""
+
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim).tolist()
+
+    @staticmethod
+    def encode(vector: list[float], encoding_format: str):
+        if encoding_format == "base64":
+            return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+        return vector
+
+    def create(self, input, model, encoding_format="float", dimensions=None, **kwargs):
+        with self._lock:
+            self.requests.append(list(input))
+        data = [
+            SimpleNamespace(index=i, embedding=self.encode(self.vector(text)[:dimensions], encoding_format))
+            for i, text in enumerate(input)
+        ]
+        # The API does not guarantee order, so hand it back reversed
+        return SimpleNamespace(data=data[::-1])
+
+
+def fake_embedding(**kwargs) -> Embedding:
+    client = SimpleNamespace(embeddings=FakeEmbeddings())
+    return Embedding(client=client, **kwargs)
+
+
+def test_embed_single_string():
+    """1) A single string returns a single vector."""
+    embedding = fake_embedding()
+    vector = embedding("hello")
+    assert vector == embedding.client.embeddings.vector("hello")
+
+
+def test_embed_batches_preserve_order():
+    """2) Inputs larger than batch_size are split and reassembled in input order."""
+    embedding = fake_embedding(batch_size=3, max_concurrency=2)
+    texts = [f"text {i}" for i in range(10)]
+    vectors = embedding(texts)
+    fake = embedding.client.embeddings
+    assert vectors == [fake.vector(text) for text in texts]
+    assert sorted(len(request) for request in fake.requests) == [1, 3, 3, 3]
+
+
+def test_embed_deduplicates_inputs():
+    """3) Identical strings are only sent once."""
+    embedding = fake_embedding()
+    vectors = embedding(["a", "b", "a", "a"])
+    assert embedding.client.embeddings.requests == [["a", "b"]]
+    assert vectors[0] == vectors[2] == vectors[3]
+
+
+def test_embed_token_bounded_batches():
+    """4) Batches respect the estimated token budget."""
+    embedding = fake_embedding(max_batch_tokens=10)
+    embedding(["x" * 20, "y" * 20, "z"])
+    assert embedding.client.embeddings.requests == [["x" * 20], ["y" * 20, "z"]]
+
+
+def test_embed_retries_per_batch(monkeypatch):
+    """5) Transient errors are retried for the failing batch only."""
+    import openai
+
+    monkeypatch.setattr("agentics.embedding.time.sleep", lambda _: None)
+    embedding = fake_embedding(batch_size=1, max_concurrency=1)
+    fake = embedding.client.embeddings
+    create = fake.create
+    failures = {"b": 2}
+
+    def flaky_create(input, model, **kwargs):
+        if failures.get(input[0], 0):
+            failures[input[0]] -= 1
+            raise openai.APIConnectionError(request=None)
+        return create(input, model, **kwargs)
+
+    fake.create = flaky_create
+    assert embedding(["a", "b"]) == [fake.vector("a"), fake.vector("b")]
+    assert fake.requests == [["a"], ["b"]]
+
+    failures["c"] = 10
+    with pytest.raises(openai.APIConnectionError):
+        embedding(["c"])
+
+
+def test_embed_cache_only_sends_misses(tmp_path):
+    """6) Cached texts are served locally and only misses reach the API."""
+    from agentics import EmbeddingCache
+
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    embedding = fake_embedding(cache=cache)
+    fake = embedding.client.embeddings
+    first = embedding(["a", "b"])
+    second = embedding(["c", "a", "b", "c"])
+    assert fake.requests == [["a", "b"], ["c"]]
+    assert np.allclose(second[1:3], first)
+    assert cache.stats["hits"] == 2
+    assert cache.stats["misses"] == 3
+
+    # The cache survives a restart
+    cache.close()
+    embedding = fake_embedding(cache=EmbeddingCache(tmp_path / "cache.sqlite"))
+    embedding(["a", "b", "c"])
+    assert embedding.client.embeddings.requests == []
+
+
+def test_embedding_cache_eviction():
+    """7) The least recently used vectors are evicted once over capacity."""
+    from agentics import EmbeddingCache
+
+    cache = EmbeddingCache(":memory:", max_entries=2)
+    cache.put_many("m", None, ["a"], [[1.0, 2.0]])
+    cache.put_many("m", None, ["b"], [[3.0, 4.0]])
+    cache.get_many("m", None, ["a"])
+    cache.put_many("m", None, ["c"], [[5.0, 6.0]])
+    assert [v is not None for v in cache.get_many("m", None, ["a", "b", "c"])] == [True, False, True]
+    assert cache.get_many("other-model", None, ["a"]) == [None]
+
+    cache = EmbeddingCache(":memory:", max_bytes=16)
+    cache.put_many("m", None, ["a", "b", "c"], [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    assert cache.stats["bytes"] <= 16
+
+
+def test_embed_as_numpy():
+    """8) as_numpy decodes base64 responses into float32 arrays used across the API."""
+    embedding = fake_embedding(as_numpy=True)
+    fake = embedding.client.embeddings
+    texts = ["a", "b", "c"]
+
+    vectors = embedding(texts)
+    assert isinstance(vectors, np.ndarray)
+    assert vectors.dtype == np.float32 and vectors.shape == (3, fake.dim)
+    assert vectors.flags["C_CONTIGUOUS"]
+    assert np.allclose(vectors, [fake.vector(text) for text in texts], atol=1e-6)
+
+    vector = embedding("a")
+    assert vector.shape == (fake.dim,)
+    ranked = embedding.rank(vector, vectors, return_vectors=True)
+    assert isinstance(ranked[0][0], np.ndarray)
+    assert ranked[0][1] == pytest.approx(1.0)
+    assert embedding.cosine_similarity(vector, vectors[0]) == pytest.approx(1.0)
+
+
+def test_embed_dimensions():
+    """9) dimensions is sent to the API and keeps separate cache entries."""
+    from agentics import EmbeddingCache
+
+    embedding = fake_embedding(dimensions=4, as_numpy=True, cache=EmbeddingCache(":memory:"))
+    assert embedding(["a", "b"]).shape == (2, 4)
+    assert embedding("a", dimensions=6).shape == (6,)
+    assert embedding("a").shape == (4,)
+    assert embedding.client.embeddings.requests == [["a", "b"], ["a"]]
+
+
+@pytest.mark.parametrize("memory_budget", [2**10, 2**30])
+def test_rank_many_matches_rank(memory_budget):
+    """10) rank_many returns the same top-k as rank for every query, whatever the tiling."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16))
+    queries = rng.standard_normal((25, 16))
+
+    ids, scores = Embedding.rank_many(queries, vectors, k=7, memory_budget=memory_budget)
+    assert ids.shape == scores.shape == (25, 7)
+    for query, row_ids, row_scores in zip(queries, ids, scores):
+        expected = Embedding.rank(query, vectors)[:7]
+        assert row_ids.tolist() == [idx for idx, _ in expected]
+        assert row_scores == pytest.approx([score for _, score in expected], abs=1e-5)
+
+    ids, scores = Embedding.rank_many(queries, vectors[:3], k=7)
+    assert ids.shape == (25, 3)
+
+
+def test_pipeline_streams_into_sink_in_order():
+    """11) The pipeline embeds lazily, writes batches in order and keeps metadata."""
+    from agentics import EmbeddingIndex, EmbeddingPipeline
+
+    consumed = []
+
+    def source():
+        for i in range(25):
+            consumed.append(i)
+            yield {"id": f"doc-{i}", "text": f"text {i}", "lang": "en"} if i % 2 else f"text {i}"
+
+    index = EmbeddingIndex()
+    pipeline = EmbeddingPipeline(fake_embedding(), index, batch_size=4, max_in_flight=2)
+    assert pipeline.run(source()) == 25
+    assert index.ids == [f"doc-{i}" if i % 2 else i for i in range(25)]
+    assert index.metadata[1] == {"lang": "en"}
+    assert len(consumed) == 25
+
+
+def test_pipeline_checkpoint_and_resume(tmp_path):
+    """12) An interrupted run resumes from the last checkpoint without re-embedding."""
+    import asyncio
+    from agentics import EmbeddingPipeline
+
+    written = []
+
+    def failing_sink(vectors, ids, metadata):
+        if ids[0] >= 8:
+            raise RuntimeError("disk full")
+        written.extend(ids)
+
+    texts = [f"text {i}" for i in range(12)]
+    checkpoint = tmp_path / "checkpoint.json"
+    pipeline = EmbeddingPipeline(fake_embedding(), failing_sink, batch_size=4, checkpoint_path=checkpoint)
+    with pytest.raises(RuntimeError):
+        pipeline.run(texts)
+    assert written == list(range(8))
+    assert pipeline.offset == 8
+
+    embedding = fake_embedding()
+
+    async def async_source():
+        for text in texts:
+            yield text
+
+    resumed = EmbeddingPipeline(
+        embedding,
+        lambda vectors, ids, metadata: written.extend(ids),
+        batch_size=4,
+        checkpoint_path=checkpoint,
+    )
+    assert asyncio.run(resumed.arun(async_source())) == 12
+    assert written == list(range(12))
+    assert embedding.client.embeddings.requests == [texts[8:]]
+
+    # A failed async run cancels and awaits the batches still in flight
+    async def fail_async():
+        pipeline = EmbeddingPipeline(fake_embedding(), failing_sink, batch_size=2, max_in_flight=4)
+        with pytest.raises(RuntimeError):
+            await pipeline.arun([f"text {i}" for i in range(40)], resume=False)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(fail_async()) == set()
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def test_chunker_respects_budget_and_boundaries():
+    """13) Chunks stay within budget, overlap, and map back to the source by offsets."""
+    from agentics import Chunker
+
+    text = (
+        "One two three. Four five six seven. Eight nine.\n\n"
+        "Ten eleven twelve thirteen. Fourteen fifteen.\n\n"
+        + "long " * 25 + "sentence."
+    )
+    chunker = Chunker(max_tokens=8, overlap=3, count_tokens=word_count)
+    chunks = chunker(text)
+
+    assert all(chunk.tokens <= 8 for chunk in chunks)
+    assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+    assert chunks[0].text == "One two three. Four five six seven."
+    # The trailing sentence is repeated as overlap
+    assert chunks[1].text.startswith("Eight nine.")
+    # The over-long sentence is split at word boundaries
+    assert chunks[-1].text.endswith("sentence.")
+    assert all(word_count(chunk.text) <= 8 for chunk in chunks)
+
+    # Separators count towards the budget, and a chunk's count is that of its joined text
+    def words_and_newlines(text):
+        return len(text.split()) + text.count("\n")
+
+    text = "\n\n".join(f"w{i} x{i}" for i in range(12))
+    chunks = Chunker(max_tokens=8, overlap=3, count_tokens=words_and_newlines)(text)
+    assert all(chunk.tokens == words_and_newlines(chunk.text) <= 8 for chunk in chunks)
+    assert {word for chunk in chunks for word in chunk.text.split()} == set(text.split())
+
+    # Characters can cost several tokens each; windows shrink until they fit
+    chunker = Chunker(max_tokens=20, overlap=5)
+    chunks = chunker("😀" * 200)
+    assert all(chunk.tokens == chunker.count_tokens(chunk.text) <= 20 for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks) == "😀" * 200
+
+
+def test_chunker_documents_feed_pipeline():
+    """14) chunk_documents yields pipeline records that keep document fields and offsets."""
+    from agentics import Chunker, EmbeddingIndex, EmbeddingPipeline
+
+    chunker = Chunker(max_tokens=4, overlap=1, count_tokens=word_count)
+    documents = [{"id": "a", "text": "One two. Three four five.", "lang": "en"}, "Six seven."]
+    records = list(chunker.chunk_documents(documents))
+    assert [record["id"] for record in records] == ["a:0", "a:1", "1:0"]
+    assert records[1] == {
+        "lang": "en", "id": "a:1", "text": "Three four five.",
+        "document_id": "a", "start": 9, "end": 25, "tokens": 3,
+    }
+
+    index = EmbeddingIndex()
+    EmbeddingPipeline(fake_embedding(), index).run(chunker.chunk_documents(documents))
+    assert index.ids == ["a:0", "a:1", "1:0"]
+    assert index.metadata[0]["document_id"] == "a"
+
+    report = chunker.benchmark(["One two. Three four five."] * 10)
+    assert report["chunks"] == 20 and report["chars_per_second"] > 0
@@ -0,0 +1,350 @@
+import numpy as np
+import pytest
+from agentics import EmbeddingIndex
+
+
+def exact_ranking(query, vectors):
+    vectors = np.asarray(vectors, dtype=np.float64)
+    scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    return np.argsort(-scores), scores
+
+
+def test_index_search_matches_exact_ranking():
+    """1) Top-k search returns the same order and scores as a full sort."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 16))
+    query = rng.standard_normal(16)
+
+    index = EmbeddingIndex()
+    index.add(vectors)
+    results = index.search(query, k=5)
+
+    order, scores = exact_ranking(query, vectors)
+    assert [id for id, _ in results] == order[:5].tolist()
+    assert [score for _, score in results] == pytest.approx(scores[order[:5]], abs=1e-5)
+
+
+def test_index_add_remove_and_ids():
+    """2) Custom ids survive removals, and re-adding an id overwrites it."""
+    index = EmbeddingIndex(dim=2)
+    index.add([[1, 0], [0, 1], [1, 1]], ids=["x", "y", "z"])
+    assert index.remove(["x", "missing"]) == 1
+    assert len(index) == 2 and "x" not in index
+
+    assert index.search([1, 0], k=1)[0][0] == "z"
+    index.add([[1, 0]], ids=["y"])
+    assert len(index) == 2
+    assert index.search([1, 0], k=1) == [("y", pytest.approx(1.0))]
+
+    # A repeated id within one call keeps its last vector and leaves no orphan rows
+    assert index.add([[0, 1], [1, 0]], ids=["w", "w"]) == ["w"]
+    assert len(index) == 3 and index.ids.count("w") == 1
+    assert index.remove(["w"]) == 1 and "w" not in index.ids
+
+    with pytest.raises(ValueError):
+        index.add([[1, 0, 0]])
+
+
+def test_index_coarse_to_fine_search():
+    """3) Coarse-to-fine search over Matryoshka prefixes returns exact full-dimension scores."""
+    rng = np.random.default_rng(0)
+    # Leading dimensions carry most of the signal, as in Matryoshka embeddings
+    vectors = rng.standard_normal((500, 64)) * np.linspace(4, 0.1, 64)
+    index = EmbeddingIndex()
+    index.add(vectors)
+
+    found = 0
+    for query in vectors[:20] + 0.1 * rng.standard_normal((20, 64)):
+        exact = dict(index.search(query, k=5))
+        coarse = index.search(query, k=5, coarse_dims=16, candidates=50)
+        assert coarse[0][0] == next(iter(exact))
+        found += len(exact.keys() & {id for id, _ in coarse})
+        # Shortlisted vectors are re-scored at full dimension
+        order, scores = exact_ranking(query, vectors)
+        assert [s for _, s in coarse] == pytest.approx([scores[id] for id, _ in coarse], abs=1e-5)
+    assert found / 100 >= 0.9
+
+    index.add(vectors[:1], ids=["dup"])
+    assert {id for id, _ in index.search(vectors[0], k=2, coarse_dims=16)} == {0, "dup"}
+    assert index.search(vectors[0], k=1, coarse_dims=16, filter=lambda m: False) == []
+
+
+def test_index_metadata_filters():
+    """4) Dict and callable filters restrict the candidate set."""
+    index = EmbeddingIndex()
+    index.add(
+        [[1, 0], [0.9, 0.1], [0, 1]],
+        ids=["a", "b", "c"],
+        metadata=[{"lang": "en"}, {"lang": "es"}, {"lang": "fr"}],
+    )
+    assert [r[0] for r in index.search([1, 0], k=3, filter={"lang": "es"})] == ["b"]
+    assert [r[0] for r in index.search([1, 0], k=3, filter={"lang": ["es", "fr"]})] == ["b", "c"]
+    results = index.search([1, 0], k=1, filter=lambda m: m["lang"] != "en", return_metadata=True)
+    assert results == [("b", pytest.approx(results[0][1]), {"lang": "es"})]
+    assert index.search([1, 0], filter={"lang": "de"}) == []
+
+
+def clustered_corpus(n=2000, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, dim))
+    queries = centers[rng.integers(0, clusters, 20)] + 0.3 * rng.standard_normal((20, dim))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def test_ivf_recall_improves_with_nprobe():
+    """5) IVF recall grows with nprobe and is exact when every cluster is probed."""
+    from agentics import IVFIndex
+    from agentics.ann import benchmark
+
+    vectors, queries = clustered_corpus()
+    index = IVFIndex(nlist=16)
+    index.add(vectors)
+    report = benchmark(index, queries, vectors, k=10, params=[{"nprobe": 1}, {"nprobe": 16}])
+    assert report[0]["recall"] <= report[1]["recall"]
+    assert report[1]["recall"] == 1.0
+    assert report[0]["latency_ms"] > 0
+
+
+def test_ivf_incremental_add_and_save_load(tmp_path):
+    """6) Incremental inserts are searchable, retrain a self-trained index as it grows, and survive a save/load round trip."""
+    from agentics import IVFIndex
+
+    vectors, queries = clustered_corpus()
+    index = IVFIndex(nlist=8, nprobe=8)
+    index.add(vectors[:1000])
+    index.add(vectors[1000:], ids=[f"doc-{i}" for i in range(1000, 2000)])
+    assert len(index) == 2000
+    assert index.search(vectors[1500], k=1)[0][0] == "doc-1500"
+
+    loaded = IVFIndex.load(index.save(tmp_path / "index.npz"))
+    assert loaded.search(queries[0], k=5) == index.search(queries[0], k=5)
+    loaded.add(vectors[:1], ids=["new"])
+    assert {id for id, _ in loaded.search(vectors[0], k=2)} == {0, "new"}
+
+    # A small first batch is retrained away once the corpus outgrows it
+    grown = IVFIndex(nlist=16, nprobe=2)
+    grown.add(vectors[:12])
+    assert grown.nlist == 12
+    grown.add(vectors[12:], ids=[f"doc-{i}" for i in range(12, 2000)])
+    assert grown.nlist == 16 and grown._trained_on == 2000
+    assert grown.search(vectors[5], k=1)[0][0] == 5 and grown.search(vectors[1500], k=1)[0][0] == "doc-1500"
+
+    # An explicit train on a representative sample is kept
+    sampled = IVFIndex(nlist=16)
+    sampled.train(vectors[::10])
+    centroids = sampled.centroids
+    sampled.add(vectors)
+    assert sampled.centroids is centroids
+    with pytest.raises(ValueError):
+        sampled.train(vectors)
+    sampled.add(vectors[:1], ids=[("doc", 1)])
+    with pytest.raises(ValueError):
+        sampled.save(tmp_path / "tuple.npz")
+
+
+def test_vector_store_append_delete_and_readers(tmp_path):
+    """7) Appends and tombstones are visible to read-only readers after refresh."""
+    from agentics import VectorStore
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 8))
+    store = VectorStore(tmp_path / "store")
+    store.append(vectors[:40], metadata=[{"even": i % 2 == 0} for i in range(40)])
+
+    reader = VectorStore(tmp_path / "store", readonly=True)
+    assert len(reader) == 40
+    assert isinstance(reader.vectors, np.memmap)
+    assert reader.search(vectors[3], k=1)[0][0] == 3
+    with pytest.raises(PermissionError):
+        reader.append(vectors[:1])
+
+    store.append(vectors[40:])
+    store.delete([3, 999])
+    reader.refresh()
+    assert len(reader) == 49
+    assert 3 not in [id for id, _ in reader.search(vectors[3], k=49)]
+    assert reader.search(vectors[45], k=1)[0][0] == 45
+    assert all(m["even"] for _, _, m in reader.search(vectors[0], k=5, filter={"even": True}, return_metadata=True))
+
+    # Appending an existing id replaces it
+    store.append(vectors[:1], ids=[10])
+    assert len(store) == 49
+    assert store.append(vectors[:2], ids=["d", "d"]) == ["d"]
+    assert len(store) == 50
+    assert store.delete(["d"]) == 1 and len(store) == 49
+    assert store.search(vectors[0], k=2)[0][0] in (0, 10)
+
+    # Ids must come back unchanged from JSON, so the store stays readable after a reopen
+    with pytest.raises(ValueError):
+        store.append(vectors[:1], ids=[("doc", 1)])
+    assert len(VectorStore(tmp_path / "store", readonly=True)) == 49
+
+
+def test_vector_store_compaction(tmp_path):
+    """8) Compaction drops tombstoned rows without changing search results."""
+    from agentics import VectorStore
+
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((100, 8))
+    store = VectorStore(tmp_path / "store")
+    store.append(vectors, ids=[f"doc-{i}" for i in range(100)])
+    store.delete([f"doc-{i}" for i in range(0, 100, 2)])
+    before = store.search(vectors[1], k=10)
+
+    store.compact(background=True).join()
+    assert store.generation == 1
+    assert store.vectors.shape == (50, 8)
+    assert store.search(vectors[1], k=10) == pytest.approx(before)
+    assert not (tmp_path / "store" / "vectors-0.f32").exists()
+
+    reopened = VectorStore(tmp_path / "store")
+    assert len(reopened) == 50
+    reopened.append(vectors[:1], ids=["new"])
+    assert reopened.search(vectors[0], k=1)[0][0] == "new"
+
+
+@pytest.mark.parametrize("mode, compression, rerank", [("int8", 4, 4), ("binary", 32, 40)])
+def test_quantized_index_recall_and_memory(mode, compression, rerank):
+    """9) Quantized search re-ranked with full precision matches exact top-k."""
+    from agentics import QuantizedIndex
+    from agentics.ann import benchmark
+
+    vectors, queries = clustered_corpus(dim=64)
+    index = QuantizedIndex(mode=mode, rerank=rerank)
+    index.add(vectors)
+
+    report = benchmark(index, queries, vectors, k=5, params=[{"rerank": 0}, {"rerank": rerank}])
+    assert report[1]["recall"] >= 0.95
+    assert report[1]["recall"] >= report[0]["recall"]
+    assert index.memory_usage()["compression"] == compression
+
+    # Re-ranked scores are exact cosine similarities
+    order, scores = exact_ranking(queries[0], vectors)
+    top = index.search(queries[0], k=1)[0]
+    assert top[1] == pytest.approx(scores[top[0]], abs=1e-5)
+
+
+@pytest.mark.parametrize("keep_full_precision", [True, False])
+def test_quantized_index_widens_int8_scale(keep_full_precision):
+    """10) Later adds with larger values re-quantize instead of clipping."""
+    from agentics import QuantizedIndex
+
+    index = QuantizedIndex(rerank=0, keep_full_precision=keep_full_precision)
+    index.add([[1.0, 0.01, 0.0]])
+    index.add([[0.01, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    for row, query in enumerate(np.eye(3)):
+        assert index.search(query, k=1)[0] == (row, pytest.approx(1.0, abs=0.02))
+
+
+def test_quantized_index_from_store(tmp_path):
+    """11) An index built from a VectorStore re-ranks from the memory map and skips tombstones."""
+    from agentics import QuantizedIndex, VectorStore
+
+    vectors, queries = clustered_corpus(n=500, dim=32)
+    store = VectorStore(tmp_path / "store")
+    store.append(vectors)
+    store.delete([7])
+
+    index = QuantizedIndex.from_store(store, mode="binary", rerank=20)
+    assert len(index) == 499
+    assert index.memory_usage()["full_precision_bytes"] == 0
+    assert index.search(vectors[8], k=1)[0][0] == 8
+    with pytest.raises(ValueError):
+        index.add(vectors[:1])
+    assert 7 not in [id for id, _ in index.search(vectors[7], k=10)]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_sharded_index_matches_single_scan(executor):
+    """12) Sharded search is bit-for-bit identical to a single-shard scan."""
+    from agentics import Embedding, ShardedIndex
+
+    vectors, queries = clustered_corpus(n=1000, dim=16)
+    with ShardedIndex(vectors, n_shards=1) as index:
+        single_ids, single_scores = index.search_many(queries, k=10)
+
+    with ShardedIndex(vectors, n_shards=4, executor=executor) as index:
+        assert index.shards[0] == (0, 250) and index.shards[-1] == (750, 1000)
+        ids, scores = index.search_many(queries, k=10)
+        assert np.array_equal(ids, single_ids)
+        assert np.array_equal(scores, single_scores)
+        results = index.search(queries[0], k=3)
+        assert [id for id, _ in results] == single_ids[0, :3].tolist()
+        assert [score for _, score in results] == pytest.approx(single_scores[0, :3].tolist())
+
+    expected_ids, expected_scores = Embedding.rank_many(queries, vectors, k=10)
+    assert np.array_equal(ids, expected_ids)
+    assert np.allclose(scores, expected_scores, atol=1e-6)
+
+
+def test_sharded_index_releases_shared_memory_without_close():
+    """13) A process-backed index unlinks its shared memory segment when garbage-collected."""
+    import gc
+    from multiprocessing import shared_memory
+    from agentics import ShardedIndex
+
+    vectors, queries = clustered_corpus(n=100, dim=8)
+    index = ShardedIndex(vectors, n_shards=2, executor="process")
+    index.search(queries[0], k=1)
+    name = index._segment.name
+    del index
+    gc.collect()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_bm25_and_hybrid_retrieval():
+    """14) BM25 ranks keyword matches, and hybrid search fuses both rankings with RRF, de-duplicating ids."""
+    from agentics import BM25Index, HybridRetriever
+    from agentics.lexical import reciprocal_rank_fusion
+
+    texts = [
+        "the cat sat on the mat",
+        "dogs and cats are pets",
+        "quantum error correction codes",
+        "the cat chased the cat toy",
+    ]
+    bm25 = BM25Index()
+    bm25.add(texts, ids=["a", "b", "c", "d"])
+    assert [id for id, _ in bm25.search("cat")] == ["d", "a"]
+    assert bm25.search("unknown words") == []
+    bm25.remove(["d"])
+    assert [id for id, _ in bm25.search("cat")] == ["a"]
+    bm25.add(["a cat again"], ids=["a"])
+    assert [id for id, _ in bm25.search("again cat")] == ["a"] and len(bm25) == 3
+
+    # An id repeated within one call keeps its last text
+    repeated = BM25Index()
+    repeated.add(["apple pie", "apple tart"], ids=["x", "x"])
+    results = repeated.search("apple")
+    assert [id for id, _ in results] == ["x"] and results[0][1] > 0
+    assert repeated.search("pie") == [] and len(repeated.ids) == 1
+
+    fused = reciprocal_rank_fusion([["x", "y"], ["y", "z"]], k=60)
+    assert [id for id, _ in fused] == ["y", "x", "z"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(4, 8))
+    for mode in ("prefilter", "union"):
+        retriever = HybridRetriever(mode=mode, candidates=10)
+        retriever.add(texts, vectors=vectors, ids=["a", "b", "c", "d"])
+        results = retriever.search("quantum codes", vector=vectors[2], k=2)
+        assert results[0][0] == "c"
+        if mode == "prefilter":
+            # Only lexical candidates are vector-scored
+            assert [id for id, _ in results] == ["c"]
+        # Without lexical hits, prefilter falls back to a full vector search
+        assert retriever.search("zzz", vector=vectors[1], k=1)[0][0] == "b"
+    assert retriever.index.score(vectors[0], ["a", "c"]).shape == (2,)
+
+    # Repeated ids reach both indexes as the same last document
+    retriever = HybridRetriever()
+    assert retriever.add(["apple pie", "quantum codes"], vectors=vectors[:2], ids=["x", "x"]) == ["x"]
+    assert len(retriever.index) == len(retriever.lexical) == 1
+    assert retriever.search("quantum", vector=vectors[1], k=1)[0][0] == "x"
+    assert np.allclose(retriever.index.score(vectors[1], ["x"]), 1.0)
+    with pytest.raises(ValueError):
+        retriever.add(["one", "two"], vectors=vectors[:1], ids=["y", "z"])
+    assert "y" not in retriever.lexical and len(retriever.index) == 1
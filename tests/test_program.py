@@ -0,0 +1,470 @@
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import dspy
+import numpy as np
+import pytest
+from dspy.utils import DummyLM
+from agentics import Program
+from agentics.dspy_core.metrics import MetricBatcher
+from agentics.dspy_core.registry import atomic_write_json
+
+
+class QA(Program):
+    def __init__(self, lm=None, **kwargs):
+        super().__init__(lm=lm, **kwargs)
+        self.predict = dspy.Predict("question -> answer")
+
+    def forward(self, question):
+        return self.predict(question=question)
+
+    @property
+    def valset(self):
+        return [dspy.Example(question=f"q{i}", answer=f"a{i}").with_inputs("question") for i in range(4)]
+
+    @staticmethod
+    def metric(example, prediction, trace=None, pred_name=None, pred_trace=None):
+        return float(example.answer == prediction.answer)
+
+
+class FakeOptimizer:
+    """Minimal stand-in for a Teleprompter, so saves skip a real optimization run."""
+
+    def get_params(self):
+        return {"rounds": 1}
+
+
+def dummy_lm(answers=("a0",)):
+    return DummyLM([{"answer": answer} for answer in answers] * 100)
+
+
+def optimized(tmp_path, score):
+    program = QA(lm=dummy_lm(), storage_root=tmp_path)
+    program.optimizer = FakeOptimizer()
+    program.score = score
+    return program
+
+
+def test_concurrent_saves_get_distinct_versions(tmp_path):
+    """1) Concurrent saves never share a version and the registry indexes latest and best."""
+    scores = [0.1, 0.7, 0.3, 0.9, 0.2, 0.5, 0.4, 0.6]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = list(executor.map(lambda score: optimized(tmp_path, score).save(), scores))
+    assert sorted(path.name for path in paths) == sorted(f"v{i}.json" for i in range(1, 9))
+
+    registry = QA(lm=dummy_lm(), storage_root=tmp_path).registry("FakeOptimizer")
+    manifest = registry.read()
+    assert manifest["latest"] == 8 and manifest["next_version"] == 9
+    version, score = registry.best()
+    assert score == 0.9
+    with open(registry.metadata_path(version)) as f:
+        assert json.load(f)["score"] == 0.9
+
+
+def test_load_latest_and_best(tmp_path):
+    """2) load() picks the latest version and load_best() the highest score, from the manifest."""
+    for score in (0.5, 0.8, 0.2):
+        optimized(tmp_path, score).save()
+
+    program = QA(lm=dummy_lm(), storage_root=tmp_path)
+    program.load(optimizer=FakeOptimizer())
+    assert program.score == 0.2
+    program.load(optimizer=FakeOptimizer(), version=1)
+    assert program.score == 0.5
+    program.load_best()
+    assert program.score == 0.8
+
+    with pytest.raises(FileNotFoundError):
+        QA(lm=dummy_lm(), storage_root=tmp_path / "empty").load_best()
+
+
+def test_registry_indexes_existing_versions(tmp_path):
+    """3) Folders saved before the manifest existed are indexed on first use."""
+    program = optimized(tmp_path, 0.4)
+    folder = program.model_folder / "FakeOptimizer"
+    folder.mkdir(parents=True)
+    for version, score in ((1, 0.4), (2, 0.9), (3, 0.1)):
+        program.save(folder / f"v{version}.json")
+        (folder / f"v{version}_metadata.json").write_text(json.dumps({"score": score}))
+
+    registry = program.registry("FakeOptimizer")
+    assert registry.best() == (2, 0.9)
+    assert registry.latest() == 3
+    assert program.save().name == "v4.json"
+
+
+class Echo(Program):
+    """Answers without calling the LM, recording which LM was active."""
+
+    def forward(self, question):
+        if question == "boom":
+            raise ValueError("boom")
+        return dspy.Prediction(answer=question.upper(), lm=dspy.settings.lm)
+
+
+class AsyncEcho(Echo):
+    async def aforward(self, question):
+        await asyncio.sleep(0.01 * (question == "q0"))
+        return dspy.Prediction(answer=f"async {question}", lm=dspy.settings.lm)
+
+
+def test_batch_preserves_order_and_captures_errors():
+    """4) batch keeps input order, runs under the program's LM and returns per-item errors."""
+    lm = dummy_lm()
+    program = Echo(lm=lm)
+    inputs = [{"question": f"q{i}"} for i in range(20)]
+    inputs[5] = dspy.Example(question="boom", answer="x").with_inputs("question")
+    seen = []
+
+    results = program.batch(inputs, concurrency=4, progress=lambda done, total: seen.append((done, total)))
+    assert [r.answer for i, r in enumerate(results) if i != 5] == [f"Q{i}" for i in range(20) if i != 5]
+    assert isinstance(results[5], ValueError)
+    assert all(r.lm is lm for i, r in enumerate(results) if i != 5)
+    assert seen[-1] == (20, 20) and len(seen) == 20
+
+    with pytest.raises(ValueError):
+        program.batch(inputs, return_exceptions=False)
+
+
+def test_abatch_uses_native_aforward():
+    """5) abatch awaits a native aforward, and falls back to threads without one."""
+    lm = dummy_lm()
+    assert AsyncEcho.has_native_aforward() and not Echo.has_native_aforward()
+
+    results = asyncio.run(AsyncEcho(lm=lm).abatch([{"question": f"q{i}"} for i in range(5)], concurrency=2))
+    assert [r.answer for r in results] == [f"async q{i}" for i in range(5)]
+    assert all(r.lm is lm for r in results)
+
+    results = asyncio.run(Echo(lm=lm).abatch([{"question": "a"}, {"question": "boom"}]))
+    assert results[0].answer == "A" and results[0].lm is lm
+    assert isinstance(results[1], ValueError)
+
+
+class CountingQA(QA):
+    """Answers from a lookup table and counts forward calls, so cache reuse is observable."""
+
+    calls = 0
+
+    def __init__(self, examples, **kwargs):
+        super().__init__(**kwargs)
+        self.examples = examples
+
+    def forward(self, question):
+        CountingQA.calls += 1
+        return dspy.Prediction(answer=f"a{question[1:]}" if question != "q3" else "wrong")
+
+    @property
+    def valset(self):
+        return self.examples
+
+
+def test_evaluate_reuses_cached_results(tmp_path):
+    """6) Only new examples or changed program state, forward or metric code are re-evaluated."""
+    examples = QA().valset
+    CountingQA.calls = 0
+    first = CountingQA(examples, lm=dummy_lm(), storage_root=tmp_path)
+    assert first.evaluate(num_threads=1, cache=True).score == 75.0
+    assert CountingQA.calls == 4 and first.evaluation_report["cached"] == 0
+
+    again = CountingQA(examples, lm=dummy_lm(), storage_root=tmp_path)
+    result = again.evaluate(num_threads=1, cache=True)
+    assert result.score == 75.0 and CountingQA.calls == 4
+    assert again.evaluation_report == {"total": 4, "cached": 4, "evaluated": 0}
+    assert [prediction.answer for _, prediction, _ in result.results] == ["a0", "a1", "a2", "wrong"]
+
+    extra = dspy.Example(question="q4", answer="a4").with_inputs("question")
+    grown = CountingQA(examples + [extra], lm=dummy_lm(), storage_root=tmp_path)
+    assert grown.evaluate(num_threads=1, cache=True).score == 80.0
+    assert CountingQA.calls == 5 and grown.evaluation_report["evaluated"] == 1
+
+    # New demos change the learned state, so every example runs again
+    grown.predict.demos = [examples[0]]
+    grown.evaluate(num_threads=1, cache=True)
+    assert CountingQA.calls == 10
+
+    # Caching is opt-in
+    grown.evaluate(num_threads=1)
+    assert CountingQA.calls == 15
+
+    # Same class and metric names, but edited forward or metric code
+    edited = CountingQA(examples, lm=dummy_lm(), storage_root=tmp_path)
+    EditedForward.__qualname__ = EditedMetric.__qualname__ = CountingQA.__qualname__
+    EditedMetric.metric.__qualname__ = QA.metric.__qualname__
+    edited.__class__ = EditedForward
+    assert edited.evaluate(num_threads=1, cache=True).score == 100.0
+    assert CountingQA.calls == 19
+    edited.__class__ = EditedMetric
+    assert edited.evaluate(num_threads=1, cache=True).score == 0.0
+    assert CountingQA.calls == 23
+
+
+class EditedForward(CountingQA):
+    def forward(self, question):
+        CountingQA.calls += 1
+        return dspy.Prediction(answer=f"a{question[1:]}")
+
+
+class EditedMetric(CountingQA):
+    @staticmethod
+    def metric(example, prediction, trace=None, pred_name=None, pred_trace=None):
+        return 0.0
+
+
+class GatedQA(CountingQA):
+    """Blocks in forward until the test opens the gate."""
+
+    gate = threading.Event()
+
+    def forward(self, question):
+        assert GatedQA.gate.wait(timeout=10)
+        return super().forward(question)
+
+
+def test_save_scores_in_background(tmp_path):
+    """7) save scores a snapshot in the background; load_best skips or waits for versions being scored."""
+    scored = optimized(tmp_path, 0.5)
+    scored.save()
+
+    program = GatedQA(QA().valset, lm=dummy_lm(), storage_root=tmp_path)
+    program.optimizer = FakeOptimizer()
+    path = program.save()
+    # Changes after save don't reach the version being scored
+    program.examples.append(dspy.Example(question="q9", answer="a0").with_inputs("question"))
+    registry = program.registry("FakeOptimizer")
+    assert registry.scoring() == [2]
+    with open(registry.metadata_path(2)) as f:
+        assert json.load(f)["score"] is None
+
+    loader = QA(lm=dummy_lm(), storage_root=tmp_path)
+    loader.load_best()
+    assert loader.score == 0.5
+
+    GatedQA.gate.set()
+    assert program.scoring.result(timeout=10) == 75.0
+    assert program.score == 75.0 and registry.scoring() == []
+    with open(registry.metadata_path(2)) as f:
+        assert json.load(f)["score"] == 75.0
+    loader.load_best(wait=True, timeout=5)
+    assert loader.score == 75.0 and registry.best() == (2, 75.0)
+    assert path.name == "v2.json"
+
+    # A version left scoring by a process that died is failed, so waiting doesn't hang
+    registry.record(1, {"score": 0.5}, status="scoring")
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    manifest = registry.read()
+    manifest["versions"]["1"]["owner"]["pid"] = exited.pid
+    atomic_write_json(registry.manifest_path, manifest)
+    assert registry.wait(timeout=5)
+    assert registry.read()["versions"]["1"]["status"] == "failed"
+
+
+def test_optimizer_checkpoint_and_resume(tmp_path):
+    """8) Runs record every evaluation, persist a run-local LM cache, and resume or reuse on demand."""
+    program = CountingQA(QA().valset, lm=dummy_lm(), storage_root=tmp_path)
+    checkpoint = program.checkpoint("FakeOptimizer", rounds=1)
+    assert checkpoint.folder == program.checkpoint("FakeOptimizer", rounds=1).folder
+    assert checkpoint.folder != program.checkpoint("FakeOptimizer", rounds=2).folder
+    request = {"model": "dummy", "messages": ["hi"]}
+
+    def interrupted():
+        dspy.cache.put(request, "paid for")
+        program._evaluate(program.valset, num_threads=1)
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        program._optimize(FakeOptimizer(), interrupted, checkpoint, False)
+    assert dspy.cache.get(request) is None
+    trials = checkpoint.trials()
+    assert len(trials) == 1 and trials[0]["score"] == 75.0 and trials[0]["state"]["predict"]["demos"] == []
+    assert checkpoint.state()["status"] == "running" and not checkpoint.completed
+
+    def resumed():
+        assert dspy.cache.get(request) == "paid for"  # replayed from the run's disk cache
+        optimized = program.deepcopy()
+        optimized.predict.demos = [QA().valset[0]]
+        return optimized
+
+    result = program._optimize(FakeOptimizer(), resumed, checkpoint, True)
+    assert checkpoint.completed and checkpoint.state()["best_score"] == 75.0
+    assert len(result.predict.demos) == 1 and result.optimizer is not None
+
+    reused = program._optimize(FakeOptimizer(), lambda: pytest.fail("should not recompile"), checkpoint, True)
+    assert len(reused.predict.demos) == 1 and reused.score is None
+
+    # Overlapping runs each see only their own LM cache, and leave the global one alone
+    other = program.checkpoint("FakeOptimizer", rounds=2)
+    entered, exited = threading.Event(), threading.Event()
+    seen = []
+
+    def run_other():
+        with other.activate():
+            dspy.cache.put(request, "other run")
+            entered.set()
+            exited.wait(timeout=10)
+            seen.append(dspy.cache.get(request))
+
+    worker = threading.Thread(target=run_other)
+    with checkpoint.activate():
+        worker.start()
+        assert entered.wait(timeout=10)
+        assert dspy.cache.get(request) == "paid for"
+    exited.set()
+    worker.join()
+    assert seen == ["other run"] and dspy.cache.get(request) is None
+
+
+def test_optimization_telemetry_is_saved(tmp_path):
+    """9) LM calls from a real optimizer's copies are attributed to task and teacher LMs, and telemetry is saved."""
+    program = TrainableQA(lm=dummy_lm(), storage_root=tmp_path)
+    optimized = program.BootstrapFewShot(max_bootstrapped_demos=2)
+    telemetry = optimized.telemetry
+    assert list(telemetry["lm"]) == ["task"] and telemetry["lm"]["task"]["calls"] == 4
+    assert telemetry["lm"]["task"]["latency"]["p50"] is not None and telemetry["wall_time"] > 0
+
+    teacher = dummy_lm(["a0"])
+    teacher.model = "dummy-teacher"
+    taught = program.BootstrapFewShot(max_bootstrapped_demos=2, teacher=teacher)
+    assert list(taught.telemetry["lm"]) == ["teacher"] and taught.telemetry["totals"]["calls"] == 4
+
+    optimized.score = 0.5
+    optimized.save()
+    with open(optimized.registry("BootstrapFewShot").telemetry_path(1)) as f:
+        assert json.load(f)["totals"]["calls"] == 4
+
+
+class TrainableQA(QA):
+    @property
+    def trainset(self):
+        return self.valset
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_sweep_saves_every_config_and_loads_the_best(tmp_path, executor):
+    """10) A sweep saves each configuration, reports failures and loads the top scorer."""
+    program = TrainableQA(lm=dummy_lm(), storage_root=tmp_path)
+    leaderboard = program.sweep(
+        [
+            {"optimizer": "BootstrapFewShot", "max_bootstrapped_demos": 1},
+            {"optimizer": "BootstrapFewShot", "max_bootstrapped_demos": 2},
+            {"optimizer": "BootstrapFewShot", "unknown_argument": 1},
+        ],
+        max_workers=3,
+        executor=executor,
+    )
+    assert len(leaderboard) == 3 and leaderboard[-1]["error"] and leaderboard[-1]["score"] is None
+    assert leaderboard[0]["score"] >= leaderboard[1]["score"]
+    assert sorted(Path(row["path"]).name for row in leaderboard[:2]) == ["v1.json", "v2.json"]
+    assert program.score == leaderboard[0]["score"]
+    assert program.registry("BootstrapFewShot").best()[1] == leaderboard[0]["score"]
+
+    with pytest.raises(ValueError):
+        program.sweep(["Unknown"])
+
+
+class DemoQA(QA):
+    """Answers correctly for a share of questions that grows with its number of demos."""
+
+    def forward(self, question):
+        correct = int(question[1:]) % 4 < len(self.predict.demos)
+        return dspy.Prediction(answer=f"a{question[1:]}" if correct else "wrong")
+
+    @property
+    def valset(self):
+        return [dspy.Example(question=f"q{i}", answer=f"a{i}").with_inputs("question") for i in range(80)]
+
+
+def test_race_finds_the_best_version_with_fewer_evaluations(tmp_path):
+    """11) Racing ignores stale saved scores and eliminates worse versions early."""
+    program = DemoQA(lm=dummy_lm(), storage_root=tmp_path)
+    for demos in (0, 1, 2, 4):
+        saved = program.deepcopy()
+        saved.predict.demos = program.valset[:demos]
+        saved.optimizer = FakeOptimizer()
+        # Stored scores favour the worst version
+        saved.score = 1 - demos / 4
+        saved.save()
+
+    leaderboard = program.race(num_threads=1, cache=True)
+    assert (leaderboard[0]["version"], leaderboard[0]["eliminated"]) == (4, None)
+    assert [row["eliminated"] for row in leaderboard[1:]] == [4, 3, 2]
+    assert sum(row["examples"] for row in leaderboard) < 4 * 80
+    assert len(program.predict.demos) == 4
+    # The winner stopped short of the whole valset, so its saved score is not restored
+    assert program.score is None
+
+    # A second race replays from the evaluation cache
+    assert program.race(num_threads=1, cache=True) == leaderboard
+
+
+class CheckedQA(QA):
+    """Fails on one question and scores answers with a CPU-bound metric."""
+
+    def forward(self, question):
+        if question == "q5":
+            raise RuntimeError("boom")
+        return dspy.Prediction(answer=f"a{question[1:]}" if int(question[1:]) % 3 else "wrong")
+
+    @property
+    def valset(self):
+        return [dspy.Example(question=f"q{i}", answer=f"a{i}").with_inputs("question") for i in range(20)]
+
+    @staticmethod
+    def metric(example, prediction, trace=None, pred_name=None, pred_trace=None):
+        return float(sum(range(10_000)) > 0 and example.answer == prediction.answer)
+
+
+def test_process_evaluation_matches_threads(tmp_path):
+    """12) Process workers aggregate scores, order and failures exactly like dspy.Evaluate."""
+    threaded = CheckedQA(lm=dummy_lm(), storage_root=tmp_path).evaluate(num_threads=2, cache=False)
+    program = CheckedQA(lm=dummy_lm(), storage_root=tmp_path)
+    result = program.evaluate(num_threads=2, executor="process", max_workers=3)
+    assert result.score == threaded.score == program.score
+    assert [(e.question, p.get("answer"), s) for e, p, s in result.results] == [
+        (e.question, p.get("answer"), s) for e, p, s in threaded.results
+    ]
+    assert result.results[5][1].keys() == [] and result.results[5][2] == 0.0
+
+
+class BatchQA(CheckedQA):
+    """Scores with a batched metric only, counting its calls."""
+
+    batches = []
+    metric = Program.metric
+    metric_batch_size = 8
+
+    @staticmethod
+    def batch_metric(examples, predictions):
+        BatchQA.batches.append(len(examples))
+        return np.array([example.answer == prediction.answer for example, prediction in zip(examples, predictions)], dtype=float)
+
+
+def test_batch_metric_scores_minibatches(tmp_path):
+    """13) batch_metric scores evaluation minibatches and groups concurrent optimizer calls."""
+    expected = CheckedQA(lm=dummy_lm(), storage_root=tmp_path).evaluate(num_threads=4, cache=False)
+    BatchQA.batches = []
+    program = BatchQA(lm=dummy_lm(), storage_root=tmp_path)
+    program.ensure_metric()
+    result = program.evaluate(num_threads=4)
+    assert result.score == expected.score and BatchQA.batches == [8, 8, 3]
+    assert [score for *_, score in result.results] == [score for *_, score in expected.results]
+    assert all(type(score) is float for *_, score in result.results)
+
+    metric = MetricBatcher(BatchQA.batch_metric, batch_size=4, max_wait=1.0)
+    examples = program.valset[:16]
+    barrier = threading.Barrier(16)
+
+    def score(example):
+        barrier.wait()
+        return metric(example, dspy.Prediction(answer=example.answer if example.question != "q3" else "x"))
+
+    BatchQA.batches = []
+    with ThreadPoolExecutor(16) as executor:
+        scores = list(executor.map(score, examples))
+    assert scores == [0.0 if example.question == "q3" else 1.0 for example in examples]
+    assert BatchQA.batches == [4, 4, 4, 4]
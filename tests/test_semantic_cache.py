@@ -0,0 +1,107 @@
+import re
+from types import SimpleNamespace
+
+import numpy as np
+from pydantic import BaseModel
+from agentics import LLM, Embedding, SemanticCache
+
+from .test_embedding import FakeEmbeddings
+
+
+class BagOfWordsEmbeddings(FakeEmbeddings):
+    """Embeds a text as the sum of its word vectors, so paraphrases land close together."""
+
+    def vector(self, text: str) -> list[float]:
+        words = re.findall(r"\w+", text.lower())
+        return np.sum([super(BagOfWordsEmbeddings, self).vector(word) for word in words], axis=0).tolist()
+
+
+class FakeCompletions:
+    """Stand-in for `client.chat.completions` and `client.beta.chat.completions`."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _completion(self, message):
+        return SimpleNamespace(choices=[SimpleNamespace(finish_reason="stop", message=message)])
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        return self._completion(SimpleNamespace(content=f"answer {self.calls}", parsed=None))
+
+    def parse(self, messages, response_format, **kwargs):
+        self.calls += 1
+        parsed = response_format(message=f"answer {self.calls}")
+        return self._completion(SimpleNamespace(content=parsed.model_dump_json(), parsed=parsed))
+
+
+class Answer(BaseModel):
+    message: str
+
+
+class Other(BaseModel):
+    count: int
+
+
+def fake_cache(**kwargs) -> SemanticCache:
+    embedding = Embedding(client=SimpleNamespace(embeddings=BagOfWordsEmbeddings(dim=64)), as_numpy=True)
+    return SemanticCache(embedding, **kwargs)
+
+
+def fake_llm(cache: SemanticCache, **kwargs) -> LLM:
+    completions = FakeCompletions()
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=completions),
+        beta=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+    )
+    return LLM(client=client, semantic_cache=cache, **kwargs)
+
+
+def test_semantic_cache_matches_paraphrases_within_namespace():
+    """1) Paraphrases hit, unrelated prompts and other namespaces or formats miss."""
+    cache = fake_cache(threshold=0.9)
+    cache.put("What is the capital of France?", "Paris", namespace="geo")
+
+    assert cache.get("what is the capital of france", namespace="geo") == "Paris"
+    assert cache.get("How tall is Mount Everest?", namespace="geo") is None
+    assert cache.get("What is the capital of France?", namespace="other") is None
+    assert cache.get("What is the capital of France?", namespace="geo", response_format=Answer) is None
+
+    stats = cache.stats
+    assert stats["namespaces"]["geo"] == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "entries": 1}
+    assert stats["hits"] == 1 and stats["misses"] == 3 and stats["entries"] == 1
+
+
+def test_semantic_cache_ttl_and_revalidation():
+    """2) Expired entries and entries failing validation are dropped and count as misses."""
+    now = [0.0]
+    cache = fake_cache(ttl=10, clock=lambda: now[0])
+    cache.put("say hi", Answer(message="hi"), response_format=Answer)
+    assert cache.get("say hi", response_format=Answer) == Answer(message="hi")
+
+    cache.put("count things", '{"message": "not a count"}', response_format=Other)
+    assert cache.get("count things", response_format=Other) is None
+    assert cache.stats["entries"] == 1
+
+    now[0] = 11.0
+    assert cache.get("say hi", response_format=Answer) is None
+    assert cache.stats["entries"] == 0
+
+
+def test_llm_serves_repeated_prompts_from_semantic_cache():
+    """3) cast and first-turn chat calls hit the cache; later turns always reach the model."""
+    cache = fake_cache()
+    llm = fake_llm(cache)
+    completions = llm.client.chat.completions
+
+    assert llm.cast("Say hi", response_format=Answer) == Answer(message="answer 1")
+    assert llm.cast("say hi!", response_format=Answer) == Answer(message="answer 1")
+    assert completions.calls == 1
+
+    assert llm.chat("Tell me a joke") == "answer 2"
+    assert llm.chat("tell me a joke") == "answer 3"  # second turn: not cached
+    assert fake_llm(cache).chat("Tell me a joke.") == "answer 2"
+
+    # A different system prompt gets its own namespace
+    assert fake_llm(cache, system_prompt="Be terse.").chat("Tell me a joke") == "answer 1"
+    assert completions.calls == 3